@@ -0,0 +1,81 @@
+"""Measure how long the spinachlang entry points take to import.
+
+Each module is imported in a fresh interpreter with ``-X importtime``; the
+script reports the cumulative import time of the module itself and whether
+pytket was pulled in. Lightweight entry points (the package, the parser and
+the CLI module) must not import pytket: only building a circuit should.
+
+Usage (with spinachlang installed, or ``PYTHONPATH=.`` from the repo root)::
+
+    python benchmarks/import_time.py [--repeat N] [--check]
+
+``--check`` exits with status 1 if a lightweight module imports pytket.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+# module -> whether importing it is allowed to load pytket
+MODULES: dict[str, bool] = {
+    "spinachlang": False,
+    "spinachlang.parser": False,
+    "spinachlang.main": False,
+    "spinachlang.spinach": False,
+    "spinachlang.aio": False,
+    "spinachlang.batch": False,
+    "spinachlang.program": False,
+    "spinachlang.ast_builder": True,
+    "spinachlang.backend": True,
+    "spinachlang.tket_passes": True,
+    "spinachlang.routing": True,
+    "spinachlang.ast_binary": True,
+}
+
+_PROBE = "import sys, {module}; print('pytket' in sys.modules)"
+
+
+def measure(module: str) -> tuple[float, bool]:
+    """Import *module* in a fresh interpreter; return (cumulative ms, pytket loaded)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = 0
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = [p.strip() for p in line.removeprefix("import time:").split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            cumulative_us = int(parts[1])
+    return cumulative_us / 1000, proc.stdout.strip() == "True"
+
+
+def main() -> None:
+    """Parse CLI arguments, time every module and print the report."""
+    p = argparse.ArgumentParser(description="Report import time of spinachlang entry points.")
+    p.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module (default: 5)")
+    p.add_argument("--check", action="store_true", help="fail if a lightweight module imports pytket")
+    args = p.parse_args()
+
+    failures = []
+    print(f"{'module':<28} {'median ms':>10} {'min ms':>8}  pytket")
+    for module, may_load_pytket in MODULES.items():
+        samples = [measure(module) for _ in range(args.repeat)]
+        times = [t for t, _ in samples]
+        loaded = samples[-1][1]
+        print(f"{module:<28} {statistics.median(times):>10.1f} {min(times):>8.1f}  {'yes' if loaded else 'no'}")
+        if loaded and not may_load_pytket:
+            failures.append(module)
+
+    if args.check and failures:
+        sys.stderr.write(f"pytket imported by: {', '.join(failures)}\n")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
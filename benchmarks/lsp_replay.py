@@ -0,0 +1,120 @@
+"""Replay a recorded LSP editing session against the server in-process.
+
+Each message of the session is decoded and dispatched exactly as the stdio
+transport would do it, with responses serialised into an in-memory writer,
+so the timings cover the protocol layer as well as the handlers. The
+script prints exact p50/p99 latencies per method measured around each
+dispatch, followed by the server's own telemetry (bucketed, but split into
+phases such as ``diagnostics:parse`` and ``diagnostics:publish``).
+
+Usage (with spinachlang[lsp] installed, or ``PYTHONPATH=.`` from the repo root)::
+
+    python benchmarks/lsp_replay.py [SESSION.json] [--repeat N] [--json]
+
+A session file holds ``{"messages": [...]}`` with JSON-RPC messages sent by
+the client after ``initialized``. The ``previousResultId`` placeholder
+``"__previous__"`` is replaced by the last semantic-token result id the
+server returned, as a real client would do.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from spinachlang.lsp import server, telemetry
+
+DEFAULT_SESSION = Path(__file__).resolve().parent / "sessions" / "teleport_editing.json"
+PREVIOUS_RESULT_ID = "__previous__"
+
+
+class _CaptureWriter:
+    """Transport writer that keeps the last payload written by the server."""
+
+    def __init__(self):
+        self.last = b""
+
+    def write(self, data: bytes) -> None:
+        self.last = data
+
+    def close(self) -> None:
+        pass
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of *samples*."""
+    ordered = sorted(samples)
+    return ordered[max(0, round(fraction * len(ordered)) - 1)]
+
+
+def _dispatch(message: dict) -> float:
+    """Send *message* to the server and return how long it took, in ms."""
+    start = time.perf_counter()
+    server.protocol.handle_message(server.protocol.structure_message(message))
+    return (time.perf_counter() - start) * 1000
+
+
+def replay(messages: list[dict], repeat: int) -> dict[str, list[float]]:
+    """Replay *messages* *repeat* times and return the latencies per method."""
+    writer = _CaptureWriter()
+    server.protocol.set_writer(writer, include_headers=False)
+    _dispatch({"jsonrpc": "2.0", "id": 0, "method": "initialize", "params": {"capabilities": {}}})
+    _dispatch({"jsonrpc": "2.0", "method": "initialized", "params": {}})
+    telemetry.reset()
+
+    samples: dict[str, list[float]] = {}
+    result_id = None
+    for _ in range(repeat):
+        for message in messages:
+            params = message.get("params", {})
+            if params.get("previousResultId") == PREVIOUS_RESULT_ID:
+                if result_id is None:
+                    continue
+                message = {**message, "params": {**params, "previousResultId": result_id}}
+            samples.setdefault(message["method"], []).append(_dispatch(message))
+            if message["method"].startswith("textDocument/semanticTokens") and writer.last:
+                result_id = json.loads(writer.last).get("result", {}).get("resultId", result_id)
+    return samples
+
+
+def main() -> None:
+    """Parse CLI arguments, replay the session and print the latency report."""
+    p = argparse.ArgumentParser(description="Replay a recorded LSP session and report p50/p99 latency.")
+    p.add_argument("session", nargs="?", type=Path, default=DEFAULT_SESSION)
+    p.add_argument("--repeat", type=int, default=20, help="number of times to replay the session (default: 20)")
+    p.add_argument("--json", action="store_true", help="print a JSON report instead of tables")
+    args = p.parse_args()
+
+    messages = json.loads(args.session.read_text(encoding="utf-8"))["messages"]
+    samples = replay(messages, args.repeat)
+
+    report = {
+        method: {
+            "count": len(values),
+            "p50_ms": _percentile(values, 0.5),
+            "p99_ms": _percentile(values, 0.99),
+            "mean_ms": statistics.fmean(values),
+        }
+        for method, values in sorted(samples.items())
+    }
+    if args.json:
+        json.dump({"requests": report, "server": telemetry.snapshot()}, sys.stdout, indent=2)
+        print()
+        return
+
+    print(f"{'method':<48} {'count':>7} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    for method, stats in report.items():
+        print(
+            f"{method:<48} {stats['count']:>7} {stats['p50_ms']:>8.3f} "
+            f"{stats['p99_ms']:>8.3f} {stats['mean_ms']:>8.3f}"
+        )
+    print("\nServer telemetry (bucketed):")
+    print(telemetry.format_table())
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ Provides Spinach class and helper functions for circuit compilation and TKET int
 String output (for files / CLI)
 --------------------------------
 compile_code(code, language)  →  str
+compile_batch(sources, language, workers=N)  →  iterator of BatchResult (process pool)
 
 Native object output (for simulation / library use)
 -----------------------------------------------------
@@ -14,31 +15,87 @@ to_braket_circuit(code)  →  braket.circuits.Circuit   (needs pytket-braket)
 to_pyquil_program(code)  →  pyquil.Program            (needs pytket-pyquil)
 to_qiskit_circuit(code)  →  qiskit.QuantumCircuit     (needs pytket-qiskit)
 
+One program, several formats
+----------------------------
+load(code)  →  SpinachProgram: .to_qasm(), .to_json(), .to_qiskit(), ... built once and memoized
+
+Async (for event loops; see spinachlang.aio)
+---------------------------------------------
+await Spinach.acompile(code, language), await Spinach.ato_tket(code), ...
+
+Validation
+----------
+validate(code)  →  list of ValidationIssue (empty when the program compiles)
+
+Binary AST (.sphb)
+------------------
+dump_ast(code)  →  bytes      load_ast(data)  →  list of AST nodes
+Every function above also accepts the bytes of dump_ast in place of code.
+
 All backends are included by default: pip install spinachlang
-"""
 
-from .spinach import Spinach
+Importing the package is cheap: ``Spinach`` and the aliases below are
+resolved on first access, and pytket plus the emitters are only imported
+once a circuit is actually built.
+"""
 
-# ── legacy / string-output aliases ────────────────────────────────────────
-compile_code        = Spinach.compile
-create_tket_circuit = Spinach.create_circuit   # kept for back-compat
+import importlib
 
-# ── native object aliases ──────────────────────────────────────────────────
-to_tket_circuit   = Spinach.to_tket
-to_cirq_circuit   = Spinach.to_cirq
-to_braket_circuit = Spinach.to_braket
-to_pyquil_program = Spinach.to_pyquil
-to_qiskit_circuit = Spinach.to_qiskit
+# alias -> name of the Spinach staticmethod it refers to
+_ALIASES = {
+    # ── legacy / string-output aliases ────────────────────────────────────
+    "compile_code":        "compile",
+    "create_tket_circuit": "create_circuit",   # kept for back-compat
+    "compile_batch":       "compile_batch",
+    # ── native object aliases ─────────────────────────────────────────────
+    "to_tket_circuit":     "to_tket",
+    "to_cirq_circuit":     "to_cirq",
+    "to_braket_circuit":   "to_braket",
+    "to_pyquil_program":   "to_pyquil",
+    "to_qiskit_circuit":   "to_qiskit",
+    # ── one program, several formats ──────────────────────────────────────
+    "load":                "load",
+    # ── validation ────────────────────────────────────────────────────────
+    "validate":            "validate",
+    # ── binary AST ────────────────────────────────────────────────────────
+    "dump_ast":            "dump_ast",
+    "load_ast":            "load_ast",
+}
 
+# Resolved lazily by __getattr__ below.
+# pylint: disable=undefined-all-variable
 __all__ = [
     "Spinach",
     # string output
     "compile_code",
     "create_tket_circuit",
+    "compile_batch",
     # native object output
     "to_tket_circuit",
     "to_cirq_circuit",
     "to_braket_circuit",
     "to_pyquil_program",
     "to_qiskit_circuit",
+    # one program, several formats
+    "load",
+    # validation
+    "validate",
+    # binary AST
+    "dump_ast",
+    "load_ast",
 ]
+# pylint: enable=undefined-all-variable
+
+
+def __getattr__(name: str):
+    """Resolve ``Spinach`` and its aliases on first access (PEP 562)."""
+    if name != "Spinach" and name not in _ALIASES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    spinach = importlib.import_module(".spinach", __name__).Spinach
+    value = spinach if name == "Spinach" else getattr(spinach, _ALIASES[name])
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,137 @@
+"""Executor behind the async entry points (``Spinach.acompile``, ``Spinach.ato_tket``, ...).
+
+Compiling is CPU-bound, so the async entry points run the synchronous one
+in an executor instead of on the event loop::
+
+    from spinachlang import Spinach, aio
+
+    aio.configure("process", max_concurrency=4)   # optional; default: threads
+    qasm = await Spinach.acompile(code, "qasm")
+
+``configure`` takes ``"thread"`` (the default), ``"process"`` or any
+``concurrent.futures.Executor``.  At most ``max_concurrency`` compilations
+(default: the number of CPUs) run at once; further calls wait for a slot
+without occupying the executor.
+
+Cancelling the awaiting task cancels a call still waiting for a slot or
+queued in the executor.  A compilation already running in a thread stops
+at the next statement; in a process it runs to the end and its result is
+dropped.  Its slot is only freed once the work has really stopped, so a
+burst of cancelled requests cannot oversubscribe the cores either.
+
+In a process pool, arguments and results are pickled: counters of a
+``PeepholeOptimizer``, ``TketPassPipeline`` or ``SourceMap`` passed in are
+updated in the worker process, not in the caller's objects.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional, Union
+
+_lock = threading.Lock()
+# "executor": the Executor in use, None until the first call;
+# "owned": whether it was created here, and so is shut down here;
+# "kind": "thread" / "process" for a pool created here, "custom" otherwise.
+_settings: dict = {"executor": None, "owned": False, "kind": "thread", "max_concurrency": os.cpu_count() or 1}
+# event loop -> semaphore bounding the compilations it has in flight
+_slots: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def configure(executor: Union[str, Executor] = "thread", max_concurrency: Optional[int] = None) -> None:
+    """Choose where async compilations run and how many may run at once.
+
+    *executor* is ``"thread"``, ``"process"`` or an Executor owned by the
+    caller; *max_concurrency* defaults to the number of CPUs.  The pool
+    created for a previous ``"thread"`` / ``"process"`` setting is shut
+    down; calls already running finish in it.
+    """
+    if isinstance(executor, str) and executor not in ("thread", "process"):
+        raise ValueError(f"Unknown executor {executor!r}. Valid options: 'thread', 'process'")
+    if max_concurrency is not None and max_concurrency < 1:
+        raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+    custom = not isinstance(executor, str)
+    with _lock:
+        previous = _settings["executor"] if _settings["owned"] else None
+        _settings.update(
+            executor=executor if custom else None,
+            owned=False,
+            kind="custom" if custom else executor,
+            max_concurrency=max_concurrency or os.cpu_count() or 1,
+        )
+        _slots.clear()
+    if previous is not None:
+        previous.shutdown(wait=False)
+
+
+def shutdown() -> None:
+    """Shut down the pool created by this module, if any; the next call creates a new one."""
+    with _lock:
+        previous = _settings["executor"] if _settings["owned"] else None
+        if previous is not None:
+            _settings.update(executor=None, owned=False)
+    if previous is not None:
+        previous.shutdown(wait=True)
+
+
+def _current_executor() -> Executor:
+    """The configured executor, creating the module's pool on first use."""
+    with _lock:
+        if _settings["executor"] is None:
+            pool = ProcessPoolExecutor if _settings["kind"] == "process" else ThreadPoolExecutor
+            _settings.update(executor=pool(max_workers=_settings["max_concurrency"]), owned=True)
+        return _settings["executor"]
+
+
+def _loop_slots(loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+    with _lock:
+        slots = _slots.get(loop)
+        if slots is None:
+            slots = _slots[loop] = asyncio.Semaphore(_settings["max_concurrency"])
+        return slots
+
+
+def _call(fn: Callable, args: tuple, kwargs: dict, cancel: Optional[threading.Event]):
+    """Worker: run *fn*, a ``Spinach`` method, stopping between statements once *cancel* is set."""
+    from .backend import cancellation  # pylint: disable=import-outside-toplevel
+
+    token = cancellation.set(cancel)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        cancellation.reset(token)
+
+
+async def run(fn: Callable, *args, **kwargs):
+    """Await ``fn(*args, **kwargs)`` run in the configured executor.
+
+    *fn* is sent to the workers by reference, so it must be a module-level
+    function or a ``Spinach`` method when the executor is a process pool.
+    """
+    loop = asyncio.get_running_loop()
+    slots = _loop_slots(loop)
+    await slots.acquire()
+    try:
+        executor = _current_executor()
+        # Threads share memory, so a running compilation can be told to stop.
+        cancel = None if isinstance(executor, ProcessPoolExecutor) else threading.Event()
+        job = executor.submit(_call, fn, args, kwargs, cancel)
+    except BaseException:
+        slots.release()
+        raise
+
+    def _release(_job) -> None:
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(slots.release)
+
+    job.add_done_callback(_release)
+    try:
+        return await asyncio.wrap_future(job)
+    except asyncio.CancelledError:
+        if cancel is not None:
+            cancel.set()
+        raise
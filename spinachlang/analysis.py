@@ -0,0 +1,352 @@
+"""Static circuit metrics computed directly from the AST.
+
+The analysis mirrors what ``Backend.compile_to_circuit`` would emit —
+same target resolution, same named-pipeline expansion, same repetition
+counts — but only tallies gates and per-qubit depth instead of building a
+pytket Circuit, so it is cheap enough to run on every keystroke.
+
+Loops are not unrolled either.  A loop whose body uses none of its
+variables is tallied like a repeated action; any other loop is simulated
+for at most ``_MAX_SIMULATED_ITERATIONS`` actions, and the metrics are
+then marked ``approximate``: lower bounds rather than exact figures.
+"""
+
+from itertools import islice
+from typing import Callable, NamedTuple, Optional
+
+from pytket import Qubit, Bit
+
+from .spinach_types import (
+    GatePipeByName,
+    GatePipeline,
+    QubitDeclaration,
+    BitDeclaration,
+    InstructionDeclaration,
+    ListDeclaration,
+    RegisterDeclaration,
+    RegisterSlice,
+    Action,
+    ConditionalAction,
+    ForLoop,
+    ModuleImport,
+)
+from .loops import expand, innermost, invariant, trip_count
+
+# Positions, within a gate's argument list, of the operands that are qubits.
+# The action target is always the first qubit and is not listed here.
+GATE_QUBIT_ARGS: dict[str, tuple[int, ...]] = {
+    "CX": (0,), "CNOT": (0,), "FCX": (0,), "FCNOT": (0,),
+    "CY": (0,), "FCY": (0,),
+    "CZ": (0,), "FCZ": (0,),
+    "CH": (0,), "FCH": (0,),
+    "CU1": (1,),
+    "SWAP": (0,),
+    "CRX": (1,), "CRY": (1,), "CRZ": (1,),
+    "ECR": (0,),
+    "ISWAP": (1,), "ISWAPMAX": (0,),
+    "ZZMAX": (0,), "ZZPH": (1,), "XXPH": (1,), "YYPH": (1,),
+    "FSIM": (2,), "TK2": (3,), "PHISWAP": (2,),
+    "CCX": (0, 1), "TOFFOLI": (0, 1),
+    "CSWAP": (0, 1), "FREDKIN": (0, 1),
+    "XXP3": (1, 2),
+}
+
+# Declaration node type -> field holding the value bound to its name.
+_DECLARED_VALUE: dict[type, str] = {
+    QubitDeclaration: "qubit",
+    BitDeclaration: "bit",
+    ListDeclaration: "items",
+    InstructionDeclaration: "pipeline",
+}
+
+CLASSICAL_OPS = frozenset({"NOT", "SET", "AND", "OR", "XOR", "COPY"})
+MEASURE_OPS = frozenset({"M", "MEASURE"})
+
+# Repeated actions are simulated until one repetition changes the tallies by
+# exactly as much as the previous one; the remainder is then extrapolated.
+_MAX_SIMULATED_REPEATS = 64
+# Loops whose body depends on the loop variables are simulated for at most
+# this many actions; past it the metrics are lower bounds.
+_MAX_SIMULATED_ITERATIONS = 1024
+
+_TARGET = Qubit("_instruction_target", 0)  # stands in for the qubit an instruction is applied to
+
+
+class CircuitMetrics(NamedTuple):
+    """Size figures of a (sub-)circuit."""
+
+    qubits: int
+    gates: int
+    two_qubit_gates: int
+    depth: int
+    approximate: bool = False  # figures are lower bounds: a loop was not simulated to its end
+
+    def label(self) -> str:
+        """Short human-readable summary, e.g. ``2 qubits · 3 gates · 1 2q · depth 3``."""
+        plural = "" if self.qubits == 1 else "s"
+        gate_plural = "" if self.gates == 1 else "s"
+        return (
+            f"{'at least ' if self.approximate else ''}"
+            f"{self.qubits} qubit{plural} · {self.gates} gate{gate_plural} · "
+            f"{self.two_qubit_gates} 2q · depth {self.depth}"
+        )
+
+
+class _Tally:
+    """Mutable gate / depth counters for one analysis run."""
+
+    def __init__(self):
+        self.depth: dict[Qubit, int] = {}
+        self.gates = 0
+        self.two_qubit_gates = 0
+        self.approximate = False
+
+    def op(self, qubits: list[Qubit]) -> None:
+        """Record one operation acting on *qubits* (ASAP layering)."""
+        layer = max(self.depth.get(q, 0) for q in qubits) + 1
+        for q in qubits:
+            self.depth[q] = layer
+        self.gates += 1
+        if len(set(qubits)) == 2:
+            self.two_qubit_gates += 1
+
+    def barrier(self, qubits: list[Qubit]) -> None:
+        """Align *qubits* to a common layer.
+
+        Like pytket, a barrier counts as a gate but does not add depth.
+        """
+        layer = max(self.depth.get(q, 0) for q in qubits)
+        for q in qubits:
+            self.depth[q] = layer
+        self.gates += 1
+
+    def snapshot(self) -> tuple[int, int, dict[Qubit, int]]:
+        """Copy of the counters, used to measure what one repetition adds."""
+        return self.gates, self.two_qubit_gates, dict(self.depth)
+
+    def metrics(self) -> CircuitMetrics:
+        """Freeze the counters."""
+        return CircuitMetrics(
+            qubits=len(self.depth),
+            gates=self.gates,
+            two_qubit_gates=self.two_qubit_gates,
+            depth=max(self.depth.values(), default=0),
+            approximate=self.approximate,
+        )
+
+
+def _as_qubit(arg, index: dict) -> Optional[Qubit]:
+    """Resolve a gate argument to a qubit, or None when it is not one."""
+    if isinstance(arg, str):
+        arg = index.get(arg)
+    if isinstance(arg, RegisterSlice):
+        register = index.get(arg.name)
+        if not isinstance(register, RegisterDeclaration) or arg.start != arg.stop or arg.stop >= register.size:
+            return None
+        arg = register.qubits(arg.start, arg.stop)[0]
+    if isinstance(arg, Qubit):
+        return arg
+    if isinstance(arg, int) and not isinstance(arg, bool):
+        return Qubit("q", arg)
+    return None
+
+
+def _record(index: dict, node) -> None:
+    """Add a declaration to *index* the way ``Backend`` does."""
+    if isinstance(node, RegisterDeclaration):
+        index[node.name] = node
+    elif type(node) in _DECLARED_VALUE:
+        index[node.name] = getattr(node, _DECLARED_VALUE[type(node)])
+
+
+class MetricsAnalyzer:
+    """Compute ``CircuitMetrics`` for a program and for each instruction it declares.
+
+    Instruction results are memoised on a fingerprint of the instruction and
+    of every declaration it refers to, so re-analysing an edited program
+    only recomputes the instructions whose definition actually changed.
+    A single analyzer is meant to be kept alive across analyses.
+    """
+
+    def __init__(self, memo_size: int = 4096):
+        self._memo: dict[str, CircuitMetrics] = {}
+        self._memo_size = memo_size
+
+    def analyse(self, nodes: list) -> tuple[CircuitMetrics, dict[int, CircuitMetrics]]:
+        """Analyse the AST *nodes* of a whole program.
+
+        Returns
+        -------
+        tuple[CircuitMetrics, dict[int, CircuitMetrics]]
+            Metrics of the whole program, and of every instruction
+            declaration keyed by its position in *nodes*.
+        """
+        tally = _Tally()
+        index: dict = {}
+        instructions: dict[int, CircuitMetrics] = {}
+        for position, node in enumerate(nodes):
+            if isinstance(node, (Action, ConditionalAction)):
+                self._action(tally, node, index)
+            elif isinstance(node, ForLoop):
+                try:
+                    self._loop(tally, node, index)
+                except ValueError:
+                    pass  # bad loop bounds are reported by the compiler, not by the metrics
+            elif isinstance(node, ModuleImport):
+                for declaration in node.declarations:
+                    _record(index, declaration)
+            elif isinstance(node, RegisterDeclaration) or type(node) in _DECLARED_VALUE:
+                _record(index, node)
+                if isinstance(node, InstructionDeclaration):
+                    instructions[position] = self.instruction_metrics(node.pipeline, index)
+        return tally.metrics(), instructions
+
+    def _action(self, tally: _Tally, node, index: dict, count: int = 1) -> None:
+        """Tally one (conditional) action, run *count* times."""
+        if isinstance(node, Action):
+            pipeline = index.get(node.instruction) if isinstance(node.instruction, str) else node.instruction
+            if isinstance(pipeline, GatePipeline):
+                targets = self._targets(node.target, index, tally)
+                self._repeat(tally, lambda: self._run(tally, targets, pipeline, index, frozenset()),
+                             (node.count or 1) * count)
+            return
+        targets = self._targets(node.target, index, tally)
+
+        def once() -> None:
+            for target in targets:
+                self._run(tally, [target], node.if_pipeline, index, frozenset())
+                if node.else_pipeline is not None:
+                    self._run(tally, [target], node.else_pipeline, index, frozenset())
+
+        self._repeat(tally, once, count)
+
+    def _loop(self, tally: _Tally, loop: ForLoop, index: dict) -> None:
+        """Tally a loop without unrolling it past ``_MAX_SIMULATED_ITERATIONS`` actions."""
+        if invariant(loop):
+            count = trip_count(loop)
+            if count:
+                self._action(tally, innermost(loop), index, count)
+            return
+        actions = expand(loop)
+        for action in islice(actions, _MAX_SIMULATED_ITERATIONS):
+            self._action(tally, action, index)
+        if next(actions, None) is not None:
+            tally.approximate = True
+
+    def instruction_metrics(self, pipeline: GatePipeline, index: dict) -> CircuitMetrics:
+        """Metrics of *pipeline* applied once to a single qubit."""
+        key = self._fingerprint(pipeline, index, frozenset())
+        cached = self._memo.get(key)
+        if cached is None:
+            tally = _Tally()
+            self._run(tally, [_TARGET], pipeline, index, frozenset())
+            cached = tally.metrics()
+            if len(self._memo) >= self._memo_size:
+                self._memo.clear()
+            self._memo[key] = cached
+        return cached
+
+    # ── internals ─────────────────────────────────────────────────────────
+
+    def _fingerprint(self, pipeline: GatePipeline, index: dict, seen: frozenset) -> str:
+        """Text identifying *pipeline* together with everything it resolves through *index*."""
+        out = []
+        for part in pipeline.parts:
+            if isinstance(part, GatePipeByName):
+                ref = index.get(part.name)
+                inner = (
+                    self._fingerprint(ref, index, seen | {part.name})
+                    if isinstance(ref, GatePipeline) and part.name not in seen
+                    else "?"
+                )
+                out.append(f"<{inner}>{'~' if part.rev else ''}")
+                continue
+            args = []
+            for arg in part.args:
+                value = index.get(arg, arg) if isinstance(arg, str) else arg
+                args.append(
+                    self._fingerprint(value, index, seen)
+                    if isinstance(value, GatePipeline) else repr(value)
+                )
+            out.append(f"{part.name}({','.join(args)})")
+        return "|".join(out)
+
+    @staticmethod
+    def _targets(raw, index: dict, tally: _Tally) -> list:
+        """Resolve an action target like ``Backend`` does, flattening named lists."""
+        if isinstance(raw, str) and raw == "*":
+            return list(tally.depth)
+        pending = list(raw) if isinstance(raw, list) else [raw]
+        resolved = []
+        while pending:
+            item = pending.pop(0)
+            if isinstance(item, RegisterSlice):
+                register = index.get(item.name)
+                in_bounds = isinstance(register, RegisterDeclaration) and item.stop < register.size
+                item = register.qubits(item.start, item.stop) if in_bounds else None
+            elif isinstance(item, str):
+                item = index.get(item)
+            if isinstance(item, RegisterDeclaration):
+                item = item.qubits()
+            if isinstance(item, list):
+                pending[:0] = item
+            elif isinstance(item, (Qubit, Bit)):
+                resolved.append(item)
+            elif isinstance(item, int):
+                resolved.append(Qubit("q", item))
+        return resolved
+
+    @staticmethod
+    def _repeat(tally: _Tally, once: Callable[[], None], count: int) -> None:
+        """Call *once* *count* times, extrapolating once repetitions become uniform."""
+        previous = None
+        for done in range(1, count + 1):
+            gates, two, depth = tally.snapshot()
+            once()
+            step = (
+                tally.gates - gates,
+                tally.two_qubit_gates - two,
+                {q: d - depth.get(q, 0) for q, d in tally.depth.items()},
+            )
+            if step == previous or done >= _MAX_SIMULATED_REPEATS:
+                remaining = count - done
+                tally.gates += step[0] * remaining
+                tally.two_qubit_gates += step[1] * remaining
+                for q, delta in step[2].items():
+                    tally.depth[q] += delta * remaining
+                return
+            previous = step
+
+    def _run(self, tally: _Tally, targets: list, pipeline: GatePipeline, index: dict, seen: frozenset) -> None:
+        """Tally one execution of *pipeline* against *targets*."""
+        qubits = [t for t in targets if isinstance(t, Qubit)]
+        if not qubits:
+            return
+        for part in pipeline.parts:
+            if isinstance(part, GatePipeByName):
+                ref = index.get(part.name)
+                if isinstance(ref, GatePipeline) and part.name not in seen:
+                    sub = GatePipeline(parts=ref.parts[::-1]) if part.rev else ref
+                    self._run(tally, targets, sub, index, seen | {part.name})
+                continue
+            name = part.name
+            if name in CLASSICAL_OPS or name == "PHASE":
+                continue
+            if name == "BARRIER":
+                tally.barrier(qubits)
+            elif name == "CIRCBOX":
+                tally.op(qubits)
+            elif name in MEASURE_OPS:
+                for q in qubits:
+                    tally.op([q])
+            else:
+                operands = [
+                    q for q in (
+                        _as_qubit(part.args[i], index)
+                        for i in GATE_QUBIT_ARGS.get(name, ())
+                        if i < len(part.args)
+                    )
+                    if q is not None
+                ]
+                for q in qubits:
+                    tally.op([q, *operands])
@@ -0,0 +1,216 @@
+"""Binary serialisation of the AST (``.sphb``).
+
+Layout::
+
+    b"SPHB" | format version (1 byte)
+    string table: count, then each string as length + UTF-8 bytes
+    nodes: count, then one value per node
+
+Counts, lengths and integers are LEB128 varints (integers zig-zag encoded
+first).  Every value starts with a one-byte tag; strings are indices into
+the table, so each name is stored once; a node is its type's tag followed
+by its field values in declaration order, its span (or none) first.  Loading rebuilds the nodes with
+``model_construct``, skipping pydantic validation: the file is trusted to
+come from ``dump``.
+"""
+
+from __future__ import annotations
+
+import struct
+
+from pytket import Bit, Qubit
+
+from .spinach_types import (
+    Action,
+    BitDeclaration,
+    ConditionalAction,
+    ConstantDeclaration,
+    ForLoop,
+    GateCall,
+    GatePipeByName,
+    GatePipeline,
+    InstructionDeclaration,
+    ListDeclaration,
+    LoopExpr,
+    ModuleImport,
+    QubitDeclaration,
+    RegisterDeclaration,
+    RegisterSlice,
+)
+
+MAGIC = b"SPHB"
+FORMAT_VERSION = 2
+
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR, _LIST, _QUBIT, _BIT, _TUPLE = range(10)
+_FIRST_NODE = 16
+# The tag of a node type is _FIRST_NODE + its position here: only ever append.
+_NODE_TYPES = (
+    QubitDeclaration,
+    BitDeclaration,
+    RegisterDeclaration,
+    RegisterSlice,
+    ListDeclaration,
+    ConstantDeclaration,
+    GatePipeByName,
+    GateCall,
+    GatePipeline,
+    InstructionDeclaration,
+    Action,
+    ConditionalAction,
+    LoopExpr,
+    ForLoop,
+    ModuleImport,
+)
+_NODE_TAGS = {cls: _FIRST_NODE + i for i, cls in enumerate(_NODE_TYPES)}
+_NODE_FIELDS = [tuple(cls.model_fields) for cls in _NODE_TYPES]
+_DOUBLE = struct.Struct("<d")
+
+
+def _varint(out: bytearray, value: int) -> None:
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+class _Writer:
+    """Encode values into ``body``, interning strings into ``strings``."""
+
+    def __init__(self):
+        self.body = bytearray()
+        self.strings: dict[str, int] = {}
+
+    def string(self, value: str) -> None:
+        """Append the table index of *value*."""
+        index = self.strings.setdefault(str(value), len(self.strings))
+        _varint(self.body, index)
+
+    def units(self, tag: int, unit) -> None:
+        """Append a Qubit or Bit: register name and indices."""
+        self.body.append(tag)
+        self.string(unit.reg_name)
+        _varint(self.body, len(unit.index))
+        for i in unit.index:
+            _varint(self.body, i)
+
+    def value(self, value) -> None:  # pylint: disable=too-many-branches
+        """Append one tagged value."""
+        body = self.body
+        if value is None:
+            body.append(_NONE)
+        elif isinstance(value, bool):
+            body.append(_TRUE if value else _FALSE)
+        elif isinstance(value, int):
+            body.append(_INT)
+            _varint(body, value << 1 if value >= 0 else (-value << 1) - 1)
+        elif isinstance(value, float):
+            body.append(_FLOAT)
+            body += _DOUBLE.pack(value)
+        elif isinstance(value, str):
+            body.append(_STR)
+            self.string(value)
+        elif isinstance(value, (list, tuple)):
+            body.append(_LIST if isinstance(value, list) else _TUPLE)
+            _varint(body, len(value))
+            for item in value:
+                self.value(item)
+        elif isinstance(value, Qubit):
+            self.units(_QUBIT, value)
+        elif isinstance(value, Bit):
+            self.units(_BIT, value)
+        else:
+            tag = _NODE_TAGS.get(type(value))
+            if tag is None:
+                raise TypeError(f"Cannot serialise AST value of type {type(value).__name__}")
+            body.append(tag)
+            for field in _NODE_FIELDS[tag - _FIRST_NODE]:
+                self.value(getattr(value, field))
+
+
+def dump(nodes: list) -> bytes:
+    """Serialise the AST *nodes* (as returned by ``AstBuilder``)."""
+    writer = _Writer()
+    _varint(writer.body, len(nodes))
+    for node in nodes:
+        writer.value(node)
+    out = bytearray(MAGIC)
+    out.append(FORMAT_VERSION)
+    _varint(out, len(writer.strings))
+    for string in writer.strings:
+        encoded = string.encode("utf-8")
+        _varint(out, len(encoded))
+        out += encoded
+    out += writer.body
+    return bytes(out)
+
+
+class _Reader:
+    """Decode values from *data* starting at ``pos``."""
+
+    def __init__(self, data: bytes, pos: int):
+        self.data = data
+        self.pos = pos
+        self.strings: list[str] = []
+
+    def varint(self) -> int:
+        """Read one varint."""
+        data, pos = self.data, self.pos
+        result = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                self.pos = pos
+                return result
+            shift += 7
+
+    def units(self, cls):
+        """Read a Qubit or Bit."""
+        reg = self.strings[self.varint()]
+        return cls(reg, [self.varint() for _ in range(self.varint())])
+
+    def value(self):  # pylint: disable=too-many-return-statements
+        """Read one tagged value."""
+        tag = self.data[self.pos]
+        self.pos += 1
+        if tag >= _FIRST_NODE:
+            cls = _NODE_TYPES[tag - _FIRST_NODE]
+            return cls.model_construct(**{field: self.value() for field in _NODE_FIELDS[tag - _FIRST_NODE]})
+        if tag == _STR:
+            return self.strings[self.varint()]
+        if tag == _INT:
+            raw = self.varint()
+            return raw >> 1 if not raw & 1 else -((raw + 1) >> 1)
+        if tag == _LIST:
+            return [self.value() for _ in range(self.varint())]
+        if tag == _TUPLE:
+            return tuple(self.value() for _ in range(self.varint()))
+        if tag == _FLOAT:
+            (number,) = _DOUBLE.unpack_from(self.data, self.pos)
+            self.pos += _DOUBLE.size
+            return number
+        if tag in (_NONE, _FALSE, _TRUE):
+            return (None, False, True)[tag]
+        if tag == _QUBIT:
+            return self.units(Qubit)
+        if tag == _BIT:
+            return self.units(Bit)
+        raise ValueError(f"Corrupt .sphb data: unknown tag {tag} at offset {self.pos - 1}")
+
+
+def load(data: bytes) -> list:
+    """Rebuild the AST nodes serialised by ``dump``; raise ValueError if *data* is not a .sphb file."""
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a .sphb file (bad magic number)")
+    if len(data) <= len(MAGIC) or data[len(MAGIC)] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported .sphb format version (expected {FORMAT_VERSION})")
+    reader = _Reader(data, len(MAGIC) + 1)
+    try:
+        for _ in range(reader.varint()):
+            length = reader.varint()
+            reader.strings.append(data[reader.pos:reader.pos + length].decode("utf-8"))
+            reader.pos += length
+        return [reader.value() for _ in range(reader.varint())]
+    except (IndexError, UnicodeDecodeError, struct.error) as exc:
+        raise ValueError("Corrupt .sphb data: truncated or malformed") from exc
@@ -1,8 +1,12 @@
 """Abstract syntax tree builder"""
 
-from typing import Union, List
+from pathlib import Path
+from typing import Optional, Union, List
 from pytket import Qubit, Bit
-from lark import Transformer, v_args
+from lark import Token, Transformer, v_args
+
+from .modules import CompiledModule, load_module
+from .parser import Parser
 
 from .spinach_types import (
     GatePipeByName,
@@ -11,18 +15,48 @@ from .spinach_types import (
     Action,
     ConditionalAction,
     QubitDeclaration,
+    RegisterDeclaration,
+    RegisterSlice,
     BitDeclaration,
     ListDeclaration,
     InstructionDeclaration,
+    ConstantDeclaration,
+    ForLoop,
+    LoopExpr,
+    ModuleImport,
+    Node,
+    DECLARATION_TYPES,
 )
 
+# Constants available without a declaration.  Angles are in half-turns, so
+# pi is 1.0: RZ(pi / 2) is RZ(0.5).
+BUILTIN_CONSTANTS: dict[str, float] = {"pi": 1.0}
+
+
+class AstBuilder(Transformer):  # pylint: disable=too-many-public-methods,too-many-instance-attributes  # one callback per grammar rule
+    """Abstract syntax tree builder
 
-class AstBuilder(Transformer):
-    """Abstract syntax tree builder"""
+    Imports are resolved relative to *base_dir* (default: the current
+    directory); *import_chain* lists the modules being imported, to detect
+    cycles.
 
-    def __init__(self):
+    With *spans*, every node gets the source offsets of the rule it was
+    built from; the tree must then come from ``Parser.get_tree(code,
+    positions=True)``.  Declarations of imported modules have no spans.
+    """
+
+    def __init__(self, base_dir: Optional[Path] = None, import_chain: tuple[str, ...] = (), spans: bool = False):
         super().__init__()
+        self.spans = spans
+        self.base_dir = Path(base_dir) if base_dir is not None else Path.cwd()
+        self.import_chain = import_chain
+        # resolved path -> module, for every import of this program
+        self.modules: dict[str, CompiledModule] = {}
         self.instructions: dict[str, InstructionDeclaration] = {}
+        self.constants: dict[str, Union[int, float]] = {}
+        self._declared: set[str] = set()
+        # Variables of the enclosing for loops, innermost last.
+        self._loop_vars: List[str] = []
 
     def _resolve_pipeline_parts(
         self, parts: List[Union[GateCall, GatePipeByName]], seen=None
@@ -52,6 +86,14 @@ class AstBuilder(Transformer):
                 resolved.append(part)
         return resolved
 
+    def _call_userfunc(self, tree, new_children=None):
+        """Run the rule's callback, then record the rule's span on the node it built."""
+        result = super()._call_userfunc(tree, new_children)
+        # Nodes passed up unchanged (statement, declaration) keep their innermost span.
+        if self.spans and isinstance(result, Node) and result.span is None and not tree.meta.empty:
+            result.span = (tree.meta.start_pos, tree.meta.end_pos)
+        return result
+
     # pylint: disable=invalid-name
     def NUMBER(self, items):
         """handle number — returns int for plain integers, float for decimals.
@@ -109,7 +151,7 @@ class AstBuilder(Transformer):
 
     def list(self, items):
         """handle list"""
-        return items
+        return [self._loop_target(it) for it in items]
 
     @v_args(inline=True)
     def qubit_declaration(self, name, reg_or_number, number=None):
@@ -121,6 +163,7 @@ class AstBuilder(Transformer):
           tom : 0             → children (name, index)           → Qubit("q",        index)
         """
         context = f"qubit declaration {name!r}"
+        self._declare(name)
         if number is None:
             # Alternative 2: bare index "tom : 0" — no "q" keyword at all
             index = self._validate_non_negative_int_index(
@@ -137,6 +180,41 @@ class AstBuilder(Transformer):
             name=str(name), qubit=Qubit(str(reg_or_number), index)
         )
 
+    @v_args(inline=True)
+    def register_declaration(self, name, register, start, stop):
+        """Handle a qubit range declaration: "data : q[0..999]" / "anc : q ancilla[0..3]".
+
+        Only the bounds are kept; the backend expands them when targets are resolved.
+        """
+        context = f"register declaration {name!r}"
+        self._declare(name)
+        start = self._validate_non_negative_int_index(start, "Qubit", context)
+        stop = self._validate_non_negative_int_index(stop, "Qubit", context)
+        if stop < start:
+            raise ValueError(f"Empty range [{start}..{stop}] in {context}")
+        return RegisterDeclaration(
+            name=str(name), register_name=str(register) if register is not None else "q", start=start, stop=stop
+        )
+
+    @v_args(inline=True)
+    def register_slice(self, name, start, stop=None):
+        """Handle a register slice target: "data[10..20]" or the single qubit "data[3]"."""
+        context = f"slice of {str(name)!r}"
+        start = self._loop_index(start, context)
+        stop = start if stop is None else self._loop_index(stop, context)
+        if isinstance(start, int) and isinstance(stop, int) and stop < start:
+            raise ValueError(f"Empty range [{start}..{stop}] in {context}")
+        return RegisterSlice(name=str(name), start=start, stop=stop)
+
+    def _loop_index(self, index, context: str) -> Union[int, LoopExpr]:
+        """An index that may depend on loop variables; checked now only when it does not."""
+        index = self._operand(index)
+        if isinstance(index, LoopExpr):
+            return index
+        if isinstance(index, float) and index.is_integer():
+            index = int(index)
+        return self._validate_non_negative_int_index(index, "Qubit", context)
+
     @v_args(inline=True)
     def bit_declaration(self, name, reg_or_number, number=None):
         """Handle classical bit declaration with optional named register.
@@ -147,6 +225,7 @@ class AstBuilder(Transformer):
           legacy 2-child tree → children (name, index)           → Bit("c",      index)
         """
         context = f"bit declaration {name!r}"
+        self._declare(name)
         if number is None:
             # Legacy 2-child tree (e.g. manually constructed in tests): reg_or_number is the index
             index = self._validate_non_negative_int_index(
@@ -166,15 +245,115 @@ class AstBuilder(Transformer):
     @v_args(inline=True)
     def list_declaration(self, name, lst):
         """handle list declaration"""
+        self._declare(name)
         return ListDeclaration(name=name, items=lst)
 
     @v_args(inline=True)
     def instruction_declaration(self, name, gate_pip):
         """handle instruction declaration"""
+        self._declare(name)
         instr = InstructionDeclaration(name=name, pipeline=gate_pip)
         self.instructions[name] = instr
         return instr
 
+    @v_args(inline=True)
+    def constant_declaration(self, name, value):
+        """Handle a constant declaration: the expression is already folded."""
+        name = str(name)
+        if name in self.constants or name in BUILTIN_CONSTANTS:
+            raise ValueError(f"Constant {name!r} is already defined")
+        if name in self._declared:
+            raise ValueError(f"Constant {name!r} reuses the name of a declaration")
+        self.constants[name] = self._operand(value)
+        return ConstantDeclaration(name=name, value=self.constants[name])
+
+    @v_args(inline=True)
+    def import_statement(self, path):
+        """Handle ``import "lib.sph"``: its declarations become visible to the rest of the file."""
+        target = (self.base_dir / str(path)[1:-1]).resolve()
+        module = load_module(target, _build_module, self.import_chain)
+        resolved = str(target)
+        self.modules[resolved] = module
+        for node in module.declarations:
+            if isinstance(node, ConstantDeclaration):
+                if self.constants.get(node.name) != node.value:
+                    self.constant_declaration(Token("NAME", node.name), node.value)
+                continue
+            self._declare(node.name)
+            if isinstance(node, InstructionDeclaration):
+                self.instructions[node.name] = node
+        return ModuleImport(path=resolved, declarations=module.declarations)
+
+    def _declare(self, name):
+        """Record a qubit / bit / list / instruction name, which constants may not shadow."""
+        if str(name) in self.constants:
+            raise ValueError(f"Declaration {str(name)!r} reuses the name of a constant")
+        self._declared.add(str(name))
+
+    def _operand(self, item) -> Union[int, float, LoopExpr]:
+        """Value of an operand of an angle expression."""
+        if isinstance(item, Token):
+            name = str(item)
+            if name in self._loop_vars:
+                return LoopExpr(op="var", args=[name])
+            if name in self.constants:
+                return self.constants[name]
+            if name in BUILTIN_CONSTANTS and name not in self._declared:
+                return BUILTIN_CONSTANTS[name]
+            raise ValueError(f"Unknown constant {name!r} in angle expression")
+        return item
+
+    def _loop_target(self, item):
+        """A bare loop variable used as a target or list item."""
+        if isinstance(item, Token) and str(item) in self._loop_vars:
+            return LoopExpr(op="var", args=[str(item)])
+        return item
+
+    # Angle expressions are folded bottom-up, so pipelines only ever hold
+    # numbers; only sub-expressions over loop variables stay as LoopExpr.
+
+    @v_args(inline=True)
+    def add(self, left, right):
+        """handle +"""
+        left, right = self._operand(left), self._operand(right)
+        if isinstance(left, LoopExpr) or isinstance(right, LoopExpr):
+            return LoopExpr(op="add", args=[left, right])
+        return left + right
+
+    @v_args(inline=True)
+    def sub(self, left, right):
+        """handle binary -"""
+        left, right = self._operand(left), self._operand(right)
+        if isinstance(left, LoopExpr) or isinstance(right, LoopExpr):
+            return LoopExpr(op="sub", args=[left, right])
+        return left - right
+
+    @v_args(inline=True)
+    def mul(self, left, right):
+        """handle *"""
+        left, right = self._operand(left), self._operand(right)
+        if isinstance(left, LoopExpr) or isinstance(right, LoopExpr):
+            return LoopExpr(op="mul", args=[left, right])
+        return left * right
+
+    @v_args(inline=True)
+    def div(self, left, right):
+        """handle /"""
+        left, right = self._operand(left), self._operand(right)
+        if right == 0:
+            raise ValueError("Division by zero in angle expression")
+        if isinstance(left, LoopExpr) or isinstance(right, LoopExpr):
+            return LoopExpr(op="div", args=[left, right])
+        return left / right
+
+    @v_args(inline=True)
+    def neg(self, operand):
+        """handle unary -"""
+        operand = self._operand(operand)
+        if isinstance(operand, LoopExpr):
+            return LoopExpr(op="neg", args=[operand])
+        return -operand
+
     def gate_call(self, items):
         """handle gate calls"""
         name_token = items[0]
@@ -184,9 +363,20 @@ class AstBuilder(Transformer):
         return GateCall(name=str(name_token), args=args)
 
     def args(self, items):
-        """handle arguments"""
+        """Handle arguments.
+
+        A bare name is a qubit / bit reference unless it names a constant or
+        a loop variable, in which case it is replaced by the constant's value
+        or by the variable.
+        """
         res = []
         for it in items:
+            if isinstance(it, Token) and (
+                str(it) in self._loop_vars
+                or str(it) in self.constants
+                or (str(it) in BUILTIN_CONSTANTS and str(it) not in self._declared)
+            ):
+                it = self._operand(it)
             res.append(it)
         return res
 
@@ -207,9 +397,9 @@ class AstBuilder(Transformer):
     def action(self, target, count, instruction):
         """handle actions"""
         return Action(
-            target=target,
+            target=self._loop_target(target),
             count=count,
-            instruction=GatePipeline(parts=instruction.parts),
+            instruction=GatePipeline(parts=instruction.parts, span=instruction.span),
         )
 
     def cond_pip(self, items):
@@ -233,7 +423,7 @@ class AstBuilder(Transformer):
           if-only:   [target, if_pipeline, bit_name]          (3 items)
           if/else:   [target, if_pipeline, bit_name, else_pipeline]  (4 items)
         """
-        target = items[0]
+        target = self._loop_target(items[0])
         if_pipeline = items[1]   # GatePipeline from cond_pip
         condition_bit = str(items[2])  # NAME token → condition bit name
         else_pipeline = items[3] if len(items) > 3 else None
@@ -244,6 +434,28 @@ class AstBuilder(Transformer):
             else_pipeline=else_pipeline,
         )
 
+    @v_args(inline=True)
+    def for_header(self, var, start, stop):
+        """Open the scope of a loop variable; the bounds may only use enclosing loop variables."""
+        var = str(var)
+        if var in self._loop_vars:
+            raise ValueError(f"Loop variable {var!r} is already used by an enclosing loop")
+        if var in self.constants or var in BUILTIN_CONSTANTS or var in self._declared:
+            raise ValueError(f"Loop variable {var!r} reuses the name of a declaration")
+        context = f"bounds of loop over {var!r}"
+        start, stop = self._loop_index(start, context), self._loop_index(stop, context)
+        if isinstance(start, int) and isinstance(stop, int) and stop < start:
+            raise ValueError(f"Empty range [{start}..{stop}] in {context}")
+        self._loop_vars.append(var)
+        return var, start, stop
+
+    @v_args(inline=True)
+    def for_loop(self, header, body):
+        """Handle a for loop; the body is kept as one node for the backend to expand."""
+        var, start, stop = header
+        self._loop_vars.pop()
+        return ForLoop(var=var, start=start, stop=stop, body=body)
+
     def declaration(self, items):
         """handle declarations"""
         return items[0]
@@ -255,3 +467,19 @@ class AstBuilder(Transformer):
     def statement(self, items):
         """handle statements"""
         return items[0]
+
+
+def _build_module(source: Path, code: str, import_chain: tuple[str, ...]) -> tuple[list, dict[str, str]]:
+    """Parse a module: its declarations, imports flattened, and the sources it imports."""
+    declarations: list = []
+    imported: dict[str, str] = {}
+    builder = AstBuilder(base_dir=source.parent, import_chain=import_chain)
+    for node in builder.transform(Parser.get_tree(code)):
+        if isinstance(node, ModuleImport):
+            declarations.extend(node.declarations)
+            imported.update(builder.modules[node.path].sources)
+        elif isinstance(node, DECLARATION_TYPES):
+            declarations.append(node)
+        else:
+            raise ValueError(f"Module {source} may only contain declarations, found {type(node).__name__}")
+    return declarations, imported
@@ -1,23 +1,62 @@
 """backend of spinach"""
 
+# pylint: disable=too-many-lines  # one handler per gate
+
 import json
 import os
 import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError
+from contextvars import ContextVar
 from functools import reduce
 from typing import Callable, Optional, Union
-from pytket import Circuit, Qubit, Bit
+from pytket import Circuit, Qubit, Bit, OpType
 from pytket.qasm import circuit_to_qasm_str
 
 from .spinach_types import (
     GatePipeByName,
     GatePipeline,
     QubitDeclaration,
+    RegisterDeclaration,
+    RegisterSlice,
     BitDeclaration,
     InstructionDeclaration,
     ListDeclaration,
     Action,
     ConditionalAction,
+    ForLoop,
+    ModuleImport,
+    DECLARATION_TYPES,
 )
+from .loops import expand
+
+
+# CircBoxes built by CIRCBOX(name), so applying the same box again reuses one
+# object instead of recompiling the instruction.  Boxes only depend on the
+# pipeline and the number of qubits, so they are shared across compilations
+# (keyed by the pipeline's structure, bounded LRU) and, within a compilation,
+# looked up by pipeline identity first to skip serialising the key.
+_CIRCBOX_CACHE_SIZE = 256
+_shared_circboxes: OrderedDict = OrderedDict()
+_shared_circboxes_lock = threading.Lock()
+_compilation_circboxes: ContextVar[Optional[dict]] = ContextVar("_compilation_circboxes", default=None)
+# Qubits known to be in each circuit touched by a compilation, keyed by
+# id(circuit) -> (circuit, set of qubits); the circuit is kept alive so its
+# id is not reused.  Lets __ensure_qubits skip rebuilding c.qubits per gate.
+_compilation_qubits: ContextVar[Optional[dict]] = ContextVar("_compilation_qubits", default=None)
+# Call plans of the pipelines executed by a compilation (see Backend.__plan).
+_compilation_plans: ContextVar[Optional[dict]] = ContextVar("_compilation_plans", default=None)
+# Set by the caller (see spinachlang.aio) to stop a running compilation:
+# once the event is set, compile_to_circuit raises CancelledError before
+# the next node, loop iterations included.
+cancellation: ContextVar[Optional[threading.Event]] = ContextVar("cancellation", default=None)
+
+
+def _locate(exc: Exception, node) -> None:
+    """Record on *exc* the span of *node*, unless a node nested in it already did."""
+    if getattr(exc, "span", None) is None:
+        exc.span = getattr(node, "span", None)
 
 
 def _per_target(fn: Callable) -> Callable:
@@ -474,7 +513,6 @@ class Backend:
             are not remapped; they must not exceed the sub-circuit qubit count.
           - Conditional CIRCBOX is not supported.
         """
-        from pytket.circuit import CircBox  # pylint: disable=import-outside-toplevel
         if not args:
             raise ValueError(
                 "CIRCBOX requires one argument: the name of a declared instruction pipeline. "
@@ -495,20 +533,50 @@ class Backend:
         if n_qubits < 1:
             raise ValueError("CIRCBOX requires at least one qubit target.")
 
-        # Build a fresh sub-circuit with abstract qubits q[0]..q[n_qubits-1].
-        sub = Circuit(n_qubits)
-        sub_index: dict = {i: Qubit(Backend.DEFAULT_QUBIT_REGISTER, i) for i in range(n_qubits)}
-
-        # Compile the pipeline into the sub-circuit targeting sub qubit 0.
-        # Integer args such as CX(1) reference sub qubit 1, which maps to
-        # targets[1] in the parent circuit via add_circbox ordering.
-        first_sub_qubit = Qubit(Backend.DEFAULT_QUBIT_REGISTER, 0)
-        Backend.__execute_pipeline_for_targets([first_sub_qubit], pipeline, sub, sub_index)
-
-        box = CircBox(sub)
+        box = Backend.__circbox_for(pipeline, n_qubits)
         list(map(lambda q: Backend.__ensure_qubit(c, q), qubit_targets))
         c.add_circbox(box, qubit_targets)
 
+    @staticmethod
+    def __circbox_for(pipeline: GatePipeline, n_qubits: int):
+        """Return the CircBox of *pipeline* over *n_qubits*, compiling it at most once."""
+        from pytket.circuit import CircBox  # pylint: disable=import-outside-toplevel
+        local = _compilation_circboxes.get()
+        local_key = (id(pipeline), n_qubits)
+        if local is not None and local_key in local and local[local_key][0] is pipeline:
+            return local[local_key][1]
+
+        shared_key = (pipeline.model_dump_json(), n_qubits)
+        with _shared_circboxes_lock:
+            box = _shared_circboxes.get(shared_key)
+            if box is not None:
+                _shared_circboxes.move_to_end(shared_key)
+        if box is None:
+            # Build a fresh sub-circuit with abstract qubits q[0]..q[n_qubits-1].
+            sub = Circuit(n_qubits)
+            sub_index: dict = {i: Qubit(Backend.DEFAULT_QUBIT_REGISTER, i) for i in range(n_qubits)}
+
+            # Compile the pipeline into the sub-circuit targeting sub qubit 0.
+            # Integer args such as CX(1) reference sub qubit 1, which maps to
+            # targets[1] in the parent circuit via add_circbox ordering.
+            first_sub_qubit = Qubit(Backend.DEFAULT_QUBIT_REGISTER, 0)
+            Backend.__execute_pipeline_for_targets([first_sub_qubit], pipeline, sub, sub_index)
+            box = CircBox(sub)
+            with _shared_circboxes_lock:
+                _shared_circboxes[shared_key] = box
+                while len(_shared_circboxes) > _CIRCBOX_CACHE_SIZE:
+                    _shared_circboxes.popitem(last=False)
+
+        if local is not None:
+            local[local_key] = (pipeline, box)  # keeps pipeline alive so its id is not reused
+        return box
+
+    @staticmethod
+    def clear_circbox_cache() -> None:
+        """Forget the CircBoxes shared across compilations."""
+        with _shared_circboxes_lock:
+            _shared_circboxes.clear()
+
     # ── Group qubit handlers ───────────────────────────────────────────────
     # Signature: fn(c, targets: list[Qubit], args, cond)
     # Stored directly in the dispatch table (no _per_target wrapping needed).
@@ -698,22 +766,58 @@ class Backend:
         "COPY": __handle_copy_bit,
     }
 
+    # Names accepted in a pipeline applied to qubit / bit targets.
+    QUBIT_GATES = frozenset(__qubit_dispatch)
+    BIT_OPERATIONS = frozenset(__bit_dispatch)
+
     # ── Circuit utilities ──────────────────────────────────────────────────
 
+    # c.qubits / c.bits build a fresh list on every access, so membership
+    # tests against them cost O(circuit width) per call.  During a
+    # compilation the qubits of each circuit are tracked in a set instead;
+    # outside one, the single-unit helper tries the add and treats "already
+    # exists" as present, and the bulk helper builds the set once per call.
+
+    @staticmethod
+    def __known_qubits(c: Circuit) -> set:
+        """The qubits of *c*, tracked for the rest of the compilation when there is one."""
+        known = _compilation_qubits.get()
+        if known is None:
+            return set(c.qubits)
+        entry = known.get(id(c))
+        if entry is None or entry[0] is not c:
+            entry = known[id(c)] = (c, set(c.qubits))
+        return entry[1]
+
+    @staticmethod
+    def __forget_qubits(c: Circuit) -> None:
+        """Drop the tracked qubits of *c* after units were added behind the helpers' back."""
+        known = _compilation_qubits.get()
+        if known is not None:
+            known.pop(id(c), None)
+
     @staticmethod
     def __ensure_qubit(c: Circuit, qb: Union[int, Qubit]):
         """Ensure the qubit is in the circuit."""
         q = Qubit(Backend.DEFAULT_QUBIT_REGISTER, qb) if isinstance(qb, int) else qb
-        if q not in c.qubits:
-            c.add_qubit(q)
-            Backend.__ensure_bit(c, Bit(Backend.DEFAULT_BIT_REGISTER, q.index[0]))
+        Backend.__ensure_qubits(c, (q,))
+
+    @staticmethod
+    def __ensure_qubits(c: Circuit, qubits) -> None:
+        """Ensure every qubit of *qubits* is in the circuit, in order."""
+        present = Backend.__known_qubits(c)
+        missing = [q for q in dict.fromkeys(qubits) if q not in present]
+        if not missing:
+            return
+        list(map(c.add_qubit, missing))
+        present.update(missing)
+        list(map(lambda q: Backend.__ensure_bit(c, Bit(Backend.DEFAULT_BIT_REGISTER, q.index[0])), missing))
 
     @staticmethod
     def __ensure_bit(c: Circuit, b: Union[int, Bit]):
         """Ensure the bit is in the circuit."""
         bit = Bit(Backend.DEFAULT_BIT_REGISTER, b) if isinstance(b, int) else b
-        if bit not in c.bits:
-            c.add_bit(bit)
+        c.add_bit(bit, reject_dups=False)
 
     # ── Pipeline execution engine ──────────────────────────────────────────
 
@@ -727,83 +831,145 @@ class Backend:
     ):
         """Execute a gate pipeline against a resolved list of targets.
 
-        For each gate the engine:
-          1. Looks up the gate name in the qubit dispatch (if there are qubit targets).
-          2. Looks up the gate name in the bit dispatch   (if there are bit targets).
-          3. Pre-checks both lookups — raises before touching the circuit if either
-             target type has no handler for the requested gate.
-          4. Calls each handler: fn(c, targets, args, cond).
+        The pipeline is first compiled into a call plan (see ``__plan``),
+        reusing the cached plans of the named pipelines it calls; planning
+        raises before touching the circuit if any gate has no handler for
+        the target types.  Executing then just replays the plan: every step
+        calls its handlers as fn(c, targets, args, cond).
 
         Every entry in both dispatch tables has that same interface, so this
         function never inspects how the handler works — it just selects and calls.
         """
-        def _process_part(part) -> None:
-            if isinstance(part, GatePipeByName):
-                sub = GatePipeline(
-                    parts=index[part.name].parts[::-1] if part.rev else index[part.name].parts
-                )
-                Backend.__execute_pipeline_for_targets(targets, sub, c, index, cond)
-                return
-
-            qubit_targets = [t for t in targets if isinstance(t, Qubit)]
-            bit_targets   = [t for t in targets if isinstance(t, Bit)]
-
-            # Resolve args once: str names → index values (Qubit/Bit/number)
-            number_args = [index[x] if isinstance(x, str) else x for x in part.args]
-
-            # ── pre-flight lookup (raises before any circuit mutation) ─
-            qubit_fn = Backend.__qubit_dispatch.get(part.name) if qubit_targets else None
-            bit_fn   = Backend.__bit_dispatch.get(part.name)   if bit_targets   else None
-
-            if qubit_targets and qubit_fn is None:
-                raise ValueError(f"Unknown qubit gate {part.name!r}")
-            if bit_targets and bit_fn is None:
-                raise ValueError(
-                    f"Unknown classical bit operation {part.name!r}. "
-                    "Valid: NOT, SET(0/1), AND(b0,b1), OR(b0,b1), XOR(b0,b1), COPY(src)"
-                )
-
-            # ── execute ───────────────────────────────────────────────
-            if qubit_fn:
-                list(map(lambda q: Backend.__ensure_qubit(c, q), qubit_targets))
-                qubit_fn(c, qubit_targets, number_args, cond)
+        qubit_targets = [t for t in targets if isinstance(t, Qubit)]
+        bit_targets   = [t for t in targets if isinstance(t, Bit)]
+        plan = Backend.__plan_parts(pipeline.parts, index, bool(qubit_targets), bool(bit_targets))
+        Backend.__run_plan(plan, qubit_targets, bit_targets, c, cond)
 
+    @staticmethod
+    def __run_plan(plan: list, qubit_targets: list, bit_targets: list, c: Circuit, cond: Optional[dict]):
+        """Replay the steps of *plan* on the targets."""
+        if qubit_targets and any(qubit_fn for qubit_fn, _, _ in plan):
+            Backend.__ensure_qubits(c, qubit_targets)
+        for qubit_fn, bit_fn, args in plan:
+            if qubit_fn:
+                qubit_fn(c, qubit_targets, args, cond)
             if bit_fn:
-                bit_fn(c, bit_targets, number_args, cond)
-
-        list(map(_process_part, pipeline.parts))
+                bit_fn(c, bit_targets, args, cond)
+
+    # ── Call plans ─────────────────────────────────────────────────────────
+    # A plan is the flat list of (qubit handler, bit handler, resolved args)
+    # steps of a pipeline, named pipelines included.  Plans depend on the
+    # pipeline, on the index the names are resolved in and on whether there
+    # are qubit and/or bit targets.  The plans of named pipelines, which run
+    # once per use, are cached per compilation on those; redeclaring a name
+    # drops them.  An action's own pipeline runs once and is planned inline.
+
+    @staticmethod
+    def __plan(pipeline: GatePipeline, index: dict, with_qubits: bool, with_bits: bool) -> list:
+        """The call plan of *pipeline*, compiled at most once per compilation."""
+        plans = _compilation_plans.get()
+        key = (id(pipeline), id(index), with_qubits, with_bits)
+        if plans is not None and key in plans and plans[key][0] is pipeline:
+            return plans[key][2]
+        steps = Backend.__plan_parts(pipeline.parts, index, with_qubits, with_bits)
+        if plans is not None:
+            plans[key] = (pipeline, index, steps)  # keeps both alive so their ids are not reused
+        return steps
+
+    @staticmethod
+    def __plan_parts(parts: list, index: dict, with_qubits: bool, with_bits: bool) -> list:
+        """Compile pipeline *parts* into call steps; raise on a gate the targets cannot take."""
+        steps = []
+        for part in parts:
+            try:
+                steps.extend(Backend.__plan_part(part, index, with_qubits, with_bits))
+            except (ValueError, TypeError, KeyError) as exc:
+                _locate(exc, part)
+                raise
+        return steps
+
+    @staticmethod
+    def __plan_part(part, index: dict, with_qubits: bool, with_bits: bool) -> list:
+        """The call steps of one pipeline part."""
+        if isinstance(part, GatePipeByName):
+            sub = index[part.name]
+            return (
+                Backend.__plan_parts(sub.parts[::-1], index, with_qubits, with_bits) if part.rev
+                else Backend.__plan(sub, index, with_qubits, with_bits)
+            )
 
-    @staticmethod
-    def __handle_pipeline(
-        target: Qubit,
-        pipeline: GatePipeline,
-        c: Circuit,
-        index: dict,
-        cond: Optional[dict] = None,
-    ):
-        """Single-target wrapper used by the conditional-action path."""
-        Backend.__execute_pipeline_for_targets([target], pipeline, c, index, cond)
+        qubit_fn = Backend.__qubit_dispatch.get(part.name) if with_qubits else None
+        bit_fn   = Backend.__bit_dispatch.get(part.name)   if with_bits   else None
+        if with_qubits and qubit_fn is None:
+            raise ValueError(f"Unknown qubit gate {part.name!r}")
+        if with_bits and bit_fn is None:
+            raise ValueError(
+                f"Unknown classical bit operation {part.name!r}. "
+                "Valid: NOT, SET(0/1), AND(b0,b1), OR(b0,b1), XOR(b0,b1), COPY(src)"
+            )
+        # Args resolved once: str names / d[i] → index values (Qubit/Bit/number)
+        return [(qubit_fn, bit_fn, [Backend.__resolve_arg(x, index) for x in part.args])]
+
+    @staticmethod
+    def __forget_plans() -> None:
+        """Drop the cached plans after a name they may have resolved was redeclared."""
+        plans = _compilation_plans.get()
+        if plans is not None:
+            plans.clear()
+
+    @staticmethod
+    def __resolve_arg(arg, index: dict):
+        """Resolve a gate argument: a name to its index value, a one-qubit slice to its Qubit."""
+        if isinstance(arg, str):
+            return index[arg]
+        if isinstance(arg, RegisterSlice):
+            register = index.get(arg.name)
+            if not isinstance(register, RegisterDeclaration):
+                raise ValueError(f"'{arg.name}' is not a register; declare it as '{arg.name} : q[start..stop]'")
+            qubits = register.qubits(arg.start, arg.stop)
+            if len(qubits) != 1:
+                raise ValueError(f"Gate argument {arg.name}[{arg.start}..{arg.stop}] must be a single qubit")
+            return qubits[0]
+        return arg
 
     # ── Action handlers ────────────────────────────────────────────────────
 
     @staticmethod
     def __resolve_targets(raw_target, c: Circuit, index: dict) -> list:
-        """Resolve an action target to a flat list of Qubit / Bit objects."""
+        """Resolve an action target to a flat list of Qubit / Bit objects.
+
+        Registers and register slices are expanded here, so their qubits only
+        exist as objects for the actions that use them.  Named lists were
+        resolved to a tuple when declared and are reused as is.
+        """
         raws = (
             raw_target if isinstance(raw_target, list)
             else list(c.qubits) if (isinstance(raw_target, str) and raw_target == "*")
             else [raw_target]
         )
 
-        def _resolve_raw(raw) -> Union[Qubit, Bit]:
+        def _register(name: str) -> RegisterDeclaration:
+            register = index.get(name)
+            if not isinstance(register, RegisterDeclaration):
+                raise ValueError(f"'{name}' is not a register; declare it as '{name} : q[start..stop]'")
+            return register
+
+        def _resolve_name(value) -> list:
+            match value:
+                case RegisterDeclaration(): return value.qubits()
+                case tuple(): return list(value)
+                case _: return [value]
+
+        def _resolve_raw(raw) -> list:
             match raw:
-                case Qubit(): return raw
-                case Bit():   return raw
-                case str():   return index[raw]
-                case int():   return Qubit(Backend.DEFAULT_QUBIT_REGISTER, raw)
+                case Qubit(): return [raw]
+                case Bit():   return [raw]
+                case RegisterSlice(): return _register(raw.name).qubits(raw.start, raw.stop)
+                case str():   return _resolve_name(index[raw])
+                case int():   return [Qubit(Backend.DEFAULT_QUBIT_REGISTER, raw)]
                 case _: raise TypeError(f"Unsupported target type: {type(raw).__name__}")
 
-        return list(map(_resolve_raw, raws))
+        return [target for raw in raws for target in _resolve_raw(raw)]
 
     @staticmethod
     def __handle_action(action: Action, c: Circuit, index: dict):
@@ -812,10 +978,38 @@ class Backend:
         pipeline = index[action.instruction] if isinstance(action.instruction, str) else action.instruction
         if not isinstance(pipeline, GatePipeline):
             raise TypeError(f"pipeline is not a GatePipeline (got {type(pipeline).__name__})")
-        list(map(
-            lambda _: Backend.__execute_pipeline_for_targets(targets, pipeline, c, index),
-            range(action.count or 1),
-        ))
+        # Target qubits exist even if the optimizer emptied the pipeline.
+        Backend.__ensure_qubits(c, (t for t in targets if isinstance(t, Qubit)))
+        count = action.count or 1
+        if count == 1:
+            Backend.__execute_pipeline_for_targets(targets, pipeline, c, index)
+            return
+        # Dispatch the pipeline once into a block sharing c's units, then
+        # replay the block instead of re-running every handler count times.
+        block = Circuit()
+        list(map(block.add_qubit, c.qubits))
+        list(map(block.add_bit, c.bits))
+        Backend.__execute_pipeline_for_targets(targets, pipeline, block, index)
+        Backend.__append_repeated(c, block, count)
+        Backend.__forget_qubits(block)
+
+    @staticmethod
+    def __append_repeated(c: Circuit, block: Circuit, count: int):
+        """Append *block* to *c* *count* times.
+
+        The first copy is appended whole (adding any new units and the
+        phase); the others replay the block's commands directly, which costs
+        one pytket call per gate instead of a full handler dispatch.
+        """
+        c.append(block)
+        Backend.__forget_qubits(c)
+        commands = [
+            (c.add_barrier, (cmd.args,)) if cmd.op.type == OpType.Barrier else (c.add_gate, (cmd.op, cmd.args))
+            for cmd in block.get_commands()
+        ]
+        list(map(lambda _: list(map(lambda cmd: cmd[0](*cmd[1]), commands)), range(count - 1)))
+        if block.phase:
+            c.add_phase(block.phase * (count - 1))
 
     @staticmethod
     def __handle_conditional_action(action: ConditionalAction, c: Circuit, index: dict):
@@ -833,42 +1027,96 @@ class Backend:
             )
         Backend.__ensure_bit(c, condition_bit)
         targets = Backend.__resolve_targets(action.target, c, index)
+        # Planned once, replayed for every target.
+        if_plan = Backend.__plan_parts(action.if_pipeline.parts, index, True, False)
+        else_plan = (
+            Backend.__plan_parts(action.else_pipeline.parts, index, True, False)
+            if action.else_pipeline is not None else None
+        )
 
         def _handle_target(target: Qubit) -> None:
             if not isinstance(target, Qubit):
                 raise TypeError(f"Conditional action target is not a Qubit (got {type(target).__name__})")
             Backend.__ensure_qubit(c, target)
-            Backend.__handle_pipeline(target, action.if_pipeline, c, index,
-                                       cond={"condition_bits": [condition_bit], "condition_value": 1})
-            if action.else_pipeline is not None:
-                Backend.__handle_pipeline(target, action.else_pipeline, c, index,
-                                           cond={"condition_bits": [condition_bit], "condition_value": 0})
+            Backend.__run_plan(if_plan, [target], [], c,
+                               cond={"condition_bits": [condition_bit], "condition_value": 1})
+            if else_plan is not None:
+                Backend.__run_plan(else_plan, [target], [], c,
+                                   cond={"condition_bits": [condition_bit], "condition_value": 0})
 
         list(map(_handle_target, targets))
 
     # ── Public API ─────────────────────────────────────────────────────────
 
     @staticmethod
-    def compile_to_circuit(ast_nodes):
-        """generate a tket circuit from ast nodes"""
+    def compile_to_circuit(ast_nodes, source_map: Optional[list] = None):
+        """generate a tket circuit from ast nodes
+
+        An exception raised for a statement gets a ``statement`` attribute,
+        the position of its top-level node, and a ``span`` attribute, the
+        span of the innermost node involved that has one (None when the AST
+        was built without spans).  With a *source_map* list, one
+        ``(span, gates added)`` pair per top-level node is appended to it
+        (see ``spinachlang.source_map``).  When the ``cancellation`` event
+        is set, ``concurrent.futures.CancelledError`` is raised before the
+        next node.
+        """
+        cancel = cancellation.get()
+
         def _process_node(acc: tuple, node) -> tuple:
             c, index = acc
-            match node:
-                case QubitDeclaration(name=name, qubit=qubit):
-                    index[name] = qubit
-                case BitDeclaration(name=name, bit=bit):
-                    index[name] = bit
-                case ListDeclaration(name=name, items=items):
-                    index[name] = items
-                case InstructionDeclaration(name=name, pipeline=pipeline):
-                    index[name] = pipeline
-                case Action():
-                    Backend.__handle_action(node, c, index)
-                case ConditionalAction():
-                    Backend.__handle_conditional_action(node, c, index)
+            if cancel is not None and cancel.is_set():
+                raise CancelledError("Compilation cancelled")
+            try:
+                if isinstance(node, DECLARATION_TYPES) and node.name in index:
+                    Backend.__forget_plans()  # cached plans may have resolved the old value
+                match node:
+                    case QubitDeclaration(name=name, qubit=qubit):
+                        index[name] = qubit
+                    case RegisterDeclaration(name=name):
+                        index[name] = node
+                    case BitDeclaration(name=name, bit=bit):
+                        index[name] = bit
+                    case ListDeclaration(name=name, items=items):
+                        # Resolved once here; every use of the list reuses this tuple.
+                        index[name] = tuple(Backend.__resolve_targets(items, c, index))
+                    case InstructionDeclaration(name=name, pipeline=pipeline):
+                        index[name] = pipeline
+                    case Action():
+                        Backend.__handle_action(node, c, index)
+                    case ConditionalAction():
+                        Backend.__handle_conditional_action(node, c, index)
+                    case ForLoop():
+                        # The body stays one node in the AST; it is bound and run once per iteration.
+                        reduce(_process_node, expand(node), (c, index))
+                    case ModuleImport(declarations=declarations):
+                        reduce(_process_node, declarations, (c, index))
+            except (ValueError, TypeError, KeyError) as exc:
+                _locate(exc, node)
+                raise
             return c, index
 
-        c, _ = reduce(_process_node, ast_nodes, (Circuit(), {}))
+        def _process_statement(acc: tuple, item: tuple) -> tuple:
+            position, node = item
+            gates = acc[0].n_gates if source_map is not None else 0
+            try:
+                acc = _process_node(acc, node)
+            except (ValueError, TypeError, KeyError) as exc:
+                exc.statement = position
+                raise
+            if source_map is not None:
+                source_map.append((node.span, acc[0].n_gates - gates))
+            return acc
+
+        token = _compilation_circboxes.set({})
+        qubits_token = _compilation_qubits.set({})
+        plans_token = _compilation_plans.set({})
+        try:
+            c, _ = reduce(_process_statement, enumerate(ast_nodes), (Circuit(), {}))
+        finally:
+            _compilation_plans.reset(plans_token)
+            _compilation_qubits.reset(qubits_token)
+            _compilation_circboxes.reset(token)
         return c
 
     @staticmethod
@@ -883,16 +1131,21 @@ class Backend:
 
     @staticmethod
     def compile_to_cirq_python(circuit: Circuit) -> str:
-        """create a python with cirq code representation of a tket circuit"""
+        """create a python with cirq code representation of a tket circuit
+
+        The script lists the operations one per line (see
+        ``cirq_source.source``) rather than the repr of the whole circuit.
+        """
         try:
-            from pytket.extensions.cirq import tk_to_cirq  # pylint: disable=import-outside-toplevel
+            # pylint: disable=import-outside-toplevel
+            from pytket.extensions.cirq import tk_to_cirq
+            from .cirq_source import source
         except ImportError as exc:
             raise ImportError(
                 "Cirq output requires pytket-cirq. "
                 "Install it with: pip install spinachlang"
             ) from exc
-        cirq_circ = tk_to_cirq(circuit)
-        return f"import cirq\n\ncircuit = {repr(cirq_circ)}\nprint(circuit)"
+        return "".join(source(tk_to_cirq(circuit).all_operations()))
 
     @staticmethod
     def compile_to_quil(circuit: Circuit) -> str:
@@ -0,0 +1,169 @@
+"""Compiling many programs at once in a process pool.
+
+``compile_batch`` (also ``Spinach.compile_batch``) sends the programs to
+worker processes in chunks, so the per-task IPC cost is paid once per
+chunk rather than once per program.  Each worker builds the parser and
+imports the backend when it starts, so the first chunk does not pay for
+them.  A program that fails to compile yields a result carrying its
+error instead of stopping the batch::
+
+    stats = BatchStats()
+    for result in compile_batch(sources, "qasm", workers=8, stats=stats):
+        if result.error is None:
+            save(result.index, result.output)
+    print(f"{stats.programs} programs, {stats.throughput:.0f}/s")
+
+Results come in the order of *sources*, or as soon as each chunk is done
+with ``ordered=False``.  Only a bounded number of chunks is in flight, so
+*sources* can be a generator far larger than memory.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Iterable, Iterator, NamedTuple, Optional, Sequence, Union
+
+# Chunks queued per worker: enough to keep every worker busy between
+# two collections without buffering the whole batch.
+_CHUNKS_PER_WORKER = 4
+# Chunk size when the number of sources is unknown (a generator).
+_DEFAULT_CHUNKSIZE = 16
+
+
+class BatchResult(NamedTuple):
+    """The outcome of one program; exactly one of ``output`` and ``error`` is None.
+
+    ``error`` is ``"<exception type>: <message>"``: exceptions are not
+    sent back as objects, since not all of them survive pickling.
+    """
+
+    index: int
+    output: Optional[str]
+    error: Optional[str]
+    seconds: float
+
+
+class BatchStats:
+    """Counters of a ``compile_batch`` run, complete once its results are consumed."""
+
+    def __init__(self):
+        self.programs = 0
+        self.failed = 0
+        self.seconds = 0.0  # wall time, from the first submission to the last result
+        self.compile_seconds = 0.0  # time spent compiling, summed over workers
+
+    @property
+    def throughput(self) -> float:
+        """Programs compiled per second of wall time."""
+        return self.programs / self.seconds if self.seconds else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"BatchStats(programs={self.programs}, failed={self.failed}, "
+            f"seconds={self.seconds:.3f}, throughput={self.throughput:.1f}/s)"
+        )
+
+
+def _warm_worker() -> None:
+    """Pool initializer: build the parser and import the backend once per worker."""
+    # pylint: disable=import-outside-toplevel,unused-import
+    from . import ast_builder, backend
+    from .parser import Parser
+
+    Parser.get_tree("0 -> H\n")
+
+
+def _compile_chunk(start: int, sources: list, language: str, options: dict) -> list[BatchResult]:
+    """Worker: compile ``sources``, the programs numbered from *start*."""
+    from .spinach import Spinach  # pylint: disable=import-outside-toplevel
+
+    results = []
+    for index, source in enumerate(sources, start):
+        began = time.perf_counter()
+        try:
+            output, error = Spinach.compile(source, language, **options), None
+        except Exception as exc:  # pylint: disable=broad-exception-caught  # reported per program
+            output, error = None, f"{type(exc).__name__}: {exc}"
+        results.append(BatchResult(index, output, error, time.perf_counter() - began))
+    return results
+
+
+def _chunks(sources: Iterable, chunksize: int) -> Iterator[tuple[int, list]]:
+    iterator, start = iter(sources), 0
+    while chunk := list(islice(iterator, chunksize)):
+        yield start, chunk
+        start += len(chunk)
+
+
+def _run(sources: Iterable, language: str, workers: int, chunksize: int, ordered: bool,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+         options: dict, stats: BatchStats) -> Iterator[BatchResult]:
+    began = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker)
+    chunks = _chunks(sources, chunksize)
+    pending: deque = deque()
+
+    def _submit() -> None:
+        while len(pending) < workers * _CHUNKS_PER_WORKER:
+            chunk = next(chunks, None)
+            if chunk is None:
+                return
+            pending.append(pool.submit(_compile_chunk, *chunk, language, options))
+
+    try:
+        _submit()
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                done = wait(pending, return_when=FIRST_COMPLETED).done
+                for future in done:
+                    pending.remove(future)
+            _submit()
+            for future in done:
+                for result in future.result():
+                    stats.programs += 1
+                    stats.failed += result.error is not None
+                    stats.compile_seconds += result.seconds
+                    stats.seconds = time.perf_counter() - began
+                    yield result
+    finally:
+        # A consumer that stops early does not wait for the chunks still queued.
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def compile_batch(  # pylint: disable=too-many-arguments
+    sources: Iterable[Union[str, bytes]],
+    language: str,
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    *,
+    ordered: bool = True,
+    optimize: int = 0,
+    passes: Sequence[str] = (),
+    base_dir: Union[str, os.PathLike, None] = None,
+    stats: Optional[BatchStats] = None,
+) -> Iterator[BatchResult]:
+    """Compile every program of *sources* to *language* in a pool of *workers* processes.
+
+    Yields one ``BatchResult`` per program, in the order of *sources*
+    unless *ordered* is False.  *workers* defaults to the number of CPUs;
+    *chunksize* (programs sent to a worker at once) to a quarter of each
+    worker's share when *sources* has a length.  *optimize* (a level),
+    *passes* (pass names) and *base_dir* are passed to ``Spinach.compile``.
+    *stats*, if given, is filled in as results are yielded.  The pool is
+    started by the first ``next()`` and shut down once the results are
+    exhausted or the iterator is closed.
+    """
+    workers = workers or os.cpu_count() or 1
+    if chunksize is None:
+        size = len(sources) if hasattr(sources, "__len__") else None
+        chunksize = max(1, -(-size // (workers * _CHUNKS_PER_WORKER))) if size else _DEFAULT_CHUNKSIZE
+    if chunksize < 1:
+        raise ValueError(f"chunksize must be at least 1, got {chunksize}")
+    options = {"optimize": optimize, "passes": tuple(passes), "base_dir": base_dir}
+    return _run(sources, language, workers, chunksize, ordered, options,
+                stats if stats is not None else BatchStats())
@@ -0,0 +1,117 @@
+"""Direct construction of cirq circuits from the Spinach AST.
+
+``Spinach.to_cirq`` and the ``cirq`` target used to build a pytket Circuit
+and convert it with ``tk_to_cirq``.  ``operations`` records the program
+with ``ir_builder.IRBuilder`` and returns the cirq operations
+``tk_to_cirq`` would produce for it, in program order; ``build`` makes
+them a Circuit, and ``cirq_source.source`` writes them as a script.
+The one difference is a global phase past a quarter turn, which
+``tk_to_cirq`` drops with a warning and ``operations`` keeps.
+
+Only the gates ``tk_to_cirq`` converts are built here.  A program using
+anything else raises ``Unsupported``, and the caller falls back to the
+pytket path, which fails on it the same way it always has.
+"""
+
+from __future__ import annotations
+
+import cmath
+
+import cirq
+
+from .ir_builder import IRBuilder, Unsupported
+
+# gate -> cirq gate for its angles (in half-turns), as tk_to_cirq converts
+# the pytket gate the backend emits.
+_GATES: dict = {
+    "N":        lambda: cirq.X,
+    "X":        lambda: cirq.X,
+    "Y":        lambda: cirq.Y,
+    "Z":        lambda: cirq.Z,
+    "H":        lambda: cirq.H,
+    "S":        lambda: cirq.S,
+    "T":        lambda: cirq.T,
+    "RX":       lambda angle: cirq.XPowGate(exponent=angle),
+    "RY":       lambda angle: cirq.YPowGate(exponent=angle),
+    "RZ":       lambda angle: cirq.ZPowGate(exponent=angle),
+    "V":        lambda: cirq.XPowGate(exponent=0.5),
+    "VDG":      lambda: cirq.XPowGate(exponent=-0.5),
+    "PX":       lambda exponent, phase: cirq.PhasedXPowGate(phase_exponent=phase, exponent=exponent),
+    "PHASEDX":  lambda exponent, phase: cirq.PhasedXPowGate(phase_exponent=phase, exponent=exponent),
+    "CX":       lambda: cirq.CNOT,
+    "CNOT":     lambda: cirq.CNOT,
+    "FCX":      lambda: cirq.CNOT,
+    "FCNOT":    lambda: cirq.CNOT,
+    "CZ":       lambda: cirq.CZ,
+    "FCZ":      lambda: cirq.CZ,
+    "CH":       lambda: cirq.H.controlled(1),
+    "FCH":      lambda: cirq.H.controlled(1),
+    "CU1":      lambda angle: cirq.CZPowGate(exponent=angle),
+    "SWAP":     lambda: cirq.SWAP,
+    "ISWAP":    lambda angle: cirq.ISwapPowGate(exponent=angle),
+    "ISWAPMAX": lambda: cirq.ISWAP,
+    "ZZPH":     lambda angle: cirq.ZZPowGate(exponent=angle),
+    "XXPH":     lambda angle: cirq.XXPowGate(exponent=angle),
+    "YYPH":     lambda angle: cirq.YYPowGate(exponent=angle),
+    "R":        cirq.ResetChannel,
+    "RESET":    cirq.ResetChannel,
+}
+
+# Gates built here, for callers deciding which path a program can take.
+SUPPORTED_GATES = frozenset(_GATES) | {"M", "MEASURE", "PHASE"}
+
+
+def _key(bit) -> str:
+    """The measurement key tk_to_cirq gives *bit*."""
+    key = repr(bit)
+    return key[:-2] if key.endswith("_b") else key
+
+
+class _Builder(IRBuilder):
+    """Records cirq gates; measurements are made per bit in ``operations``."""
+
+    def operation(self, name: str, angles: tuple) -> tuple:
+        if name == "MEASURE":
+            return cirq.measure, 0.0
+        if name not in _GATES:
+            raise Unsupported(name)
+        return _GATES[name](*angles), 0.0
+
+    def operations(self) -> list:
+        """The recorded program as the cirq operations of tk_to_cirq, global phase last."""
+        registers = {qubit.reg_name for qubit in self.qubits}
+        if len(registers) > 1:
+            raise Unsupported("Cirq can only support a single linear register")
+        lines = {qubit: cirq.LineQubit(qubit.index[0]) for qubit in self.qubits}
+        ops = [
+            gate(*map(lines.__getitem__, qubits), key=_key(bits[0])) if bits
+            else gate.on(*map(lines.__getitem__, qubits))
+            for gate, qubits, bits in self.ops
+        ]
+        coefficient = cmath.exp(float(self.phase % 2) * cmath.pi * 1j)
+        # Snap a coefficient within tk_to_cirq's tolerance of the real or
+        # imaginary axis onto it.  tk_to_cirq compares the signed parts, so
+        # for a phase past a quarter turn its coefficient is not of modulus
+        # one, cirq rejects it and the phase is dropped; here it is kept.
+        if abs(coefficient.real) < 1e-8:
+            coefficient = coefficient.imag * 1j
+        if abs(coefficient.imag) < 1e-8:
+            coefficient = coefficient.real
+        if coefficient != 1.0:
+            ops.append(cirq.global_phase_operation(coefficient))
+        return ops
+
+
+def operations(nodes: list) -> list:
+    """The cirq operations of the AST *nodes*; raise ``Unsupported`` if it needs the pytket path.
+
+    Errors the backend would raise surface as ValueError, TypeError or
+    KeyError without its messages: callers re-run the program through the
+    backend for those too.
+    """
+    return _Builder().walk(nodes).operations()
+
+
+def build(nodes: list) -> cirq.Circuit:
+    """The cirq.Circuit of the AST *nodes*, equal to ``tk_to_cirq`` of its pytket circuit."""
+    return cirq.Circuit(operations(nodes))
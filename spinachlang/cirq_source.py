@@ -0,0 +1,139 @@
+"""Readable Cirq Python source for a list of cirq operations.
+
+The ``cirq`` target used to print ``repr()`` of the whole circuit: one
+line, megabytes long for a large program, and slow to produce.  ``source``
+writes a script instead, one operation (or run of operations) per line::
+
+    import cirq
+
+    q = cirq.LineQubit.range(3)
+    circuit = cirq.Circuit(
+        cirq.H.on_each(q),
+        cirq.CNOT(q[0], q[1]),
+        [cirq.X(q[2]), cirq.CNOT(q[2], q[1])] * 3,
+        cirq.measure(q[0], key='c[0]'),
+    )
+    print(circuit)
+
+Both paths of the ``cirq`` target use it: on the operations of
+``cirq_builder`` and on those of ``tk_to_cirq``.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Iterator
+
+import cirq
+
+# Longest block of expressions looked for when folding repeats.
+_MAX_PERIOD = 8
+
+
+def _qubits(qubits: list, width: int = -1) -> str:
+    """*qubits* as call arguments: ``q`` when they are the *width* LineQubits in order.
+
+    Otherwise each LineQubit is ``q[i]``, ascending runs of three or more
+    are slices, and other qubits are written by their repr.
+    """
+    indices = [qubit.x if isinstance(qubit, cirq.LineQubit) else None for qubit in qubits]
+    if indices == list(range(width)):
+        return "q"
+    parts, start = [], 0
+    while start < len(qubits):
+        stop = start + 1
+        if indices[start] is None:
+            parts.append(repr(qubits[start]))
+            start = stop
+            continue
+        while stop < len(qubits) and indices[stop] is not None and indices[stop] == indices[stop - 1] + 1:
+            stop += 1
+        if stop - start > 2:
+            parts.append(f"q[{indices[start]}:{indices[stop - 1] + 1}]")
+        else:
+            parts += [f"q[{index}]" for index in indices[start:stop]]
+        start = stop
+    return ", ".join(parts)
+
+
+def _items(ops: list, width: int) -> Iterator[str]:
+    """One expression per operation, or per run of one single-qubit gate on distinct qubits (``gate.on_each``)."""
+    texts: dict = {}  # id(gate) -> repr, once per gate object (ops keeps them alive)
+    names: dict = {}  # qubit -> its argument text
+
+    def text_of(gate) -> str:
+        text = texts.get(id(gate))
+        if text is None:
+            text = texts[id(gate)] = repr(gate)
+        return text
+
+    def arguments(qubits) -> str:
+        for qubit in qubits:
+            if qubit not in names:
+                names[qubit] = _qubits([qubit])
+        return ", ".join(map(names.__getitem__, qubits))
+
+    start = 0
+    while start < len(ops):
+        op, stop = ops[start], start + 1
+        gate = op.gate
+        if isinstance(gate, cirq.MeasurementGate):
+            yield f"cirq.measure({_qubits(list(op.qubits))}, key={cirq.measurement_key_name(op)!r})"
+        elif isinstance(gate, cirq.GlobalPhaseGate):
+            yield f"cirq.global_phase_operation({gate.coefficient!r})"
+        elif len(op.qubits) == 1:
+            # A repeat on the same qubit is left to _rows: [cirq.X(q[0])] * 3.
+            text, seen = text_of(gate), set(op.qubits)
+            while (stop < len(ops) and len(ops[stop].qubits) == 1 and ops[stop].qubits[0] not in seen
+                   and text_of(ops[stop].gate) == text):
+                seen.add(ops[stop].qubits[0])
+                stop += 1
+            yield f"{text}.on_each({_qubits([other.qubits[0] for other in ops[start:stop]], width)})" \
+                if stop - start > 1 else f"{text}({arguments(op.qubits)})"
+        else:
+            yield f"{text_of(gate)}({arguments(op.qubits)})"
+        start = stop
+
+
+def _rows(items: list) -> Iterator[str]:
+    """The rows of ``cirq.Circuit(...)`` for *items*, a block repeated back to back as ``[block] * count``."""
+    start = 0
+    while start < len(items):
+        period, count, first = 1, 1, items[start]
+        for size in range(1, _MAX_PERIOD + 1):
+            if start + size >= len(items) or items[start + size] != first:
+                continue
+            block = items[start:start + size]
+            repeats = 1
+            while items[start + repeats * size:start + (repeats + 1) * size] == block:
+                repeats += 1
+            if repeats > 1 and size * repeats > period * count:
+                period, count = size, repeats
+        if count == 1:
+            yield f"    {first},\n"
+        else:
+            yield f"    [{', '.join(items[start:start + period])}] * {count},\n"
+        start += period * count
+
+
+def source(ops: Iterable) -> Iterator[str]:
+    """The lines of a Python script building (and printing) the circuit of the cirq operations *ops*.
+
+    Nothing is yielded before every operation is rendered: the header
+    needs the register width and repeats are folded over the whole list.
+    LineQubits are written as items of ``q = cirq.LineQubit.range(...)``
+    and other qubits by their repr.  Runs of one single-qubit gate are
+    written as ``gate.on_each(...)`` and a block of expressions repeated
+    back to back as ``[block] * count``; executing the script gives a circuit equal to
+    ``cirq.Circuit(ops)``.
+    """
+    ops = list(ops)
+    width = max(
+        (qubit.x + 1 for op in ops for qubit in op.qubits if isinstance(qubit, cirq.LineQubit)), default=0
+    )
+    yield "import cirq\n"
+    yield "\n"
+    yield f"q = cirq.LineQubit.range({width})\n"
+    yield "circuit = cirq.Circuit(\n"
+    yield from _rows(list(_items(ops, width)))
+    yield ")\n"
+    yield "print(circuit)\n"
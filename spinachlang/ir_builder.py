@@ -0,0 +1,318 @@
+"""Walking the Spinach AST into a flat list of operations, without pytket.
+
+``Spinach.to_qiskit`` and ``Spinach.to_cirq`` used to build a pytket
+Circuit and convert it: two full circuit constructions for one program.
+``IRBuilder`` walks the AST the way ``Backend.compile_to_circuit`` does —
+same name resolution, same qubit and bit allocation, same ``*`` and
+``* -> M`` semantics — and records every operation with its pytket operands
+and its angles reduced the way pytket stores them.  Subclasses
+(``qiskit_builder``, ``cirq_builder``) turn gates into their toolkit's
+operations and the record into a circuit equal to what the pytket
+converter returns for the same program.
+
+A program using anything a subclass does not build (classical bit
+operations, conditionals, CIRCBOX, ...) raises ``Unsupported``, and the
+caller falls back to the pytket path.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from concurrent.futures import CancelledError
+
+from pytket import Bit, Qubit
+
+from .backend import Backend, cancellation
+from .loops import expand
+from .spinach_types import (
+    Action,
+    ConditionalAction,
+    ForLoop,
+    GatePipeByName,
+    GatePipeline,
+    InstructionDeclaration,
+    ListDeclaration,
+    ModuleImport,
+    QubitDeclaration,
+    RegisterDeclaration,
+    RegisterSlice,
+    BitDeclaration,
+)
+
+
+class Unsupported(Exception):
+    """The program uses an operation the builder does not cover; use the pytket path."""
+
+
+# Qubit operand standing for the action target; other operands are args[k].
+TARGET = -1
+
+# gate -> (periods of its leading angle arguments, qubit operands).  Angles
+# are in half-turns and reduced modulo their period, as pytket stores them;
+# the operands are in the order the backend passes them to pytket.
+OPERANDS: dict[str, tuple] = {
+    "N":        ((), (TARGET,)),
+    "X":        ((), (TARGET,)),
+    "Y":        ((), (TARGET,)),
+    "Z":        ((), (TARGET,)),
+    "H":        ((), (TARGET,)),
+    "S":        ((), (TARGET,)),
+    "ST":       ((), (TARGET,)),
+    "T":        ((), (TARGET,)),
+    "TT":       ((), (TARGET,)),
+    "RX":       ((4,), (TARGET,)),
+    "RY":       ((4,), (TARGET,)),
+    "RZ":       ((4,), (TARGET,)),
+    "SX":       ((), (TARGET,)),
+    "SXDG":     ((), (TARGET,)),
+    "V":        ((), (TARGET,)),
+    "VDG":      ((), (TARGET,)),
+    "U1":       ((2,), (TARGET,)),
+    "U2":       ((2, 2), (TARGET,)),
+    "U3":       ((4, 2, 2), (TARGET,)),
+    "PX":       ((4, 2), (TARGET,)),
+    "PHASEDX":  ((4, 2), (TARGET,)),
+    "CX":       ((), (0, TARGET)),
+    "CNOT":     ((), (0, TARGET)),
+    "FCX":      ((), (TARGET, 0)),
+    "FCNOT":    ((), (TARGET, 0)),
+    "CY":       ((), (0, TARGET)),
+    "FCY":      ((), (TARGET, 0)),
+    "CZ":       ((), (0, TARGET)),
+    "FCZ":      ((), (TARGET, 0)),
+    "CH":       ((), (0, TARGET)),
+    "FCH":      ((), (TARGET, 0)),
+    "CU1":      ((2,), (1, TARGET)),
+    "SWAP":     ((), (TARGET, 0)),
+    "CRX":      ((4,), (1, TARGET)),
+    "CRY":      ((4,), (1, TARGET)),
+    "CRZ":      ((4,), (1, TARGET)),
+    "ECR":      ((), (0, TARGET)),
+    "ISWAP":    ((4,), (TARGET, 1)),
+    "ISWAPMAX": ((), (TARGET, 0)),
+    "ZZPH":     ((4,), (TARGET, 1)),
+    "XXPH":     ((4,), (TARGET, 1)),
+    "YYPH":     ((4,), (TARGET, 1)),
+    "FSIM":     ((2, 2), (TARGET, 2)),
+    "CCX":      ((), (0, 1, TARGET)),
+    "TOFFOLI":  ((), (0, 1, TARGET)),
+    "CSWAP":    ((), (0, TARGET, 1)),
+    "FREDKIN":  ((), (0, TARGET, 1)),
+    "R":        ((), (TARGET,)),
+    "RESET":    ((), (TARGET,)),
+}
+
+
+def _qubit(value) -> Qubit:
+    return value if isinstance(value, Qubit) else Qubit(Backend.DEFAULT_QUBIT_REGISTER, value)
+
+
+class IRBuilder(ABC):
+    """Mirrors the backend's walk over the nodes, recording operations.
+
+    ``ops`` holds ``(operation, pytket qubits, pytket bits)`` in program
+    order; only measurements have bits.  ``phase`` is the global phase in
+    half-turns, accumulated like pytket's.  Subclasses implement
+    ``operation``.
+    """
+
+    def __init__(self):
+        self.index: dict = {}
+        self.qubits: set = set()
+        self.bits: set = set()
+        self.ops: list = []
+        self.phase = 0.0
+        # (name, angles) -> (operation, phase), shared by every use of that gate
+        self.cache: dict = {}
+        self.cancel = cancellation.get()
+
+    @abstractmethod
+    def operation(self, name: str, angles: tuple) -> tuple:
+        """The operation for gate *name* with *angles* (in half-turns), and the phase it adds.
+
+        Also asked for ``"MEASURE"`` and for ``"BARRIER"``, whose only
+        angle is its number of qubits.  Raises ``Unsupported`` for a gate
+        the subclass does not build.
+        """
+
+    def __operation(self, name: str, angles: tuple) -> tuple:
+        key = (name, angles)
+        entry = self.cache.get(key)
+        if entry is None:
+            entry = self.cache[key] = self.operation(name, angles)
+        return entry
+
+    # ── Units ─────────────────────────────────────────────────────────────
+
+    def ensure_qubit(self, qubit: Qubit) -> None:
+        """Add *qubit* and, like the backend, the bit of the same index."""
+        if qubit not in self.qubits:
+            self.qubits.add(qubit)
+            self.bits.add(Bit(Backend.DEFAULT_BIT_REGISTER, qubit.index[0]))
+
+    def register(self, name: str) -> RegisterDeclaration:
+        """The register declared as *name*."""
+        register = self.index.get(name)
+        if not isinstance(register, RegisterDeclaration):
+            raise ValueError(f"'{name}' is not a register")
+        return register
+
+    def targets(self, raw) -> list:
+        """An action target resolved to a flat list of Qubit / Bit."""
+        if isinstance(raw, list):
+            raws = raw
+        elif isinstance(raw, str) and raw == "*":
+            raws = sorted(self.qubits)
+        else:
+            raws = [raw]
+        resolved = []
+        for item in raws:
+            match item:
+                case Qubit() | Bit():
+                    resolved.append(item)
+                case RegisterSlice():
+                    resolved += self.register(item.name).qubits(item.start, item.stop)
+                case str():
+                    value = self.index[item]
+                    if isinstance(value, RegisterDeclaration):
+                        resolved += value.qubits()
+                    elif isinstance(value, tuple):
+                        resolved += value
+                    else:
+                        resolved.append(value)
+                case int():
+                    resolved.append(_qubit(item))
+                case _:
+                    raise TypeError(f"Unsupported target type: {type(item).__name__}")
+        return resolved
+
+    def arg(self, arg):
+        """A gate argument with names and one-qubit slices resolved."""
+        if isinstance(arg, str):
+            return self.index[arg]
+        if isinstance(arg, RegisterSlice):
+            qubits = self.register(arg.name).qubits(arg.start, arg.stop)
+            if len(qubits) != 1:
+                raise ValueError(f"Gate argument {arg.name}[{arg.start}..{arg.stop}] must be a single qubit")
+            return qubits[0]
+        return arg
+
+    # ── Pipelines ─────────────────────────────────────────────────────────
+
+    def steps(self, parts: list) -> list:
+        """``(gate name, resolved args)`` of *parts*, named pipelines expanded."""
+        steps = []
+        for part in parts:
+            if isinstance(part, GatePipeByName):
+                sub = self.index[part.name]
+                steps += self.steps(sub.parts[::-1] if part.rev else sub.parts)
+            else:
+                steps.append((part.name, [self.arg(arg) for arg in part.args]))
+        return steps
+
+    def gate(self, name: str, target: Qubit, args: list) -> None:
+        """Record gate *name* on *target*."""
+        if name not in OPERANDS:
+            raise Unsupported(name)
+        periods, operands = OPERANDS[name]
+        if len(args) < max(len(periods), max(operands) + 1):
+            raise ValueError(f"{name}: not enough arguments")
+        angles = tuple(float(angle) % period for angle, period in zip(args, periods))
+        operation, phase = self.__operation(name, angles)
+        qubits = tuple(target if slot == TARGET else _qubit(args[slot]) for slot in operands)
+        list(map(self.ensure_qubit, qubits))
+        self.ops.append((operation, qubits, ()))
+        self.phase += phase
+
+    def measure(self, targets: list, args: list) -> None:
+        """Record M / MEASURE on *targets*, with the backend's ``* -> M`` shortcut."""
+        if not args and set(targets) == self.qubits:
+            # pytket's measure_all: the i-th qubit (in unit order) into c[i]
+            measured = [(qubit, Bit(Backend.DEFAULT_BIT_REGISTER, i)) for i, qubit in enumerate(sorted(targets))]
+        else:
+            measured = [
+                (qubit, args[0] if args and isinstance(args[0], Bit)
+                 else Bit(Backend.DEFAULT_BIT_REGISTER, qubit.index[0]))
+                for qubit in targets
+            ]
+        operation, _ = self.__operation("MEASURE", ())
+        for qubit, bit in measured:
+            self.bits.add(bit)
+            self.ops.append((operation, (qubit,), (bit,)))
+
+    def pipeline(self, pipeline: GatePipeline, targets: list) -> None:
+        """Record *pipeline* run on the qubit *targets*."""
+        for name, args in self.steps(pipeline.parts):
+            if not targets:
+                continue
+            if name in ("M", "MEASURE"):
+                self.measure(targets, args)
+            elif name == "BARRIER":
+                self.ops.append((self.__operation("BARRIER", (len(targets),))[0], tuple(targets), ()))
+            elif name == "PHASE":
+                if not args:
+                    raise ValueError("PHASE requires one angle argument")
+                self.phase += float(args[0])
+            else:
+                for target in targets:
+                    self.gate(name, target, args)
+
+    # ── Statements ────────────────────────────────────────────────────────
+
+    def action(self, node: Action) -> None:
+        """Record an unconditional action, repeated ``count`` times."""
+        targets = self.targets(node.target)
+        if any(not isinstance(target, Qubit) for target in targets):
+            raise Unsupported("classical bit operations")
+        pipeline = self.index[node.instruction] if isinstance(node.instruction, str) else node.instruction
+        if not isinstance(pipeline, GatePipeline):
+            raise TypeError(f"pipeline is not a GatePipeline (got {type(pipeline).__name__})")
+        list(map(self.ensure_qubit, targets))
+        count = node.count or 1
+        if count == 1:
+            self.pipeline(pipeline, targets)
+            return
+        # Like the backend's repeated block: its phase is summed from zero,
+        # reduced, then added once for the first copy and once for the rest.
+        start, phase = len(self.ops), self.phase
+        self.phase = 0.0
+        self.pipeline(pipeline, targets)
+        self.ops += self.ops[start:] * (count - 1)
+        block, self.phase = self.phase % 2, phase
+        if block:
+            self.phase += block
+            self.phase += block * (count - 1)
+
+    def node(self, node) -> None:
+        """Record one node."""
+        if self.cancel is not None and self.cancel.is_set():
+            raise CancelledError("Compilation cancelled")
+        match node:
+            case QubitDeclaration(name=name, qubit=qubit):
+                self.index[name] = qubit
+            case RegisterDeclaration(name=name):
+                self.index[name] = node
+            case BitDeclaration(name=name, bit=bit):
+                self.index[name] = bit
+            case ListDeclaration(name=name, items=items):
+                self.index[name] = tuple(self.targets(items))
+            case InstructionDeclaration(name=name, pipeline=pipeline):
+                self.index[name] = pipeline
+            case Action():
+                self.action(node)
+            case ConditionalAction():
+                raise Unsupported("conditional actions")
+            case ForLoop():
+                list(map(self.node, expand(node)))
+            case ModuleImport(declarations=declarations):
+                list(map(self.node, declarations))
+
+    def walk(self, nodes: list) -> IRBuilder:
+        """Record every node of *nodes*; returns the builder.
+
+        Like ``Backend.compile_to_circuit``, raises
+        ``concurrent.futures.CancelledError`` before the next node, loop
+        iterations included, once the ``cancellation`` event is set.
+        """
+        list(map(self.node, nodes))
+        return self
@@ -0,0 +1,169 @@
+"""Expansion of ``for`` loops.
+
+The AST keeps a loop body as one node whose indices and angles may be
+``LoopExpr`` trees over the loop variables.  ``iterations`` yields the
+variable bindings of a loop and ``bind`` turns the body into a concrete
+node for one binding; the backend and the metrics analysis both expand
+loops through these two functions.  ``trip_count`` and ``invariant`` let
+the metrics analysis size a loop without expanding it.
+"""
+
+from typing import Iterator, Optional, Union
+
+from .spinach_types import (
+    Action,
+    ConditionalAction,
+    ForLoop,
+    GateCall,
+    GatePipeline,
+    LoopExpr,
+    RegisterSlice,
+)
+
+_BINARY = {
+    "add": lambda a, b: a + b,
+    "sub": lambda a, b: a - b,
+    "mul": lambda a, b: a * b,
+}
+
+
+def evaluate(value, env: dict[str, int]):
+    """Value of *value* with the loop variables bound by *env*; non-expressions are returned as is."""
+    if not isinstance(value, LoopExpr):
+        return value
+    if value.op == "var":
+        return env[value.args[0]]
+    operands = [evaluate(arg, env) for arg in value.args]
+    if value.op == "neg":
+        return -operands[0]
+    if value.op == "div":
+        if operands[1] == 0:
+            raise ValueError("Division by zero in loop expression")
+        return operands[0] / operands[1]
+    return _BINARY[value.op](*operands)
+
+
+def _index(value, env: dict[str, int], what: str) -> int:
+    """Evaluate *value* as a qubit index."""
+    index = evaluate(value, env)
+    if isinstance(index, float) and index.is_integer():
+        index = int(index)
+    if not isinstance(index, int) or index < 0:
+        raise ValueError(f"{what} must evaluate to a non-negative integer, got {index!r}")
+    return index
+
+
+def iterations(loop: ForLoop, env: dict[str, int]) -> Iterator[dict[str, int]]:
+    """Bindings of the loop variables for every iteration of *loop*, outer bindings included."""
+    start = _index(loop.start, env, f"Start of loop over {loop.var!r}")
+    stop = _index(loop.stop, env, f"End of loop over {loop.var!r}")
+    for value in range(start, stop + 1):
+        yield {**env, loop.var: value}
+
+
+def _bind_target(target, env: dict[str, int]):
+    if isinstance(target, list):
+        return [_bind_target(item, env) for item in target]
+    if isinstance(target, RegisterSlice):
+        return _bind_slice(target, env)
+    if isinstance(target, LoopExpr):
+        return _index(target, env, "Loop target")
+    return target
+
+
+def _bind_slice(ref: RegisterSlice, env: dict[str, int]) -> RegisterSlice:
+    if not isinstance(ref.start, LoopExpr) and not isinstance(ref.stop, LoopExpr):
+        return ref
+    return RegisterSlice(
+        name=ref.name,
+        start=_index(ref.start, env, f"Index into {ref.name!r}"),
+        stop=_index(ref.stop, env, f"Index into {ref.name!r}"),
+        span=ref.span,
+    )
+
+
+def _bind_arg(arg, env: dict[str, int]):
+    if isinstance(arg, RegisterSlice):
+        return _bind_slice(arg, env)
+    return evaluate(arg, env)
+
+
+def _bind_pipeline(pipeline: GatePipeline, env: dict[str, int]) -> GatePipeline:
+    return GatePipeline(parts=[
+        GateCall(name=part.name, args=[_bind_arg(arg, env) for arg in part.args], span=part.span)
+        if isinstance(part, GateCall) and part.args else part
+        for part in pipeline.parts
+    ], span=pipeline.span)
+
+
+def bind(node: Union[Action, ConditionalAction], env: dict[str, int]) -> Union[Action, ConditionalAction]:
+    """Concrete copy of the loop body *node* for the bindings in *env*."""
+    if isinstance(node, Action):
+        instruction = node.instruction
+        return node.model_copy(update={
+            "target": _bind_target(node.target, env),
+            "instruction": _bind_pipeline(instruction, env) if isinstance(instruction, GatePipeline) else instruction,
+        })
+    update = {
+        "target": _bind_target(node.target, env),
+        "if_pipeline": _bind_pipeline(node.if_pipeline, env),
+    }
+    if node.else_pipeline is not None:
+        update["else_pipeline"] = _bind_pipeline(node.else_pipeline, env)
+    return node.model_copy(update=update)
+
+
+def expand(loop: ForLoop, env: Optional[dict[str, int]] = None) -> Iterator[Union[Action, ConditionalAction]]:
+    """Every concrete action of *loop*, nested loops included, in execution order."""
+    for bindings in iterations(loop, env or {}):
+        if isinstance(loop.body, ForLoop):
+            yield from expand(loop.body, bindings)
+        else:
+            yield bind(loop.body, bindings)
+
+
+
+def _uses_variables(value) -> bool:
+    """Whether *value*, part of a loop body, refers to a loop variable."""
+    if isinstance(value, LoopExpr):
+        return True
+    if isinstance(value, list):
+        return any(map(_uses_variables, value))
+    if isinstance(value, RegisterSlice):
+        return isinstance(value.start, LoopExpr) or isinstance(value.stop, LoopExpr)
+    if isinstance(value, GatePipeline):
+        return any(_uses_variables(part.args) for part in value.parts if isinstance(part, GateCall))
+    if isinstance(value, Action):
+        return _uses_variables(value.target) or _uses_variables(value.instruction)
+    if isinstance(value, ConditionalAction):
+        return any(map(_uses_variables, (value.target, value.if_pipeline, value.else_pipeline)))
+    return False
+
+
+def innermost(loop: ForLoop) -> Union[Action, ConditionalAction]:
+    """The action at the bottom of *loop*'s nest."""
+    while isinstance(loop, ForLoop):
+        loop = loop.body
+    return loop
+
+
+def invariant(loop: ForLoop) -> bool:
+    """Whether every action *loop* expands to is the same, its innermost body using no loop variable."""
+    return not _uses_variables(innermost(loop))
+
+
+def trip_count(loop: ForLoop, env: Optional[dict[str, int]] = None) -> int:
+    """Number of actions *loop* expands to, nested loops included, without binding its body."""
+    env = env or {}
+    start = _index(loop.start, env, f"Start of loop over {loop.var!r}")
+    stop = _index(loop.stop, env, f"End of loop over {loop.var!r}")
+    count = max(stop - start + 1, 0)
+    if not isinstance(loop.body, ForLoop):
+        return count
+    nested, dependent = loop.body, False
+    while isinstance(nested, ForLoop):
+        dependent = dependent or isinstance(nested.start, LoopExpr) or isinstance(nested.stop, LoopExpr)
+        nested = nested.body
+    if not dependent:
+        return count * trip_count(loop.body, env)
+    return sum(trip_count(loop.body, bindings) for bindings in iterations(loop, env))
@@ -1,7 +1,8 @@
 """SpinachLang Language Server Protocol (LSP) server.
 
-Provides real-time diagnostics, hover documentation, and completion
-for .sph source files via the Language Server Protocol.
+Provides real-time diagnostics, hover documentation, completion, semantic
+highlighting and circuit metrics (code lenses / inlay hints) for .sph source
+files via the Language Server Protocol.
 
 Protocol layer: pygls 2.x with lsprotocol
 Transport    : stdio (default) or TCP
@@ -9,13 +10,21 @@ Transport    : stdio (default) or TCP
 
 from __future__ import annotations
 
+import itertools
 import logging
-from typing import Optional
+from pathlib import Path
+from typing import NamedTuple, Optional
 
-from lark import UnexpectedCharacters, UnexpectedEOF, UnexpectedToken
+from lark import Token, Tree, UnexpectedCharacters, UnexpectedEOF, UnexpectedInput
+from lark.exceptions import VisitError
 from lsprotocol import types
 from pygls.lsp.server import LanguageServer
+from pygls.protocol import LanguageServerProtocol
+from pygls.uris import to_fs_path
 
+from .analysis import CircuitMetrics, MetricsAnalyzer
+from .ast_builder import AstBuilder
+from .lsp_telemetry import LatencyRegistry
 from .parser import Parser
 
 # ---------------------------------------------------------------------------
@@ -61,6 +70,58 @@ _GATES: dict[str, tuple[str, str]] = {
 # Sorted gate names for stable completion lists
 _GATE_NAMES: list[str] = sorted(_GATES)
 
+# ---------------------------------------------------------------------------
+# Semantic token legend
+# The index of each entry is what goes on the wire, so only ever append.
+# ---------------------------------------------------------------------------
+_TOKEN_TYPES: list[str] = [
+    "keyword",    # q, b, if, else, for, in, import
+    "function",   # gates and instruction names
+    "variable",   # qubit / bit / list names
+    "namespace",  # register names: "tom : q ancilla 0"
+    "number",
+    "operator",   # -> <- | : *
+    "comment",
+    "string",     # import paths
+]
+_TOKEN_MODIFIERS: list[str] = ["declaration"]
+
+_LEGEND = types.SemanticTokensLegend(
+    token_types=_TOKEN_TYPES,
+    token_modifiers=_TOKEN_MODIFIERS,
+)
+
+_KEYWORD, _FUNCTION, _VARIABLE, _NAMESPACE, _NUMBER, _OPERATOR, _COMMENT, _STRING = range(len(_TOKEN_TYPES))
+_DECLARATION = 1 << _TOKEN_MODIFIERS.index("declaration")
+
+_KEYWORD_TERMINALS = frozenset({"Q", "B", "_IF_KW", "_ELSE_KW", "_FOR_KW", "_IN_KW", "_IMPORT_KW"})
+_OPERATOR_VALUES = frozenset({"->", "<-", "|", ":", "*", "=", "+", "-", "/", ".."})
+# Tokens after which a lower-case NAME is an instruction reference.
+_PIPELINE_LEADERS = frozenset({"->", "|", "else"})
+
+
+# ---------------------------------------------------------------------------
+# Latency telemetry
+# Handlers are recorded under their LSP method name, phases inside them under
+# "<handler>:<phase>", and the whole dispatch (decoding, handler, response
+# serialisation) under "protocol:<method>".
+# ---------------------------------------------------------------------------
+LATENCY_STATS_METHOD = "spinachlang/latencyStats"
+
+telemetry = LatencyRegistry()
+
+
+class _TimedProtocol(LanguageServerProtocol):
+    """Protocol that records how long each incoming message takes to handle."""
+
+    def handle_message(self, message):
+        method = getattr(message, "method", None)
+        if method is None:
+            return super().handle_message(message)
+        with telemetry.measure(f"protocol:{method}"):
+            return super().handle_message(message)
+
+
 # ---------------------------------------------------------------------------
 # LSP server instance
 # ---------------------------------------------------------------------------
@@ -68,6 +129,7 @@ server = LanguageServer(
     name=SERVER_NAME,
     version=SERVER_VERSION,
     text_document_sync_kind=types.TextDocumentSyncKind.Full,
+    protocol_cls=_TimedProtocol,
 )
 
 
@@ -78,6 +140,9 @@ server = LanguageServer(
 def _diagnostics_for(source: str) -> list[types.Diagnostic]:
     """Parse *source* with the Spinach frontend and return LSP diagnostics.
 
+    The parser recovers from each syntax error at the next newline (see
+    ``_scan``), so every broken statement is reported from a single pass.
+
     Parameters
     ----------
     source:
@@ -86,55 +151,53 @@ def _diagnostics_for(source: str) -> list[types.Diagnostic]:
     Returns
     -------
     list[types.Diagnostic]
-        Empty when the source is syntactically valid; one or more error
-        diagnostics otherwise.
+        Empty when the source is syntactically valid; one error diagnostic
+        per syntax error otherwise, in source order.
     """
     try:
-        Parser.get_tree(source)
-        return []
-    except UnexpectedCharacters as exc:
-        line = max(0, exc.line - 1)
-        col = max(0, exc.column - 1)
-        lines = source.splitlines()
-        char = lines[line][col] if line < len(lines) and col < len(lines[line]) else ""
-        msg = f"Unexpected character '{char}'"
-        if exc.allowed:
-            msg += f". Expected one of: {', '.join(sorted(exc.allowed))}"
-        return [_make_diagnostic(msg, line, col, col + 1)]
-
-    except UnexpectedToken as exc:
-        line = max(0, exc.line - 1)
-        col = max(0, exc.column - 1)
-        token = exc.token
-        token_str = str(token)
-        msg = f"Unexpected token '{token_str}'"
-        if exc.expected:
-            msg += f". Expected one of: {', '.join(sorted(exc.expected))}"
-
-        # Prefer token position metadata to compute the diagnostic range.
-        if hasattr(token, "end_column") and getattr(token, "end_column") is not None:
-            # Lark columns are 1-based; convert to 0-based exclusive end index.
-            end_col = max(0, token.end_column - 1)
-        else:
-            # Fallback: use the length of the token's raw value if available,
-            # otherwise the string representation.
-            token_text = getattr(token, "value", token_str)
-            end_col = col + len(token_text)
+        errors = _scan(source).errors
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("Unexpected internal error during parsing")
+        return [_make_diagnostic("Internal parser error; see server logs for details.", 0, 0, 0)]
+    return [_diagnostic_from_error(exc, source) for exc in errors]
 
-        return [_make_diagnostic(msg, line, col, end_col)]
 
-    except UnexpectedEOF as exc:
+def _diagnostic_from_error(exc: UnexpectedInput, source: str) -> types.Diagnostic:
+    """Convert one Lark syntax error into an LSP diagnostic."""
+    token = getattr(exc, "token", None)
+    if isinstance(exc, UnexpectedEOF) or (token is not None and token.type == "$END"):
         lines = source.splitlines()
         last_line = max(0, len(lines) - 1)
         last_col = len(lines[last_line]) if lines else 0
         msg = "Unexpected end of file"
         if exc.expected:
             msg += f". Expected one of: {', '.join(sorted(exc.expected))}"
-        return [_make_diagnostic(msg, last_line, last_col, last_col)]
+        return _make_diagnostic(msg, last_line, last_col, last_col)
 
-    except Exception:  # pylint: disable=broad-except
-        logger.exception("Unexpected internal error during parsing")
-        return [_make_diagnostic("Internal parser error; see server logs for details.", 0, 0, 0)]
+    line = max(0, exc.line - 1)
+    col = max(0, exc.column - 1)
+
+    if isinstance(exc, UnexpectedCharacters):
+        lines = source.splitlines()
+        char = lines[line][col] if line < len(lines) and col < len(lines[line]) else ""
+        msg = f"Unexpected character '{char}'"
+        if exc.allowed:
+            msg += f". Expected one of: {', '.join(sorted(exc.allowed))}"
+        return _make_diagnostic(msg, line, col, col + 1)
+
+    token_str = str(token)
+    msg = "Unexpected end of line" if token.type == "_NL" else f"Unexpected token '{token_str}'"
+    if exc.expected:
+        msg += f". Expected one of: {', '.join(sorted(exc.expected))}"
+
+    # Prefer token position metadata to compute the diagnostic range.
+    if token.type != "_NL" and getattr(token, "end_column", None) is not None and token.end_line == token.line:
+        # Lark columns are 1-based; convert to 0-based exclusive end index.
+        end_col = max(0, token.end_column - 1)
+    else:
+        # A rejected newline ends on the next line: mark the end of the line.
+        end_col = col + (0 if token.type == "_NL" else len(token_str))
+    return _make_diagnostic(msg, line, col, end_col)
 
 
 def _make_diagnostic(
@@ -157,10 +220,12 @@ def _make_diagnostic(
 
 def _publish(ls: LanguageServer, uri: str, source: str) -> None:
     """Parse *source* and push diagnostics for *uri* to the client."""
-    diagnostics = _diagnostics_for(source)
-    ls.text_document_publish_diagnostics(
-        types.PublishDiagnosticsParams(uri=uri, diagnostics=diagnostics)
-    )
+    with telemetry.measure("diagnostics:parse"):
+        diagnostics = _diagnostics_for(source)
+    with telemetry.measure("diagnostics:publish"):
+        ls.text_document_publish_diagnostics(
+            types.PublishDiagnosticsParams(uri=uri, diagnostics=diagnostics)
+        )
 
 
 # ---------------------------------------------------------------------------
@@ -168,12 +233,14 @@ def _publish(ls: LanguageServer, uri: str, source: str) -> None:
 # ---------------------------------------------------------------------------
 
 @server.feature(types.TEXT_DOCUMENT_DID_OPEN)
+@telemetry.timed(types.TEXT_DOCUMENT_DID_OPEN)
 def did_open(ls: LanguageServer, params: types.DidOpenTextDocumentParams) -> None:
     """Validate a .sph document as soon as it is opened."""
     _publish(ls, params.text_document.uri, params.text_document.text)
 
 
 @server.feature(types.TEXT_DOCUMENT_DID_CHANGE)
+@telemetry.timed(types.TEXT_DOCUMENT_DID_CHANGE)
 def did_change(ls: LanguageServer, params: types.DidChangeTextDocumentParams) -> None:
     """Re-validate on every incremental or full content change."""
     # With TextDocumentSyncKind.Full the client always sends the entire text.
@@ -182,6 +249,7 @@ def did_change(ls: LanguageServer, params: types.DidChangeTextDocumentParams) ->
 
 
 @server.feature(types.TEXT_DOCUMENT_DID_SAVE)
+@telemetry.timed(types.TEXT_DOCUMENT_DID_SAVE)
 def did_save(ls: LanguageServer, params: types.DidSaveTextDocumentParams) -> None:
     """Re-validate when the document is saved."""
     doc = ls.workspace.get_text_document(params.text_document.uri)
@@ -189,8 +257,11 @@ def did_save(ls: LanguageServer, params: types.DidSaveTextDocumentParams) -> Non
 
 
 @server.feature(types.TEXT_DOCUMENT_DID_CLOSE)
+@telemetry.timed(types.TEXT_DOCUMENT_DID_CLOSE)
 def did_close(ls: LanguageServer, params: types.DidCloseTextDocumentParams) -> None:
-    """Clear diagnostics when a document is closed."""
+    """Clear diagnostics and cached state when a document is closed."""
+    _semantic_cache.pop(params.text_document.uri, None)
+    _metrics_cache.pop(params.text_document.uri, None)
     ls.text_document_publish_diagnostics(
         types.PublishDiagnosticsParams(uri=params.text_document.uri, diagnostics=[])
     )
@@ -204,6 +275,7 @@ def did_close(ls: LanguageServer, params: types.DidCloseTextDocumentParams) -> N
     types.TEXT_DOCUMENT_COMPLETION,
     types.CompletionOptions(trigger_characters=[" ", "|", ":"]),
 )
+@telemetry.timed(types.TEXT_DOCUMENT_COMPLETION)
 def completions(
     _ls: LanguageServer,
     _params: types.CompletionParams,
@@ -234,6 +306,7 @@ def completions(
 # ---------------------------------------------------------------------------
 
 @server.feature(types.TEXT_DOCUMENT_HOVER)
+@telemetry.timed(types.TEXT_DOCUMENT_HOVER)
 def hover(
     ls: LanguageServer,
     params: types.HoverParams,
@@ -282,6 +355,372 @@ def hover(
     )
 
 
+# ---------------------------------------------------------------------------
+# Semantic tokens
+# ---------------------------------------------------------------------------
+
+class _TokenCacheEntry(NamedTuple):
+    """Encoded semantic tokens of one document version."""
+
+    version: Optional[int]
+    result_id: str
+    data: list[int]
+
+
+class _ScanResult(NamedTuple):
+    """Output of one interactive pass over a document."""
+
+    tokens: list[Token]
+    errors: list[UnexpectedInput]
+    tree: Optional[Tree]
+
+
+# uri -> tokens of the latest version served for that document
+_semantic_cache: dict[str, _TokenCacheEntry] = {}
+_result_ids = itertools.count(1)
+
+
+def _scan(source: str) -> _ScanResult:
+    """Run *source* through the contextual lexer and LALR parser in one pass.
+
+    The parser is driven interactively so that every token the contextual
+    lexer produces is observed.  On a syntax error the lexer skips to the
+    end of the offending line and the parser is reset to its start state,
+    so the rest of the document is still tokenised and checked.  An
+    end-of-file error caused only by such a reset (nothing but newlines fed
+    since) is not reported: the input was already reported as broken.
+
+    Returns
+    -------
+    _ScanResult
+        All tokens in source order (including ``_NL``), the syntax errors
+        encountered, in order, and the parse tree when there were none.
+    """
+    tokens: list[Token] = []
+    errors: list[UnexpectedInput] = []
+    interactive = Parser.get_interactive(source)
+    parser_state = interactive.parser_state
+    lexer_state = interactive.lexer_thread.state
+    start_stack = list(parser_state.state_stack)
+    resumed_at = 0  # len(tokens) at the last reset
+
+    while True:
+        try:
+            tokens.extend(interactive.iter_parse())
+            tree = interactive.feed_eof(lexer_state.last_token)
+            return _ScanResult(tokens, errors, None if errors else tree)
+        except UnexpectedInput as exc:
+            token = getattr(exc, "token", None)
+            if token is not None and token.type == "$END":
+                if not errors or any(t.type != "_NL" for t in tokens[resumed_at:]):
+                    errors.append(exc)
+                return _ScanResult(tokens, errors, None)
+            errors.append(exc)
+            if token is not None and (not tokens or tokens[-1] is not token):
+                # Raised by the contextual lexer's root-lexer fallback:
+                # the token was consumed but never yielded.
+                tokens.append(token)
+
+            # Resynchronise at the next newline.  A rejected _NL has
+            # already moved the lexer to the start of the next line.
+            pos = lexer_state.line_ctr.char_pos
+            if pos >= len(source):
+                return _ScanResult(tokens, errors, None)
+            if token is None or token.type != "_NL":
+                end = source.find("\n", pos)
+                end = len(source) if end == -1 else max(end, pos + 1)
+                lexer_state.line_ctr.feed(source[pos:end])
+            parser_state.state_stack[:] = start_stack
+            parser_state.value_stack.clear()
+            resumed_at = len(tokens)
+
+
+def _classify(tokens: list[Token], i: int) -> Optional[tuple[int, int]]:  # pylint: disable=too-many-return-statements
+    """Return ``(token_type, modifiers)`` for ``tokens[i]``, or None to skip it.
+
+    Upper-case names are always gates.  Lower-case names are told apart by
+    their neighbours, which is enough for this grammar:
+    ``name :`` at the start of a line and ``for name`` declare, ``q name`` /
+    ``b name`` is a register, and a name right after ``->``, ``|`` or ``else`` (optionally behind a repeat count
+    or an opening parenthesis) refers to an instruction.
+    """
+    token = tokens[i]
+    if token.type in _KEYWORD_TERMINALS:
+        return _KEYWORD, 0
+    if token.type == "NUMBER":
+        return _NUMBER, 0
+    if token.type == "STRING":
+        return _STRING, 0
+    if token.type == "UPPER_NAME":
+        return _FUNCTION, 0
+    if token.type != "NAME":
+        return (_OPERATOR, 0) if token.value in _OPERATOR_VALUES else None
+
+    nxt = tokens[i + 1] if i + 1 < len(tokens) else None
+    prev = tokens[i - 1] if i > 0 else None
+    at_line_start = prev is None or prev.type == "_NL"
+    if at_line_start and nxt is not None and nxt.type == "COLON":
+        after = tokens[i + 2] if i + 2 < len(tokens) else None
+        is_instruction = after is not None and after.type in ("UPPER_NAME", "NAME")
+        return (_FUNCTION if is_instruction else _VARIABLE), _DECLARATION
+    if nxt is not None and nxt.type == "EQUAL":
+        return _VARIABLE, _DECLARATION
+
+    if prev is None:
+        return _VARIABLE, 0
+    if prev.type == "_FOR_KW":
+        return _VARIABLE, _DECLARATION
+    if prev.type in ("Q", "B"):
+        return _NAMESPACE, 0
+    if prev.type in ("NUMBER", "LPAR") and i > 1:
+        prev = tokens[i - 2]
+    if prev.value in _PIPELINE_LEADERS:
+        return _FUNCTION, 0
+    return _VARIABLE, 0
+
+
+def _semantic_tokens_for(source: str) -> list[int]:
+    """Encode the semantic tokens of *source* in LSP relative format."""
+    tokens = _scan(source).tokens
+    entries = [
+        (token.line - 1, token.column - 1, len(token.value), *kind)
+        for i, token in enumerate(tokens)
+        if (kind := _classify(tokens, i)) is not None
+    ]
+    for line, text in enumerate(source.split("\n")):
+        # Comments are %ignore'd by the grammar, so the lexer never yields
+        # them; '#' cannot occur anywhere else in a Spinach source.
+        col = text.find("#")
+        if col >= 0:
+            entries.append((line, col, len(text.rstrip("\r")) - col, _COMMENT, 0))
+    entries.sort()
+
+    data: list[int] = []
+    prev_line = prev_col = 0
+    for line, col, length, token_type, modifiers in entries:
+        delta_col = col - prev_col if line == prev_line else col
+        data.extend((line - prev_line, delta_col, length, token_type, modifiers))
+        prev_line, prev_col = line, col
+    return data
+
+
+def _cached_semantic_tokens(uri: str, version: Optional[int], source: str) -> _TokenCacheEntry:
+    """Return the tokens of *uri* at *version*, recomputing only on a new version."""
+    entry = _semantic_cache.get(uri)
+    if entry is not None and version is not None and entry.version == version:
+        return entry
+    entry = _TokenCacheEntry(version, str(next(_result_ids)), _semantic_tokens_for(source))
+    _semantic_cache[uri] = entry
+    return entry
+
+
+def _diff_tokens(old: list[int], new: list[int]) -> list[types.SemanticTokensEdit]:
+    """Return the single edit turning *old* into *new*, or none if they match.
+
+    Tokens are relative to their predecessor, so an edit only disturbs the
+    encoded integers of the edited region; the common prefix and suffix
+    are left out of the edit.
+    """
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    if prefix == len(old) == len(new):
+        return []
+    return [
+        types.SemanticTokensEdit(
+            start=prefix,
+            delete_count=len(old) - prefix - suffix,
+            data=new[prefix:len(new) - suffix],
+        )
+    ]
+
+
+@server.feature(types.TEXT_DOCUMENT_SEMANTIC_TOKENS_FULL, _LEGEND)
+@telemetry.timed(types.TEXT_DOCUMENT_SEMANTIC_TOKENS_FULL)
+def semantic_tokens_full(
+    ls: LanguageServer,
+    params: types.SemanticTokensParams,
+) -> types.SemanticTokens:
+    """Return the semantic tokens of the whole document."""
+    doc = ls.workspace.get_text_document(params.text_document.uri)
+    entry = _cached_semantic_tokens(doc.uri, doc.version, doc.source)
+    return types.SemanticTokens(result_id=entry.result_id, data=entry.data)
+
+
+@server.feature(types.TEXT_DOCUMENT_SEMANTIC_TOKENS_FULL_DELTA, _LEGEND)
+@telemetry.timed(types.TEXT_DOCUMENT_SEMANTIC_TOKENS_FULL_DELTA)
+def semantic_tokens_delta(
+    ls: LanguageServer,
+    params: types.SemanticTokensDeltaParams,
+) -> types.SemanticTokens | types.SemanticTokensDelta:
+    """Return the edits since *previous_result_id*.
+
+    Falls back to a full response when the client's previous result is not
+    the one cached for the document (e.g. after a server restart).
+    """
+    doc = ls.workspace.get_text_document(params.text_document.uri)
+    previous = _semantic_cache.get(doc.uri)
+    entry = _cached_semantic_tokens(doc.uri, doc.version, doc.source)
+    if previous is None or previous.result_id != params.previous_result_id:
+        return types.SemanticTokens(result_id=entry.result_id, data=entry.data)
+    return types.SemanticTokensDelta(
+        result_id=entry.result_id,
+        edits=_diff_tokens(previous.data, entry.data),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Circuit metrics — code lenses and inlay hints
+# ---------------------------------------------------------------------------
+
+class _MetricsEntry(NamedTuple):
+    """Metrics of one document version; ``metrics`` is None if it does not build."""
+
+    version: Optional[int]
+    metrics: Optional[tuple[CircuitMetrics, list[tuple[int, CircuitMetrics]]]]
+
+
+# uri -> metrics of the latest version served for that document
+_metrics_cache: dict[str, _MetricsEntry] = {}
+# Kept across documents and versions: it memoises per-instruction results.
+_analyzer = MetricsAnalyzer()
+
+
+def _statement_lines(tokens: list[Token]) -> list[int]:
+    """0-based line of each statement, in order.
+
+    Statements only span lines when a ``for`` header ends with its colon,
+    so otherwise the n-th line holding a token is the line of the n-th AST
+    node.
+    """
+    lines: list[int] = []
+    at_line_start = True
+    previous = None
+    for token in tokens:
+        if token.type == "_NL":
+            at_line_start = previous is None or previous.type != "COLON"
+        elif at_line_start:
+            lines.append(token.line - 1)
+            at_line_start = False
+        previous = token
+    return lines
+
+
+def _metrics_for(
+    source: str, base_dir: Optional[Path] = None
+) -> Optional[tuple[CircuitMetrics, list[tuple[int, CircuitMetrics]]]]:
+    """Analyse *source* without compiling it; imports are resolved relative to *base_dir*.
+
+    Returns
+    -------
+    Optional[tuple[CircuitMetrics, list[tuple[int, CircuitMetrics]]]]
+        Whole-program metrics and ``(line, metrics)`` for every instruction
+        declaration, or None while the document has syntax or AST errors.
+    """
+    scan = _scan(source)
+    if scan.tree is None:
+        return None
+    try:
+        nodes = AstBuilder(base_dir).transform(scan.tree)
+    except VisitError:
+        return None
+    total, instructions = _analyzer.analyse(nodes)
+    lines = _statement_lines(scan.tokens)
+    return total, [(lines[position], metrics) for position, metrics in sorted(instructions.items())]
+
+
+def _cached_metrics(uri: str, version: Optional[int], source: str):
+    """Return the metrics of *uri* at *version*, recomputing only on a new version."""
+    entry = _metrics_cache.get(uri)
+    if entry is None or version is None or entry.version != version:
+        path = to_fs_path(uri)
+        entry = _MetricsEntry(version, _metrics_for(source, Path(path).parent if path else None))
+        _metrics_cache[uri] = entry
+    return entry.metrics
+
+
+def _lens(line: int, title: str) -> types.CodeLens:
+    """Build a display-only code lens at the start of *line*."""
+    position = types.Position(line=line, character=0)
+    return types.CodeLens(
+        range=types.Range(start=position, end=position),
+        command=types.Command(title=title, command=""),
+    )
+
+
+@server.feature(types.TEXT_DOCUMENT_CODE_LENS)
+@telemetry.timed(types.TEXT_DOCUMENT_CODE_LENS)
+def code_lens(
+    ls: LanguageServer,
+    params: types.CodeLensParams,
+) -> list[types.CodeLens]:
+    """Show qubit count, gate count, 2-qubit gate count and depth.
+
+    One lens sits on the first line for the whole program and one above
+    every instruction declaration (for the instruction applied to a single
+    qubit).
+    """
+    doc = ls.workspace.get_text_document(params.text_document.uri)
+    metrics = _cached_metrics(doc.uri, doc.version, doc.source)
+    if metrics is None:
+        return []
+    total, instructions = metrics
+    return [_lens(0, f"Program: {total.label()}")] + [
+        _lens(line, instruction.label()) for line, instruction in instructions
+    ]
+
+
+@server.feature(types.TEXT_DOCUMENT_INLAY_HINT)
+@telemetry.timed(types.TEXT_DOCUMENT_INLAY_HINT)
+def inlay_hints(
+    ls: LanguageServer,
+    params: types.InlayHintParams,
+) -> list[types.InlayHint]:
+    """Show the metrics of each instruction at the end of its declaration line."""
+    doc = ls.workspace.get_text_document(params.text_document.uri)
+    metrics = _cached_metrics(doc.uri, doc.version, doc.source)
+    if metrics is None:
+        return []
+    lines = doc.lines
+    first, last = params.range.start.line, params.range.end.line
+    return [
+        types.InlayHint(
+            position=types.Position(line=line, character=len(lines[line].rstrip("\r\n"))),
+            label=instruction.label(),
+            padding_left=True,
+        )
+        for line, instruction in metrics[1]
+        if first <= line <= last and line < len(lines)
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Telemetry requests
+# ---------------------------------------------------------------------------
+
+@server.feature(LATENCY_STATS_METHOD)
+def latency_stats(_ls: LanguageServer, params) -> dict[str, dict]:
+    """Return the latency histograms recorded so far.
+
+    Passing ``{"reset": true}`` clears them after they are read.
+    """
+    stats = telemetry.snapshot()
+    if getattr(params, "reset", False):
+        telemetry.reset()
+    return stats
+
+
+@server.feature(types.SHUTDOWN)
+def shutdown(_ls: LanguageServer, _params: None) -> None:
+    """Dump the latency histograms to the log before the server goes away."""
+    if telemetry.histograms:
+        logger.info("Request latency:\n%s", telemetry.format_table())
+
+
 # ---------------------------------------------------------------------------
 # Public entry point
 # ---------------------------------------------------------------------------
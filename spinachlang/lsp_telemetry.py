@@ -0,0 +1,121 @@
+"""Latency telemetry for the SpinachLang LSP server.
+
+Every handler (and a few phases inside them, such as parsing and
+diagnostics publication) records its wall-clock duration into a
+fixed-bucket histogram keyed by name. The histograms are cheap to update
+on every request and can be read back through the
+``spinachlang/latencyStats`` custom request or from the log on shutdown.
+"""
+
+from __future__ import annotations
+
+import bisect
+import functools
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+# Upper bucket bounds in milliseconds (roughly 1-2.5-5 per decade); anything
+# slower lands in a final overflow bucket.
+BUCKET_BOUNDS_MS: tuple[float, ...] = (
+    0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000,
+)
+
+
+class LatencyHistogram:
+    """Bucketed latency distribution of one request method or phase."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, elapsed_ms: float) -> None:
+        """Add one observation of *elapsed_ms* milliseconds."""
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS_MS, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the *fraction* quantile (0 < fraction ≤ 1).
+
+        The result never exceeds the largest observation, so the overflow
+        bucket (and a sparsely filled last bucket) report that instead.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, round(fraction * self.count))
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(BUCKET_BOUNDS_MS[i], self.max_ms) if i < len(BUCKET_BOUNDS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        """JSON-friendly summary."""
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.max_ms,
+            "buckets": dict(zip([*map(str, BUCKET_BOUNDS_MS), "inf"], self.buckets)),
+        }
+
+
+class LatencyRegistry:
+    """Histograms keyed by request method or phase name."""
+
+    def __init__(self):
+        self.histograms: dict[str, LatencyHistogram] = {}
+
+    def record(self, name: str, elapsed_ms: float) -> None:
+        """Add one observation to the histogram *name*, creating it if needed."""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.record(elapsed_ms)
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        """Record the duration of the ``with`` body under *name*, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def timed(self, name: str) -> Callable:
+        """Decorator recording every call of the wrapped handler under *name*.
+
+        ``functools.wraps`` keeps the handler's signature visible, which pygls
+        relies on to decide whether to pass the server as first argument.
+        """
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.measure(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> dict[str, dict]:
+        """Summary of every histogram, sorted by name."""
+        return {name: self.histograms[name].to_dict() for name in sorted(self.histograms)}
+
+    def reset(self) -> None:
+        """Forget every observation."""
+        self.histograms.clear()
+
+    def format_table(self) -> str:
+        """Plain-text table of the histograms, one line per name."""
+        rows = [f"{'name':<48} {'count':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>9}"]
+        for name, stats in self.snapshot().items():
+            rows.append(
+                f"{name:<48} {stats['count']:>7} {stats['p50_ms']:>8.2f} "
+                f"{stats['p99_ms']:>8.2f} {stats['max_ms']:>9.2f}"
+            )
+        return "\n".join(rows)
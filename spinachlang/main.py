@@ -4,18 +4,19 @@ import sys
 import argparse
 import pathlib
 from .exit_code import ExitCode
-from .spinach import Spinach
 
 
-def read_code(path: str) -> str:
-    """Open the spinach file"""
+def read_code(path: str) -> str | bytes:
+    """Open the spinach file: source text for .sph, the binary AST for .sphb"""
     if path == "-":
         return sys.stdin.read()
     p = pathlib.Path(path)
     if not p.is_file():
         raise FileNotFoundError(f"Source file not found: {path}")
+    if p.suffix.lower() == ".sphb":
+        return p.read_bytes()
     if p.suffix.lower() != ".sph":
-        raise ValueError(f"Expected a .sph file, got '{p.suffix}'")
+        raise ValueError(f"Expected a .sph or .sphb file, got '{p.suffix}'")
     return p.read_text(encoding="utf-8")
 
 
@@ -38,10 +39,71 @@ def infer_output_path(
         "latex":  ".tex",
         "qir":    ".ll",
         "braket": ".qasm",
+        "ast":    ".sphb",
     }
     return pathlib.Path(f"{in_path.stem}{ext_map[language]}")
 
 
+def base_dir(args: argparse.Namespace) -> pathlib.Path | None:
+    """Directory imports are resolved from: the source file's, or the current one for stdin."""
+    return None if args.source == "-" else pathlib.Path(args.source).resolve().parent
+
+
+def _compile_args(code: str | bytes, args: argparse.Namespace, source_map=None) -> str:  # pylint: disable=too-many-locals
+    """Compile *code* with the optimisation, pass and routing options of *args*.
+
+    *source_map*, a ``SourceMap``, is filled for --source-map.
+
+    Reports optimiser and pass statistics on stderr; exits on an invalid
+    --pass name or --arch file, and on a program that fails validation
+    after listing all of its problems.
+    """
+    # Deferred so that --help and argument errors do not pay for pytket.
+    # pylint: disable=import-outside-toplevel
+    from .optimizer import PeepholeOptimizer
+    from .routing import Router
+    from .spinach import Spinach
+    from .tket_passes import TketPassPipeline
+    from .validation import ValidationError
+
+    optimizer = PeepholeOptimizer(args.optimize)
+    try:
+        pipeline = TketPassPipeline(args.passes)
+        router = Router.from_file(args.arch) if args.arch else None
+    except FileNotFoundError as e:
+        sys.stderr.write(f"[File Error] {e}\n")
+        sys.exit(ExitCode.FILE_NOT_FOUND)
+    except ValueError as e:
+        sys.stderr.write(f"[Input Error] {e}\n")
+        sys.exit(ExitCode.INVALID_INPUT)
+    try:
+        compiled = Spinach.compile(
+            code=code, language=args.language, optimize=optimizer, passes=pipeline, route=router,
+            base_dir=base_dir(args), source_map=source_map,
+        )
+    except ValidationError as e:
+        for issue in e.issues:
+            sys.stderr.write(f"[Validation Error] {args.source}:{issue}\n")
+        sys.exit(ExitCode.INVALID_INPUT)
+    if args.optimize:
+        sys.stderr.write(f"Optimizer removed {optimizer.removed} gate call(s)\n")
+    if pipeline.cache_hit:
+        sys.stderr.write("pytket passes: cached result reused\n")
+    for name, ms in pipeline.timings.items():
+        sys.stderr.write(f"pytket pass {name}: {ms:.2f} ms\n")
+    return compiled
+
+
+def emit_ast(code: str | bytes, args: argparse.Namespace) -> bytes:
+    """Serialise the AST of *code* to the binary .sphb format."""
+    from .spinach import Spinach  # pylint: disable=import-outside-toplevel
+
+    if isinstance(code, bytes):
+        sys.stderr.write("[Input Error] The source is already a binary AST\n")
+        sys.exit(ExitCode.INVALID_INPUT)
+    return Spinach.dump_ast(code, base_dir=base_dir(args))
+
+
 def main() -> None:
     """CLI entry point"""
     parser = argparse.ArgumentParser(
@@ -55,9 +117,21 @@ def main() -> None:
     parser.add_argument(
         "-l",
         "--language",
-        required=True,
         choices=["qasm", "cirq", "quil", "json", "latex", "qir", "braket"],
-        help="Target compilation language.",
+        help="Target compilation language (required unless --emit ast).",
+    )
+    parser.add_argument(
+        "--emit",
+        choices=["ast"],
+        default=None,
+        help="Write the parsed AST in the binary .sphb format instead of compiling; "
+             "a .sphb file can later be given as the source.",
+    )
+    parser.add_argument(
+        "--source-map",
+        action="store_true",
+        help="Also write <output>.map: JSON giving the source position of every statement "
+             "and the number of gates it added.",
     )
     parser.add_argument(
         "-o",
@@ -65,7 +139,36 @@ def main() -> None:
         default=None,
         help="Output path (default: inferred from source and language). Use '-' for stdout.",
     )
+    parser.add_argument(
+        "-O",
+        dest="optimize",
+        type=int,
+        choices=[0, 1, 2],
+        default=0,
+        metavar="LEVEL",
+        help="Peephole optimisation level: 0 (off, default), 1 (cancel inverses, "
+             "drop identity rotations), 2 (also merge rotations). Written as -O1 / -O2.",
+    )
+    parser.add_argument(
+        "--pass",
+        dest="passes",
+        action="append",
+        default=[],
+        metavar="NAME",
+        help="Run a pytket pass on the compiled circuit before emission; repeat to chain "
+             "passes (e.g. --pass FullPeepholeOptimise --pass rebase:ibm). "
+             "Per-pass timings are reported on stderr.",
+    )
+    parser.add_argument(
+        "--arch",
+        default=None,
+        metavar="FILE",
+        help="Coupling map JSON of the target device; the compiled circuit is placed "
+             "and routed onto it (after any --pass).",
+    )
     args = parser.parse_args()
+    if args.emit is None and args.language is None:
+        parser.error("the following arguments are required: -l/--language")
 
     try:
         code = read_code(args.source)
@@ -79,16 +182,38 @@ def main() -> None:
         sys.stderr.write(f"[System Error] Failed to read file: {e}\n")
         sys.exit(ExitCode.READ_ERROR)
 
-    compiled = Spinach.compile(code=code, language=args.language)
+    source_map = None
+    if args.source_map and args.emit is None:
+        from .source_map import SourceMap  # pylint: disable=import-outside-toplevel
+        source_map = SourceMap()
+    compiled = emit_ast(code, args) if args.emit == "ast" else _compile_args(code, args, source_map)
+
+    write_output(compiled, args, source_map)
+
 
+def write_output(compiled: str | bytes, args: argparse.Namespace, source_map=None) -> None:
+    """Write the compiled output, and the source map when there is one; exits on a write error."""
     try:
-        out_path = infer_output_path(args.source, args.language, args.output)
+        out_path = infer_output_path(args.source, args.emit or args.language, args.output)
 
-        if args.output == "-" or (args.output is None and str(out_path) == "-"):
-            sys.stdout.write(compiled)
+        to_stdout = args.output == "-" or (args.output is None and str(out_path) == "-")
+        if to_stdout:
+            if isinstance(compiled, bytes):
+                sys.stdout.buffer.write(compiled)
+            else:
+                sys.stdout.write(compiled)
         else:
-            out_path.write_text(compiled, encoding="utf-8")
+            if isinstance(compiled, bytes):
+                out_path.write_bytes(compiled)
+            else:
+                out_path.write_text(compiled, encoding="utf-8")
             sys.stderr.write(f"Compiled to: {out_path.resolve()}\n")
+        if source_map is not None:
+            # Next to the output, or named after the source when writing to stdout.
+            map_path = out_path.with_name(f"{out_path.name}.map")
+            output = "-" if to_stdout else str(out_path)
+            map_path.write_text(source_map.to_json(source=args.source, output=output), encoding="utf-8")
+            sys.stderr.write(f"Source map: {map_path.resolve()}\n")
     except OSError as e:
         sys.stderr.write(f"[Write Error] Could not write output: {e}\n")
         sys.exit(ExitCode.WRITE_ERROR)
@@ -0,0 +1,141 @@
+"""Loading of imported modules (``import "lib.sph"``) with a compiled-module cache.
+
+A module is a ``.sph`` file holding only declarations (qubits, registers,
+bits, lists, instructions, constants); its own imports are flattened into
+it.  The resolved declarations are pickled to
+``__spinachcache__/<stem>.<digest>.sphc`` next to the source, or under
+``$SPINACH_CACHE_DIR`` when set, so a later import of an unchanged library
+costs one unpickling instead of a parse.  An artifact records the content
+hash of the module and of every module it imports, and is rebuilt when any
+of them changes.  Within a process, loaded modules are also kept in memory.
+
+Artifacts are trusted like the sources next to them: do not point
+``SPINACH_CACHE_DIR`` at a directory others can write to.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+CACHE_DIR_ENV = "SPINACH_CACHE_DIR"
+CACHE_DIR_NAME = "__spinachcache__"
+# Bumped whenever the AST types or the artifact layout change.
+_FORMAT_VERSION = 2
+
+
+class CompiledModule(NamedTuple):
+    """The resolved declarations of a module and the hashes they were built from."""
+
+    declarations: list
+    # resolved path -> sha256 of the source, for the module and everything it imports
+    sources: dict[str, str]
+
+
+# resolved path -> module loaded by this process
+_memory: dict[str, CompiledModule] = {}
+_memory_lock = threading.Lock()
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def cache_path(source: Path) -> Path:
+    """Where the compiled artifact of *source* is stored."""
+    directory = os.environ.get(CACHE_DIR_ENV)
+    root = Path(directory) if directory else source.parent / CACHE_DIR_NAME
+    return root / f"{source.stem}.{_digest(str(source).encode())[:16]}.sphc"
+
+
+def _fresh(module: CompiledModule) -> bool:
+    """True when no source the module was built from has changed."""
+    for path, digest in module.sources.items():
+        try:
+            if _digest(Path(path).read_bytes()) != digest:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def _read_artifact(path: Path):
+    """The module stored at *path*, or None if it is missing, unreadable or of another format."""
+    try:
+        with path.open("rb") as stream:
+            version, module = pickle.load(stream)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError, TypeError):
+        return None
+    if version != _FORMAT_VERSION or not isinstance(module, CompiledModule):
+        return None
+    return module
+
+
+def _write_artifact(path: Path, module: CompiledModule) -> None:
+    """Write atomically; a read-only tree or a module that cannot be pickled simply goes without a cache."""
+    tmp = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as stream:
+            pickle.dump((_FORMAT_VERSION, module), stream, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except (OSError, pickle.PicklingError, AttributeError, TypeError, RecursionError):
+        pass
+    finally:
+        if tmp is not None and os.path.exists(tmp):
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+
+# (source path, source code, import chain) -> (declarations, sources of the imported modules)
+ModuleBuilder = Callable[[Path, str, tuple[str, ...]], tuple[list, dict[str, str]]]
+
+
+def load_module(path: Path, build: ModuleBuilder, import_chain: tuple[str, ...] = ()) -> CompiledModule:
+    """Declarations of the module at *path*, from the cache when it is up to date.
+
+    *build* parses the module when there is no valid artifact.
+    *import_chain* holds the modules currently being imported, to report
+    import cycles.
+    """
+    source = Path(path).resolve()
+    key = str(source)
+    if key in import_chain:
+        raise ValueError(f"Import cycle: {' -> '.join(import_chain + (key,))}")
+    try:
+        data = source.read_bytes()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Imported module not found: {path}") from None
+    digest = _digest(data)
+
+    def _valid(module) -> bool:
+        return module is not None and module.sources.get(key) == digest and _fresh(module)
+
+    with _memory_lock:
+        module = _memory.get(key)
+    if _valid(module):
+        return module
+
+    artifact = cache_path(source)
+    module = _read_artifact(artifact)
+    if not _valid(module):
+        declarations, imported = build(source, data.decode("utf-8"), import_chain + (key,))
+        module = CompiledModule(declarations, {key: digest, **imported})
+        _write_artifact(artifact, module)
+    with _memory_lock:
+        _memory[key] = module
+    return module
+
+
+def clear_cache() -> None:
+    """Forget the modules loaded by this process; artifacts on disk are kept."""
+    with _memory_lock:
+        _memory.clear()
@@ -0,0 +1,292 @@
+"""Peephole optimisation of gate pipelines, run on the AST before emission.
+
+Levels
+------
+0  no optimisation
+1  cancel adjacent inverse gates (``H | H``, ``S | ST``, ``CX(a) | CX(a)``)
+   and drop identity rotations (``RZ(0)``, ``RX(2)``)
+2  level 1, plus merge consecutive rotations about the same axis
+   (``RZ(0.1) | RZ(0.2)`` → ``RZ(0.3)``)
+
+Repeated actions (``q -> N pipeline``) are folded too.  At level 1, a
+pipeline of single-qubit gates whose unitary has a small period k
+(``X``: 2, ``S``: 4, ``T``: 8, ``H | S``: 3 …, up to global phase) runs
+``N mod k`` times instead of N.  At level 2, a pipeline that is a single
+rotation is folded into one rotation by N times the angle.
+
+Rewrites stay inside one pipeline and never look through a named
+instruction reference (``| bell``), a barrier or a measurement; the named
+instruction's own declaration is optimised where it is declared.  A
+pipeline runs each gate over every target before the next gate, so only
+multi-qubit gates whose per-target copies commute with each other
+(controlled gates sharing their control or target, diagonal gates) are
+cancelled; ``SWAP(a) | SWAP(a)`` applied to two targets is not an identity.
+
+Removing a gate removes its side effects too: a qubit that only appears as
+an argument of cancelled gates (``0 -> CX(5) | CX(5)``) is no longer added
+to the circuit.  Action targets are always added, even when their whole
+pipeline is cancelled.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Optional, Union
+
+import numpy as np
+
+from .spinach_types import (
+    GateCall,
+    GatePipeByName,
+    GatePipeline,
+    InstructionDeclaration,
+    Action,
+    ConditionalAction,
+    ForLoop,
+    ModuleImport,
+)
+
+# Alternative spellings mapped to one canonical name.
+_CANONICAL = {
+    "N": "X",
+    "CNOT": "CX",
+    "FCNOT": "FCX",
+    "TOFFOLI": "CCX",
+}
+
+# Gates equal to their own inverse.  Multi-qubit entries are restricted to
+# those whose copies over several targets commute (see module docstring).
+_SELF_INVERSE = frozenset({
+    "H", "X", "Y", "Z",
+    "CX", "FCX", "CY", "FCY", "CZ", "FCZ", "CH", "FCH",
+    "CCX",
+})
+
+_INVERSE_PAIRS = {
+    "S": "ST", "ST": "S",
+    "T": "TT", "TT": "T",
+    "SX": "SXDG", "SXDG": "SX",
+    "V": "VDG", "VDG": "V",
+}
+
+# Single-angle single-qubit rotations; the angle (in half-turns) is args[0]
+# and the gate is the identity, up to global phase, when it is a multiple of 2.
+_ROTATIONS = frozenset({"RX", "RY", "RZ", "U1"})
+
+_ANGLE_TOLERANCE = 1e-12
+
+# Longest period looked for when folding repeated actions.
+_MAX_PERIOD = 64
+
+_SQRT_HALF = math.sqrt(0.5)
+_FIXED_UNITARIES: dict[str, np.ndarray] = {
+    "H": np.array([[1, 1], [1, -1]]) * _SQRT_HALF,
+    "X": np.array([[0, 1], [1, 0]]),
+    "Y": np.array([[0, -1j], [1j, 0]]),
+    "Z": np.diag([1, -1]),
+    "S": np.diag([1, 1j]),
+    "ST": np.diag([1, -1j]),
+    "T": np.diag([1, np.exp(1j * math.pi / 4)]),
+    "TT": np.diag([1, np.exp(-1j * math.pi / 4)]),
+    "SX": np.array([[1 + 1j, 1 - 1j], [1 - 1j, 1 + 1j]]) / 2,
+    "SXDG": np.array([[1 - 1j, 1 + 1j], [1 + 1j, 1 - 1j]]) / 2,
+    "V": np.array([[1, -1j], [-1j, 1]]) * _SQRT_HALF,
+    "VDG": np.array([[1, 1j], [1j, 1]]) * _SQRT_HALF,
+}
+
+
+def _canonical(name: str) -> str:
+    return _CANONICAL.get(name, name)
+
+
+def _angle(call: GateCall) -> Optional[Union[int, float]]:
+    """The literal angle of a rotation, or None if it is not a plain number."""
+    if _canonical(call.name) not in _ROTATIONS or len(call.args) != 1:
+        return None
+    angle = call.args[0]
+    if isinstance(angle, bool) or not isinstance(angle, (int, float)):
+        return None
+    return angle
+
+
+def _is_identity(angle: Union[int, float]) -> bool:
+    remainder = math.fmod(angle, 2)
+    return min(abs(remainder), 2 - abs(remainder)) < _ANGLE_TOLERANCE
+
+
+def _rotation_unitary(name: str, angle: float) -> np.ndarray:
+    """2x2 unitary of a rotation by *angle* half-turns."""
+    half = math.pi * angle / 2
+    if name == "RX":
+        return np.array([[math.cos(half), -1j * math.sin(half)], [-1j * math.sin(half), math.cos(half)]])
+    if name == "RY":
+        return np.array([[math.cos(half), -math.sin(half)], [math.sin(half), math.cos(half)]])
+    if name == "RZ":
+        return np.diag([np.exp(-1j * half), np.exp(1j * half)])
+    return np.diag([1, np.exp(2j * half)])  # U1
+
+
+def _is_scalar(u: np.ndarray) -> bool:
+    """True when *u* is the identity up to global phase."""
+    return abs(u[0, 1]) < 1e-9 and abs(u[1, 0]) < 1e-9 and abs(u[0, 0] - u[1, 1]) < 1e-9
+
+
+def _period(u: np.ndarray) -> Optional[int]:
+    """Smallest k ≤ _MAX_PERIOD with u**k the identity up to phase, or None."""
+    power = u
+    for k in range(1, _MAX_PERIOD + 1):
+        if _is_scalar(power):
+            return k
+        power = power @ u
+    return None
+
+
+def _cancels(first: GateCall, second: GateCall) -> bool:
+    """True when *second* undoes *first*."""
+    a, b = _canonical(first.name), _canonical(second.name)
+    if first.args != second.args:
+        return False
+    return (a == b and a in _SELF_INVERSE) or _INVERSE_PAIRS.get(a) == b
+
+
+class PeepholeOptimizer:
+    """Rewrite the pipelines of a program to emit fewer gates.
+
+    A single instance can be reused; ``removed`` accumulates the number of
+    gate calls taken out of pipelines across every ``run``.
+
+    Example::
+
+        optimizer = PeepholeOptimizer(level=2)
+        nodes = optimizer.run(AstBuilder().transform(Parser.get_tree(code)))
+        print(optimizer.removed)
+    """
+
+    LEVELS = (0, 1, 2)
+
+    def __init__(self, level: int = 1):
+        if level not in self.LEVELS:
+            raise ValueError(f"Unknown optimisation level {level!r}. Valid options: 0, 1, 2")
+        self.level = level
+        self.removed = 0
+
+    def run(self, nodes: list) -> list:
+        """Return *nodes* with every pipeline optimised; the input is not modified."""
+        if self.level == 0:
+            return nodes
+        instructions: dict[str, GatePipeline] = {}
+        out = []
+        for node in nodes:
+            node = self._optimize_node(node)
+            if isinstance(node, InstructionDeclaration):
+                instructions[node.name] = node.pipeline
+            elif isinstance(node, ModuleImport):
+                instructions.update(
+                    (d.name, d.pipeline) for d in node.declarations if isinstance(d, InstructionDeclaration)
+                )
+            elif isinstance(node, Action) and (node.count or 1) > 1:
+                node = self._fold_repeats(node, instructions)
+            out.append(node)
+        return out
+
+    def optimize_pipeline(self, pipeline: GatePipeline) -> GatePipeline:
+        """Return an optimised copy of *pipeline*."""
+        out: list = []
+        for part in pipeline.parts:
+            if not isinstance(part, GateCall):
+                out.append(part)
+                continue
+            previous = out[-1] if out and isinstance(out[-1], GateCall) else None
+            angle = _angle(part)
+            if previous is not None and _cancels(previous, part):
+                out.pop()
+                self.removed += 2
+            elif (
+                self.level >= 2 and angle is not None and previous is not None
+                and _canonical(previous.name) == _canonical(part.name)
+                and _angle(previous) is not None
+            ):
+                merged = _angle(previous) + angle
+                if isinstance(merged, float):
+                    merged = round(merged, 12)  # 0.1 + 0.2 → 0.3
+                out.pop()
+                if _is_identity(merged):
+                    self.removed += 2
+                else:
+                    span = (previous.span[0], part.span[1]) if previous.span and part.span else None
+                    out.append(GateCall(name=previous.name, args=[merged], span=span))
+                    self.removed += 1
+            elif angle is not None and _is_identity(angle):
+                self.removed += 1
+            else:
+                out.append(part)
+        return GatePipeline(parts=out, span=pipeline.span)
+
+    def _fold_repeats(self, action: Action, instructions: dict[str, GatePipeline]) -> Action:
+        """Reduce the repetition count of *action* when its pipeline allows it."""
+        pipeline = action.instruction
+        if not isinstance(pipeline, GatePipeline):
+            return action
+        count = action.count
+        parts = pipeline.parts
+        if self.level >= 2 and len(parts) == 1 and _angle(parts[0]) is not None:
+            angle = _angle(parts[0]) * count
+            angle = round(math.fmod(angle, 4), 12) if isinstance(angle, float) else angle % 4
+            self.removed += count - (0 if _is_identity(angle) else 1)
+            folded = [] if _is_identity(angle) else [GateCall(name=parts[0].name, args=[angle])]
+            return action.model_copy(update={"count": None, "instruction": GatePipeline(parts=folded)})
+
+        u = self._unitary(pipeline, instructions, frozenset())
+        period = _period(u) if u is not None else None
+        if period is None or count < period:
+            return action
+        remaining = count % period
+        self.removed += self._gate_calls(pipeline, instructions) * (count - remaining)
+        if remaining == 0:
+            return action.model_copy(update={"count": None, "instruction": GatePipeline(parts=[])})
+        return action.model_copy(update={"count": remaining})
+
+    def _unitary(self, pipeline: GatePipeline, instructions: dict, seen: frozenset) -> Optional[np.ndarray]:
+        """Single-qubit unitary of *pipeline*, or None if it is not purely single-qubit."""
+        u = np.eye(2, dtype=complex)
+        for part in pipeline.parts:
+            if isinstance(part, GatePipeByName):
+                ref = instructions.get(part.name)
+                if ref is None or part.name in seen:
+                    return None
+                sub = GatePipeline(parts=ref.parts[::-1]) if part.rev else ref
+                gate = self._unitary(sub, instructions, seen | {part.name})
+                if gate is None:
+                    return None
+            elif _angle(part) is not None:
+                gate = _rotation_unitary(_canonical(part.name), _angle(part))
+            elif not part.args and _canonical(part.name) in _FIXED_UNITARIES:
+                gate = _FIXED_UNITARIES[_canonical(part.name)]
+            else:
+                return None
+            u = gate @ u
+        return u
+
+    def _gate_calls(self, pipeline: GatePipeline, instructions: dict) -> int:
+        """Number of gate calls one run of *pipeline* makes (named references expanded)."""
+        return sum(
+            self._gate_calls(instructions[p.name], instructions) if isinstance(p, GatePipeByName) else 1
+            for p in pipeline.parts
+        )
+
+    def _optimize_node(self, node):
+        match node:
+            case InstructionDeclaration():
+                return node.model_copy(update={"pipeline": self.optimize_pipeline(node.pipeline)})
+            case Action(instruction=GatePipeline() as pipeline):
+                return node.model_copy(update={"instruction": self.optimize_pipeline(pipeline)})
+            case ConditionalAction():
+                update = {"if_pipeline": self.optimize_pipeline(node.if_pipeline)}
+                if node.else_pipeline is not None:
+                    update["else_pipeline"] = self.optimize_pipeline(node.else_pipeline)
+                return node.model_copy(update=update)
+            case ForLoop():
+                return node.model_copy(update={"body": self._optimize_node(node.body)})
+            case ModuleImport():
+                return node.model_copy(update={"declarations": [self._optimize_node(d) for d in node.declarations]})
+        return node
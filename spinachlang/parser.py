@@ -8,8 +8,8 @@ from pathlib import Path
 from lark import Lark
 
 
-@lru_cache(maxsize=1)
-def _build_parser() -> Lark:
+@lru_cache(maxsize=2)
+def _build_parser(positions: bool = False) -> Lark:
 
     grammar_path = Path(__file__).resolve().parent / "grammar.lark"
     try:
@@ -22,17 +22,30 @@ def _build_parser() -> Lark:
         raise PermissionError(
             f"Permission denied reading grammar file: {grammar_path}"
         ) from None
-    return Lark(grammar, start="start", parser="lalr")
+    return Lark(grammar, start="start", parser="lalr", propagate_positions=positions)
 
 
 class Parser:  # pylint: disable=too-few-public-methods
     """Frontend wrapper that exposes a single entry point for parsing Spinach source code."""
 
     @staticmethod
-    def get_tree(code: str):
+    def get_tree(code: str, positions: bool = False):
         """Parse *code* and return the Lark parse tree.
 
         The underlying Lark parser is built once per process (cached via
         ``_build_parser``) so repeated calls incur only the parse cost.
+        With *positions*, every subtree carries its source offsets in
+        ``meta``, which ``AstBuilder(spans=True)`` turns into node spans;
+        it makes parsing markedly slower, so it is off by default.
         """
-        return _build_parser().parse(code)
+        return _build_parser(positions).parse(code)
+
+    @staticmethod
+    def get_interactive(code: str):
+        """Return a Lark interactive parser positioned at the start of *code*.
+
+        Tooling (the LSP server) drives it token by token so it can observe
+        the contextual lexer's output and resume after syntax errors, which
+        ``get_tree`` cannot do.
+        """
+        return _build_parser().parse_interactive(code)
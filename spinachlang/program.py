@@ -0,0 +1,247 @@
+"""A program compiled once and exported to any number of formats.
+
+``Spinach.load(code)`` parses and validates *code* and returns a
+``SpinachProgram``; the circuit is built on first use and every export
+(``to_qasm()``, ``to_qiskit()``, ``compile("quil")``, ...) is computed once
+from it and memoized::
+
+    program = Spinach.load(code, optimize=1)
+    qasm, quil = program.to_qasm(), program.compile("quil")
+    qiskit_circuit = program.to_qiskit()
+
+Exports are shared between calls: copy one before mutating it.
+``to_tket()`` is the exception and returns a fresh copy of the circuit,
+since pytket passes rewrite circuits in place.
+
+Like ``spinach.py``, this module only imports pytket once a circuit is
+built.
+"""
+
+from __future__ import annotations
+
+import importlib
+from functools import cached_property
+from os import PathLike
+from typing import TYPE_CHECKING, Callable, Optional, Sequence, Union
+
+from .parser import Parser
+
+if TYPE_CHECKING:
+    from .optimizer import PeepholeOptimizer
+    from .routing import CouplingMap, Router
+    from .source_map import SourceMap
+    from .tket_passes import TketPassPipeline
+
+# target language -> name of the Backend method emitting it
+EMITTERS = {
+    "qasm":   "compile_to_openqasm",
+    "json":   "compile_to_json",
+    "cirq":   "compile_to_cirq_python",
+    "quil":   "compile_to_quil",
+    "latex":  "compile_to_latex",
+    "qir":    "compile_to_qir",
+    "braket": "compile_to_braket",
+}
+
+
+def checked_ast(code: Union[str, bytes], base_dir: Union[str, PathLike, None], spans: bool = False):
+    """The AST of *code*, its validation issues (located in the source) and its parse tree.
+
+    The tree is None for a binary AST.
+    """
+    # pylint: disable=import-outside-toplevel
+    from .ast_binary import load
+    from .ast_builder import AstBuilder
+    from .validation import locate, validate
+
+    if isinstance(code, bytes):
+        nodes = load(code)
+        return nodes, validate(nodes), None
+    tree = Parser.get_tree(code, positions=spans)
+    nodes = AstBuilder(base_dir, spans=spans).transform(tree)
+    issues = validate(nodes)
+    return nodes, locate(issues, tree, code) if issues else issues, tree
+
+
+def locate_error(exc: Exception, code: Union[str, bytes], tree) -> None:
+    """Prepend the line and column of the statement (or node) *exc* was raised for to its message."""
+    # pylint: disable=import-outside-toplevel
+    from .source_map import LineIndex
+    from .validation import statement_positions
+
+    if tree is None or not exc.args or not isinstance(exc.args[0], str):
+        return
+    span, statement = getattr(exc, "span", None), getattr(exc, "statement", None)
+    if span is not None:
+        line, column = LineIndex(code).position(span[0])
+    elif statement is not None:
+        line, column = statement_positions(tree, code)[statement]
+    else:
+        return
+    exc.line, exc.column = line, column
+    exc.args = (f"line {line}:{column}: {exc.args[0]}",) + exc.args[1:]
+
+
+def _extension(module: str, name: str, kind: str) -> Callable:
+    """``module.name`` from a pytket extension, or an ImportError saying how to install it."""
+    try:
+        return getattr(importlib.import_module(module), name)
+    except ImportError as exc:
+        raise ImportError(
+            f"{kind} objects require {module.replace('pytket.extensions.', 'pytket-')}. "
+            "Install it with: pip install spinachlang"
+        ) from exc
+
+
+class SpinachProgram:
+    """A parsed and validated program; see the module docstring.
+
+    The arguments are those of ``Spinach.create_circuit``.  The program is
+    parsed and validated here, so a ``ValidationError`` or syntax error is
+    raised by the constructor; other compilation errors are raised by the
+    first use of the circuit.
+    """
+
+    def __init__(self, code: Union[str, bytes],  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                 optimize: Union[int, PeepholeOptimizer] = 0,
+                 passes: Union[Sequence[str], TketPassPipeline, None] = None,
+                 route: Union[CouplingMap, Router, None] = None,
+                 base_dir: Union[str, PathLike, None] = None,
+                 source_map: Optional[SourceMap] = None):
+        from .validation import ValidationError  # pylint: disable=import-outside-toplevel
+
+        self.source = code
+        self.ast, issues, self._tree = checked_ast(code, base_dir, spans=source_map is not None)
+        if issues:
+            raise ValidationError(issues)
+        self._options = (optimize, passes, route, source_map)
+        self._exports: dict = {}
+
+    @cached_property
+    def _optimized(self) -> list:
+        """The AST after the peephole optimiser, shared by every circuit built from it."""
+        from .optimizer import PeepholeOptimizer  # pylint: disable=import-outside-toplevel
+
+        optimize = self._options[0]
+        if not isinstance(optimize, PeepholeOptimizer):
+            optimize = PeepholeOptimizer(optimize)
+        return optimize.run(self.ast)
+
+    @cached_property
+    def circuit(self):
+        """The pytket Circuit, after optimisation, passes and routing; built on first access."""
+        # pylint: disable=import-outside-toplevel
+        from .backend import Backend
+        from .routing import Router
+        from .tket_passes import TketPassPipeline
+
+        _, passes, route, source_map = self._options
+        records = None if source_map is None else []
+        try:
+            circuit = Backend.compile_to_circuit(self._optimized, records)
+        except (ValueError, TypeError) as exc:
+            locate_error(exc, self.source, self._tree)
+            raise
+        if source_map is not None:
+            source_map.record(self.source if isinstance(self.source, str) else None, records)
+        if passes:
+            if not isinstance(passes, TketPassPipeline):
+                passes = TketPassPipeline(passes)
+            circuit = passes.run(circuit)
+        if route:
+            if not isinstance(route, Router):
+                route = Router(route)
+            circuit = route.run(circuit)
+        return circuit
+
+    def __export(self, key: str, make: Callable):
+        """``make()``, computed on the first call for *key* only."""
+        if key not in self._exports:
+            self._exports[key] = make()
+        return self._exports[key]
+
+    def __direct(self, module: str, function: str):
+        """``function(ast)`` of the builder *module* (see ``ir_builder``), or None for the pytket path.
+
+        Programs with passes, routing or a source map need the pytket
+        circuit, and so does any program the builder does not cover.
+        """
+        if any(self._options[1:]):
+            return None
+        try:
+            builder = importlib.import_module(f".{module}", __package__)
+        except ImportError:
+            return None
+        try:
+            return getattr(builder, function)(self._optimized)
+        except (builder.Unsupported, ValueError, TypeError, KeyError):
+            return None  # the pytket path handles it, or raises the backend's error
+
+    def __native(self, direct: bool, module: str, function: str,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                 extension: str, converter: str, kind: str):
+        """The direct builder's object when *direct* and it applies, else the pytket extension's conversion."""
+        built = self.__direct(module, function) if direct else None
+        return built if built is not None else _extension(extension, converter, kind)(self.circuit)
+
+    # ── String output ──────────────────────────────────────────────────────
+
+    def compile(self, language: str) -> str:
+        """The program in *language* (one of ``EMITTERS``)."""
+        from .backend import Backend  # pylint: disable=import-outside-toplevel
+
+        if language not in EMITTERS:
+            raise ValueError(
+                f"Unknown target language {language!r}. "
+                f"Valid options: {', '.join(sorted(EMITTERS))}"
+            )
+        if language == "cirq":
+            return self.__export(language, self.__cirq_python)
+        return self.__export(language, lambda: getattr(Backend, EMITTERS[language])(self.circuit))
+
+    def __cirq_python(self) -> str:
+        """Cirq Python source, written straight from the AST when ``cirq_builder`` covers it."""
+        from .backend import Backend  # pylint: disable=import-outside-toplevel
+
+        ops = self.__direct("cirq_builder", "operations")
+        if ops is None:
+            return Backend.compile_to_cirq_python(self.circuit)
+        from .cirq_source import source  # pylint: disable=import-outside-toplevel
+        return "".join(source(ops))
+
+    def to_qasm(self) -> str:
+        """OpenQASM 2.0 source."""
+        return self.compile("qasm")
+
+    def to_json(self) -> str:
+        """pytket JSON."""
+        return self.compile("json")
+
+    def to_quil(self) -> str:
+        """Quil source."""
+        return self.compile("quil")
+
+    # ── Native objects ─────────────────────────────────────────────────────
+
+    def to_tket(self):
+        """A copy of the pytket Circuit, free to modify."""
+        return self.circuit.copy()
+
+    def to_cirq(self, direct: bool = True):
+        """A cirq.Circuit (built by ``cirq_builder``, else needs pytket-cirq)."""
+        return self.__export(f"cirq-object-{direct}", lambda: self.__native(
+            direct, "cirq_builder", "build", "pytket.extensions.cirq", "tk_to_cirq", "cirq"))
+
+    def to_braket(self):
+        """A braket Circuit (needs pytket-braket)."""
+        convert = _extension("pytket.extensions.braket", "tk_to_braket", "Braket")
+        return self.__export("braket-object", lambda: convert(self.circuit)[0])
+
+    def to_pyquil(self):
+        """A pyquil.Program (needs pytket-pyquil)."""
+        convert = _extension("pytket.extensions.pyquil", "tk_to_pyquil", "PyQuil")
+        return self.__export("pyquil-object", lambda: convert(self.circuit))
+
+    def to_qiskit(self, direct: bool = True):
+        """A qiskit.QuantumCircuit (built by ``qiskit_builder``, else needs pytket-qiskit)."""
+        return self.__export(f"qiskit-object-{direct}", lambda: self.__native(
+            direct, "qiskit_builder", "build", "pytket.extensions.qiskit", "tk_to_qiskit", "Qiskit"))
@@ -0,0 +1,135 @@
+"""Direct construction of qiskit circuits from the Spinach AST.
+
+``Spinach.to_qiskit`` used to build a pytket Circuit and convert it with
+``tk_to_qiskit``: two full circuit constructions plus a rebase pass.
+``build`` records the program with ``ir_builder.IRBuilder`` and emits
+prebuilt qiskit gate instances, appended in bulk once the registers are
+known.  The result equals what ``tk_to_qiskit`` returns for the same
+program.
+
+Only gates with an exact qiskit counterpart are built here.  A program
+using anything else (classical bit operations, conditionals, CIRCBOX,
+TK1, TK2, FSIM, ...) raises ``Unsupported``, and the caller falls back to
+the pytket path.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+
+from qiskit.circuit import (
+    Barrier,
+    CircuitInstruction,
+    ClassicalRegister,
+    Measure,
+    QuantumCircuit,
+    QuantumRegister,
+    Reset,
+)
+from qiskit.circuit import library as gates
+
+from .ir_builder import IRBuilder, Unsupported
+
+# gate -> (qiskit gate class, global phase added in half-turns).  The
+# phases are those tk_to_qiskit adds for the same pytket gate.
+_GATES: dict[str, tuple] = {
+    "N":        (gates.XGate, 0.0),
+    "X":        (gates.XGate, 0.0),
+    "Y":        (gates.YGate, 0.0),
+    "Z":        (gates.ZGate, 0.0),
+    "H":        (gates.HGate, 0.0),
+    "S":        (gates.SGate, 0.0),
+    "ST":       (gates.SdgGate, 0.0),
+    "T":        (gates.TGate, 0.0),
+    "TT":       (gates.TdgGate, 0.0),
+    "RX":       (gates.RXGate, 0.0),
+    "RY":       (gates.RYGate, 0.0),
+    "RZ":       (gates.RZGate, 0.0),
+    "SX":       (gates.SXGate, 0.0),
+    "SXDG":     (gates.SXdgGate, 0.0),
+    "V":        (gates.SXGate, -0.25),
+    "VDG":      (gates.SXdgGate, 0.25),
+    "U1":       (gates.U1Gate, 0.0),
+    "U2":       (gates.U2Gate, 0.0),
+    "U3":       (gates.UGate, 0.0),
+    "PX":       (gates.RGate, 0.0),
+    "PHASEDX":  (gates.RGate, 0.0),
+    "CX":       (gates.CXGate, 0.0),
+    "CNOT":     (gates.CXGate, 0.0),
+    "FCX":      (gates.CXGate, 0.0),
+    "FCNOT":    (gates.CXGate, 0.0),
+    "CY":       (gates.CYGate, 0.0),
+    "FCY":      (gates.CYGate, 0.0),
+    "CZ":       (gates.CZGate, 0.0),
+    "FCZ":      (gates.CZGate, 0.0),
+    "CH":       (gates.CHGate, 0.0),
+    "FCH":      (gates.CHGate, 0.0),
+    "CU1":      (gates.CU1Gate, 0.0),
+    "SWAP":     (gates.SwapGate, 0.0),
+    "CRX":      (gates.CRXGate, 0.0),
+    "CRY":      (gates.CRYGate, 0.0),
+    "CRZ":      (gates.CRZGate, 0.0),
+    "ECR":      (gates.ECRGate, 0.0),
+    "ISWAPMAX": (gates.iSwapGate, 0.0),
+    "ZZPH":     (gates.RZZGate, 0.0),
+    "XXPH":     (gates.RXXGate, 0.0),
+    "YYPH":     (gates.RYYGate, 0.0),
+    "CCX":      (gates.CCXGate, 0.0),
+    "TOFFOLI":  (gates.CCXGate, 0.0),
+    "CSWAP":    (gates.CSwapGate, 0.0),
+    "FREDKIN":  (gates.CSwapGate, 0.0),
+    "R":        (Reset, 0.0),
+    "RESET":    (Reset, 0.0),
+}
+
+# Gates built here, for callers deciding which path a program can take.
+SUPPORTED_GATES = frozenset(_GATES) | {"M", "MEASURE", "BARRIER", "PHASE"}
+
+
+class _Builder(IRBuilder):
+    """Records qiskit operations."""
+
+    def operation(self, name: str, angles: tuple) -> tuple:
+        if name == "MEASURE":
+            return Measure(), 0.0
+        if name == "BARRIER":
+            return Barrier(angles[0]), 0.0
+        if name not in _GATES:
+            raise Unsupported(name)
+        cls, phase = _GATES[name]
+        return cls(*(angle * math.pi for angle in angles)), phase
+
+    def circuit(self) -> QuantumCircuit:
+        """The recorded operations as a QuantumCircuit laid out like tk_to_qiskit's."""
+        qubit_sizes: dict = {}
+        for qubit in sorted(self.qubits):
+            qubit_sizes[qubit.reg_name] = max(qubit_sizes.get(qubit.reg_name, 0), qubit.index[0] + 1)
+        bit_indices: dict = defaultdict(set)
+        for bit in self.bits:
+            bit_indices[bit.reg_name].add(bit.index[0])
+        if any(indices != set(range(len(indices))) for indices in bit_indices.values()):
+            raise Unsupported("bit registers not indexed from zero")
+
+        qregs = {name: QuantumRegister(size, name) for name, size in qubit_sizes.items()}
+        cregs = {name: ClassicalRegister(len(bit_indices[name]), name) for name in sorted(bit_indices)}
+        qc = QuantumCircuit(*qregs.values(), *cregs.values(), global_phase=self.phase * math.pi)
+        qubits = {qubit: qregs[qubit.reg_name][qubit.index[0]] for qubit in self.qubits}
+        bits = {bit: cregs[bit.reg_name][bit.index[0]] for bit in self.bits}
+        instructions = [
+            CircuitInstruction(op, tuple(map(qubits.__getitem__, qargs)), tuple(map(bits.__getitem__, cargs)))
+            for op, qargs, cargs in self.ops
+        ]
+        # _append is qiskit's documented unchecked fast path: operands are valid by construction.
+        list(map(qc._append, instructions))  # pylint: disable=protected-access
+        return qc
+
+
+def build(nodes: list) -> QuantumCircuit:
+    """The QuantumCircuit of the AST *nodes*; raise ``Unsupported`` if it needs the pytket path.
+
+    Errors the backend would raise surface as ValueError, TypeError or
+    KeyError without its messages: callers re-run the program through the
+    backend for those too.
+    """
+    return _Builder().walk(nodes).circuit()
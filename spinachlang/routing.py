@@ -0,0 +1,155 @@
+"""Placement and routing of compiled circuits onto fixed-topology devices.
+
+A device is described by its coupling map: the pairs of physical qubits
+that support a two-qubit gate.  Coupling map files are JSON, either a bare
+list of pairs or an object with a ``coupling_map`` key::
+
+    {"name": "line-5", "coupling_map": [[0, 1], [1, 2], [2, 3], [3, 4]]}
+
+``Router`` places the logical qubits of a circuit onto the device and
+inserts the SWAPs needed to satisfy connectivity (pytket's
+``DefaultMappingPass``).  Routed circuits are cached per (circuit structure
+hash, architecture hash), so routing the same program for the same device
+twice costs one hash.  ``route_batch`` compiles and routes many programs
+for one device in a process pool.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import pathlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Optional, Sequence, Union
+
+from pytket import Circuit
+from pytket.architecture import Architecture  # pylint: disable=no-name-in-module  # compiled extension
+from pytket.passes import DefaultMappingPass  # pylint: disable=no-name-in-module  # compiled extension
+
+from .tket_passes import CircuitCache, circuit_hash
+
+CouplingMap = Sequence[tuple[int, int]]
+
+# Routed circuits keyed by (input structure hash, architecture hash).
+_cache = CircuitCache()
+
+
+def load_coupling_map(path: Union[str, pathlib.Path]) -> list[tuple[int, int]]:
+    """Read a coupling map file; raise ValueError if it is malformed."""
+    try:
+        data = json.loads(pathlib.Path(path).read_text(encoding="utf-8"))
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"Coupling map {path} is not valid JSON: {exc}") from exc
+    if isinstance(data, dict):
+        data = data.get("coupling_map")
+    if not isinstance(data, list) or not data:
+        raise ValueError(f"Coupling map {path} must be a non-empty list of qubit pairs")
+    return _edges(data)
+
+
+def _edges(coupling_map: Iterable) -> list[tuple[int, int]]:
+    edges = []
+    for pair in coupling_map:
+        if (
+            not isinstance(pair, (list, tuple)) or len(pair) != 2
+            or not all(isinstance(q, int) and not isinstance(q, bool) and q >= 0 for q in pair)
+        ):
+            raise ValueError(f"Invalid coupling map entry {pair!r}: expected a pair of qubit indices")
+        if pair[0] == pair[1]:
+            raise ValueError(f"Invalid coupling map entry {list(pair)!r}: a qubit cannot couple to itself")
+        edges.append((pair[0], pair[1]))
+    return edges
+
+
+def architecture_hash(coupling_map: CouplingMap) -> str:
+    """Hash of a coupling map, independent of edge order and direction."""
+    canonical = sorted({tuple(sorted(edge)) for edge in coupling_map})
+    return hashlib.sha256(json.dumps(canonical).encode()).hexdigest()
+
+
+class Router:
+    """Place and route circuits onto one device, caching the results.
+
+    After each ``run``, ``cache_hit`` tells whether the routed circuit came
+    from the cache.
+
+    Example::
+
+        router = Router.from_file("device.json")
+        routed = router.run(Spinach.to_tket(code))
+    """
+
+    def __init__(self, coupling_map: CouplingMap, use_cache: bool = True):
+        self.coupling_map = _edges(coupling_map)
+        if not self.coupling_map:
+            raise ValueError("Coupling map must contain at least one qubit pair")
+        self.architecture = Architecture(self.coupling_map)
+        self.hash = architecture_hash(self.coupling_map)
+        self.use_cache = use_cache
+        self.cache_hit = False
+
+    @classmethod
+    def from_file(cls, path: Union[str, pathlib.Path], use_cache: bool = True) -> Router:
+        """Router for the coupling map stored in *path*."""
+        return cls(load_coupling_map(path), use_cache=use_cache)
+
+    def run(self, circuit: Circuit) -> Circuit:
+        """Return a placed and routed copy of *circuit*; *circuit* itself is not modified."""
+        n_nodes = len(self.architecture.nodes)
+        if circuit.n_qubits > n_nodes:
+            raise ValueError(
+                f"Circuit uses {circuit.n_qubits} qubits but the architecture only has {n_nodes}"
+            )
+        self.cache_hit = False
+        key = (circuit_hash(circuit), self.hash)
+        cached = _cache.get(key) if self.use_cache else None
+        if cached is not None:
+            self.cache_hit = True
+            return cached
+
+        routed = circuit.copy()
+        DefaultMappingPass(self.architecture).apply(routed)
+
+        if self.use_cache:
+            _cache.put(key, routed)
+        return routed
+
+    @staticmethod
+    def clear_cache() -> None:
+        """Forget every cached routed circuit."""
+        _cache.clear()
+
+
+def _route_one(code: str, coupling_map: list[tuple[int, int]], optimize: int, passes: tuple[str, ...]) -> Circuit:
+    """Worker: compile and route one program."""
+    from .spinach import Spinach  # pylint: disable=import-outside-toplevel
+
+    return Spinach.create_circuit(code, optimize=optimize, passes=passes, route=coupling_map)
+
+
+def route_batch(
+    codes: Iterable[str],
+    coupling_map: CouplingMap,
+    optimize: int = 0,
+    passes: Sequence[str] = (),
+    max_workers: Optional[int] = None,
+) -> list[Circuit]:
+    """Compile and route many programs for one device in a process pool.
+
+    Results are returned in the order of *codes*; identical programs are
+    compiled once.  Compilation errors propagate from the first failing
+    program.
+    """
+    edges = _edges(coupling_map)
+    codes = list(codes)
+    unique = list(dict.fromkeys(codes))
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        routed = dict(zip(unique, pool.map(
+            _route_one, unique,
+            [edges] * len(unique), [optimize] * len(unique), [tuple(passes)] * len(unique),
+        )))
+    out, seen = [], set()
+    for code in codes:
+        out.append(routed[code].copy() if code in seen else routed[code])
+        seen.add(code)
+    return out
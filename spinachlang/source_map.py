@@ -0,0 +1,73 @@
+"""Source maps: where each statement of a compiled program came from.
+
+A ``SourceMap`` passed to ``Spinach.create_circuit`` or ``Spinach.compile``
+makes the program be parsed with spans, and is filled with one entry per
+top-level statement: its offsets, line and column in the source, and the
+number of gates it added to the circuit (before pytket passes and
+routing).  The CLI writes it as JSON next to the output with
+``--source-map``.
+"""
+
+from __future__ import annotations
+
+import json
+from bisect import bisect_right
+from typing import NamedTuple, Optional
+
+
+class StatementMapping(NamedTuple):
+    """One top-level statement; lines and columns are 1-based, ``end`` is exclusive."""
+
+    statement: int
+    start: Optional[int]
+    end: Optional[int]
+    line: Optional[int]
+    column: Optional[int]
+    end_line: Optional[int]
+    end_column: Optional[int]
+    gates: int
+
+
+class LineIndex:  # pylint: disable=too-few-public-methods
+    """Converts character offsets of a source to lines and columns."""
+
+    def __init__(self, source: str):
+        self._starts = [0] + [i + 1 for i, char in enumerate(source) if char == "\n"]
+
+    def position(self, offset: int) -> tuple[int, int]:
+        """1-based ``(line, column)`` of *offset*."""
+        line = bisect_right(self._starts, offset)
+        return line, offset - self._starts[line - 1] + 1
+
+
+class SourceMap:
+    """Statement-level map from a Spinach source to the circuit compiled from it."""
+
+    VERSION = 1
+
+    def __init__(self):
+        self.statements: list[StatementMapping] = []
+
+    def record(self, source: Optional[str], records: list) -> None:
+        """Fill the map from the ``(span, gates)`` pairs recorded by ``Backend.compile_to_circuit``.
+
+        Without *source* (a binary AST), only offsets are known.
+        """
+        lines = LineIndex(source) if source is not None else None
+        self.statements = []
+        for statement, (span, gates) in enumerate(records):
+            start, end = span if span is not None else (None, None)
+            if lines is not None and span is not None:
+                (line, column), (end_line, end_column) = lines.position(start), lines.position(end)
+            else:
+                line = column = end_line = end_column = None
+            self.statements.append(
+                StatementMapping(statement, start, end, line, column, end_line, end_column, gates)
+            )
+
+    def to_json(self, **extra) -> str:
+        """The map as JSON; *extra* items (e.g. ``source``, ``output``) are added at the top level."""
+        return json.dumps(
+            {"version": self.VERSION, **extra, "statements": [entry._asdict() for entry in self.statements]},
+            indent=2,
+        )
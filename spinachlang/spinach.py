@@ -1,44 +1,166 @@
-"""The spinach language"""
+"""The spinach language
+
+Backend and AstBuilder pull in pytket, so they are imported inside the
+methods that need them: importing this module (and the package) stays cheap.
+"""
+
+from __future__ import annotations
+
+from os import PathLike
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, Sequence, Union
 
 from .parser import Parser
-from .backend import Backend
-from .ast_builder import AstBuilder
+
+if TYPE_CHECKING:
+    from .batch import BatchResult
+    from .optimizer import PeepholeOptimizer
+    from .program import SpinachProgram
+    from .routing import CouplingMap, Router
+    from .source_map import SourceMap
+    from .tket_passes import TketPassPipeline
 
 
 class Spinach:
-    """The spinach language"""
+    """The spinach language
+
+    Every entry point takes an ``optimize`` argument: an optimisation level
+    (0 = off, 1, 2; see ``spinachlang.optimizer``) or a ``PeepholeOptimizer``
+    instance, whose ``removed`` counter can be read after the call.
+
+    ``passes`` runs pytket passes over the compiled circuit before emission:
+    a list of pass names (see ``spinachlang.tket_passes``) or a
+    ``TketPassPipeline`` instance, whose ``timings`` and ``cache_hit`` can be
+    read after the call.
+
+    ``route`` places and routes the circuit onto a device after the passes:
+    a coupling map (list of physical qubit pairs) or a ``Router`` (see
+    ``spinachlang.routing``).
+
+    ``base_dir`` is the directory ``import "lib.sph"`` paths are relative
+    to (default: the current directory); see ``spinachlang.modules``.
+
+    ``code`` is Spinach source, or a binary AST returned by ``dump_ast``
+    (the contents of a ``.sphb`` file), which skips parsing altogether.
+
+    The program is validated before anything is compiled: every problem
+    the backend would raise on is reported at once in a
+    ``spinachlang.validation.ValidationError`` (a ValueError).  Other
+    compilation errors get the line and column of their source prepended
+    to their message.
+
+    ``source_map`` (``create_circuit`` and ``compile`` only) is a
+    ``spinachlang.source_map.SourceMap`` to fill with the position of every
+    statement and the gates it added; it makes the program be parsed with
+    spans, which is slower.
+
+    ``load`` parses and validates a program once and returns a
+    ``spinachlang.program.SpinachProgram``, which builds the circuit once
+    and memoizes every export of it.
+
+    ``acompile`` and ``ato_tket`` ... ``ato_qiskit`` are async versions of
+    the methods of the same name, run in a thread or process pool; see
+    ``spinachlang.aio``.
+    """
 
     @staticmethod
-    def create_circuit(code: str):
+    def create_circuit(code: Union[str, bytes],  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                       optimize: Union[int, PeepholeOptimizer] = 0,
+                       passes: Union[Sequence[str], TketPassPipeline, None] = None,
+                       route: Union[CouplingMap, Router, None] = None,
+                       base_dir: Union[str, PathLike, None] = None,
+                       source_map: Optional[SourceMap] = None):
         """generate a tket circuit from spinach code"""
-        built = AstBuilder().transform(Parser.get_tree(code))
-        return Backend.compile_to_circuit(built)
+        return Spinach.load(code, optimize, passes, route, base_dir, source_map).circuit
+
+    @staticmethod
+    def load(code: Union[str, bytes],  # pylint: disable=too-many-arguments,too-many-positional-arguments
+             optimize: Union[int, PeepholeOptimizer] = 0,
+             passes: Union[Sequence[str], TketPassPipeline, None] = None,
+             route: Union[CouplingMap, Router, None] = None,
+             base_dir: Union[str, PathLike, None] = None,
+             source_map: Optional[SourceMap] = None) -> SpinachProgram:
+        """Parse and validate *code* once, for exporting it to several formats.
+
+        The returned ``spinachlang.program.SpinachProgram`` builds the circuit
+        on first use and memoizes every export derived from it.
+        """
+        from .program import SpinachProgram  # pylint: disable=import-outside-toplevel
+
+        return SpinachProgram(code, optimize, passes, route, base_dir, source_map)
+
+    @staticmethod
+    def validate(code: Union[str, bytes], base_dir: Union[str, PathLike, None] = None) -> list:
+        """Return every problem that would stop *code* from compiling, without compiling it.
+
+        Each item is a ``spinachlang.validation.ValidationIssue`` carrying the
+        line and column of its statement (not for a binary AST); syntax errors
+        are still raised by the parser.
+        """
+        from .program import checked_ast  # pylint: disable=import-outside-toplevel
+
+        return checked_ast(code, base_dir)[1]
+
+    # ── Binary AST (.sphb) ─────────────────────────────────────────────────
+
+    @staticmethod
+    def dump_ast(code: str, base_dir: Union[str, PathLike, None] = None) -> bytes:
+        """Parse *code* and return its AST in the binary ``.sphb`` format.
+
+        Imports are resolved now, so the result does not depend on the
+        imported files any more.  See ``spinachlang.ast_binary``.
+        """
+        # pylint: disable=import-outside-toplevel
+        from .ast_binary import dump
+        from .ast_builder import AstBuilder
+
+        return dump(AstBuilder(base_dir).transform(Parser.get_tree(code)))
+
+    @staticmethod
+    def load_ast(data: bytes) -> list:
+        """Return the AST nodes stored by ``dump_ast``; raise ValueError on malformed data."""
+        from .ast_binary import load  # pylint: disable=import-outside-toplevel
+
+        return load(data)
 
     # ── String output (CLI / file) ─────────────────────────────────────────
 
     @staticmethod
-    def compile(code: str, language: str) -> str:
+    def compile(code: Union[str, bytes], language: str,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                optimize: Union[int, PeepholeOptimizer] = 0,
+                passes: Union[Sequence[str], TketPassPipeline, None] = None,
+                route: Union[CouplingMap, Router, None] = None,
+                base_dir: Union[str, PathLike, None] = None,
+                source_map: Optional[SourceMap] = None) -> str:
         """translate spinach code to other languages"""
-        dispatch = {
-            "qasm":   Backend.compile_to_openqasm,
-            "json":   Backend.compile_to_json,
-            "cirq":   Backend.compile_to_cirq_python,
-            "quil":   Backend.compile_to_quil,
-            "latex":  Backend.compile_to_latex,
-            "qir":    Backend.compile_to_qir,
-            "braket": Backend.compile_to_braket,
-        }
-        if language not in dispatch:
+        from .program import EMITTERS  # pylint: disable=import-outside-toplevel
+
+        if language not in EMITTERS:
             raise ValueError(
                 f"Unknown target language {language!r}. "
-                f"Valid options: {', '.join(sorted(dispatch))}"
+                f"Valid options: {', '.join(sorted(EMITTERS))}"
             )
-        return dispatch[language](Spinach.create_circuit(code=code))
+        return Spinach.load(code, optimize, passes, route, base_dir, source_map).compile(language)
+
+    @staticmethod
+    def compile_batch(sources: Iterable[Union[str, bytes]], language: str,
+                      workers: Optional[int] = None, chunksize: Optional[int] = None,
+                      **options) -> Iterator[BatchResult]:
+        """Compile many programs in a process pool, yielding one ``BatchResult`` each.
+
+        Errors are reported per program instead of stopping the batch; see
+        ``spinachlang.batch.compile_batch`` for *options* (``ordered``,
+        ``stats``, ...).
+        """
+        from .batch import compile_batch  # pylint: disable=import-outside-toplevel
+        return compile_batch(sources, language, workers, chunksize, **options)
 
     # ── Native object output (library / simulation) ────────────────────────
 
     @staticmethod
-    def to_tket(code: str):
+    def to_tket(code: Union[str, bytes], optimize: Union[int, PeepholeOptimizer] = 0,
+                passes: Union[Sequence[str], TketPassPipeline, None] = None,
+                route: Union[CouplingMap, Router, None] = None,
+                base_dir: Union[str, PathLike, None] = None):
         """Return a pytket Circuit from Spinach source.
 
         The pytket Circuit is the core IR from which all other objects are
@@ -56,15 +178,24 @@ class Spinach:
             handle = backend.process_circuit(circuit, n_shots=1000)
             counts = backend.get_result(handle).get_counts()
         """
-        return Spinach.create_circuit(code)
+        return Spinach.create_circuit(code, optimize, passes, route, base_dir)
 
     @staticmethod
-    def to_cirq(code: str):
+    def to_cirq(code: Union[str, bytes],  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                optimize: Union[int, PeepholeOptimizer] = 0,
+                passes: Union[Sequence[str], TketPassPipeline, None] = None,
+                route: Union[CouplingMap, Router, None] = None,
+                base_dir: Union[str, PathLike, None] = None,
+                direct: bool = True):
         """Return a cirq.Circuit from Spinach source.
 
         The returned object is a native cirq.Circuit, ready for simulation
         with cirq.Simulator() or cirq.DensityMatrixSimulator().
 
+        Without *passes* or *route*, the circuit is built directly from the
+        AST when every operation has a cirq gate, skipping the pytket
+        circuit; *direct=False* always converts with pytket-cirq.
+
         Requires pytket-cirq: pip install spinachlang
 
         Example::
@@ -76,17 +207,13 @@ class Spinach:
             result = cirq.Simulator().simulate(circuit)
             print(result.final_state_vector)
         """
-        try:
-            from pytket.extensions.cirq import tk_to_cirq  # pylint: disable=import-outside-toplevel
-        except ImportError as exc:
-            raise ImportError(
-                "cirq objects require pytket-cirq. "
-                "Install it with: pip install spinachlang"
-            ) from exc
-        return tk_to_cirq(Spinach.create_circuit(code))
+        return Spinach.load(code, optimize, passes, route, base_dir).to_cirq(direct)
 
     @staticmethod
-    def to_braket(code: str):
+    def to_braket(code: Union[str, bytes], optimize: Union[int, PeepholeOptimizer] = 0,
+                  passes: Union[Sequence[str], TketPassPipeline, None] = None,
+                  route: Union[CouplingMap, Router, None] = None,
+                  base_dir: Union[str, PathLike, None] = None):
         """Return a braket.circuits.circuit.Circuit from Spinach source.
 
         The returned object is a native Amazon Braket Circuit, ready to
@@ -103,17 +230,13 @@ class Spinach:
             result = LocalSimulator().run(circuit, shots=1000).result()
             print(result.measurement_counts)
         """
-        try:
-            from pytket.extensions.braket import tk_to_braket  # pylint: disable=import-outside-toplevel
-        except ImportError as exc:
-            raise ImportError(
-                "Braket objects require pytket-braket. "
-                "Install it with: pip install spinachlang"
-            ) from exc
-        return tk_to_braket(Spinach.create_circuit(code))[0]
+        return Spinach.load(code, optimize, passes, route, base_dir).to_braket()
 
     @staticmethod
-    def to_pyquil(code: str):
+    def to_pyquil(code: Union[str, bytes], optimize: Union[int, PeepholeOptimizer] = 0,
+                  passes: Union[Sequence[str], TketPassPipeline, None] = None,
+                  route: Union[CouplingMap, Router, None] = None,
+                  base_dir: Union[str, PathLike, None] = None):
         """Return a pyquil.Program from Spinach source.
 
         The returned object is a native PyQuil Program, ready to run on a
@@ -130,22 +253,24 @@ class Spinach:
             qc = get_qc("2q-qvm")
             result = qc.run(program).readout_data
         """
-        try:
-            from pytket.extensions.pyquil import tk_to_pyquil  # pylint: disable=import-outside-toplevel
-        except ImportError as exc:
-            raise ImportError(
-                "PyQuil objects require pytket-pyquil. "
-                "Install it with: pip install spinachlang"
-            ) from exc
-        return tk_to_pyquil(Spinach.create_circuit(code))
+        return Spinach.load(code, optimize, passes, route, base_dir).to_pyquil()
 
     @staticmethod
-    def to_qiskit(code: str):
+    def to_qiskit(code: Union[str, bytes],  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                  optimize: Union[int, PeepholeOptimizer] = 0,
+                  passes: Union[Sequence[str], TketPassPipeline, None] = None,
+                  route: Union[CouplingMap, Router, None] = None,
+                  base_dir: Union[str, PathLike, None] = None,
+                  direct: bool = True):
         """Return a qiskit.QuantumCircuit from Spinach source.
 
         The returned object is a native Qiskit QuantumCircuit, ready for
         simulation with Qiskit Aer or execution on IBM Quantum hardware.
 
+        Without *passes* or *route*, the circuit is built directly from the
+        AST when every operation has a qiskit gate, skipping the pytket
+        circuit; *direct=False* always converts with pytket-qiskit.
+
         Requires pytket-qiskit: pip install spinachlang
 
         Example::
@@ -158,11 +283,46 @@ class Spinach:
             result = AerSimulator().run(circuit, shots=1000).result()
             print(result.get_counts())
         """
-        try:
-            from pytket.extensions.qiskit import tk_to_qiskit  # pylint: disable=import-outside-toplevel
-        except ImportError as exc:
-            raise ImportError(
-                "Qiskit objects require pytket-qiskit. "
-                "Install it with: pip install spinachlang"
-            ) from exc
-        return tk_to_qiskit(Spinach.create_circuit(code))
+        return Spinach.load(code, optimize, passes, route, base_dir).to_qiskit(direct)
+
+    # ── Async (services / event loops) ─────────────────────────────────────
+    # Same arguments and results as the methods above, run in the executor
+    # configured with spinachlang.aio.configure (default: a thread pool) so
+    # the event loop stays free; see spinachlang.aio for concurrency and
+    # cancellation.
+
+    @staticmethod
+    async def acompile(*args, **kwargs) -> str:
+        """Async ``compile``."""
+        from .aio import run  # pylint: disable=import-outside-toplevel
+        return await run(Spinach.compile, *args, **kwargs)
+
+    @staticmethod
+    async def ato_tket(*args, **kwargs):
+        """Async ``to_tket``."""
+        from .aio import run  # pylint: disable=import-outside-toplevel
+        return await run(Spinach.to_tket, *args, **kwargs)
+
+    @staticmethod
+    async def ato_cirq(*args, **kwargs):
+        """Async ``to_cirq``."""
+        from .aio import run  # pylint: disable=import-outside-toplevel
+        return await run(Spinach.to_cirq, *args, **kwargs)
+
+    @staticmethod
+    async def ato_braket(*args, **kwargs):
+        """Async ``to_braket``."""
+        from .aio import run  # pylint: disable=import-outside-toplevel
+        return await run(Spinach.to_braket, *args, **kwargs)
+
+    @staticmethod
+    async def ato_pyquil(*args, **kwargs):
+        """Async ``to_pyquil``."""
+        from .aio import run  # pylint: disable=import-outside-toplevel
+        return await run(Spinach.to_pyquil, *args, **kwargs)
+
+    @staticmethod
+    async def ato_qiskit(*args, **kwargs):
+        """Async ``to_qiskit``."""
+        from .aio import run  # pylint: disable=import-outside-toplevel
+        return await run(Spinach.to_qiskit, *args, **kwargs)
@@ -1,11 +1,32 @@
 """ "types used to describe the language structure"""
 
-from typing import List, Optional, Union
+from typing import List, Optional, Tuple, Union
 from pydantic import BaseModel, Field
 from pytket import Qubit, Bit
 
+# (start, end) character offsets of a node in its source, end exclusive.
+Span = Tuple[int, int]
 
-class QubitDeclaration(BaseModel):
+
+class Node(BaseModel):
+    """Base of the AST node types.
+
+    ``span`` is only filled in when the AST is built with spans enabled
+    (see ``AstBuilder``).  It is not part of a node's value: it is left out
+    of comparisons and of ``model_dump``, so the same program parsed with
+    and without spans gives equal ASTs.
+    """
+
+    span: Optional[Span] = Field(default=None, exclude=True, repr=False)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        theirs = other.__dict__
+        return all(value == theirs[name] for name, value in self.__dict__.items() if name != "span")
+
+
+class QubitDeclaration(Node):
     """Association of a qubit number to a name"""
 
     name: str
@@ -18,7 +39,7 @@ class QubitDeclaration(BaseModel):
         arbitrary_types_allowed = True
 
 
-class BitDeclaration(BaseModel):
+class BitDeclaration(Node):
     """Association of a qubit number to a name"""
 
     name: str
@@ -31,49 +52,105 @@ class BitDeclaration(BaseModel):
         arbitrary_types_allowed = True
 
 
-class ListDeclaration(BaseModel):
-    """Association of a list to a name"""
+class RegisterDeclaration(Node):
+    """Association of a contiguous range of qubits to a name.
+
+    Only the bounds are stored; the qubits are produced when a target is
+    resolved, so a 1000-qubit register costs one node and one index entry.
+    """
+
+    name: str
+    register_name: str = "q"
+    start: int
+    stop: int  # inclusive
+
+    @property
+    def size(self) -> int:
+        """Number of qubits in the register"""
+        return self.stop - self.start + 1
+
+    def qubits(self, first: int = 0, last: Optional[int] = None) -> List[Qubit]:
+        """Qubits first..last (inclusive, relative to the register start)"""
+        last = self.size - 1 if last is None else last
+        if not 0 <= first <= last < self.size:
+            raise ValueError(
+                f"Range [{first}..{last}] is out of bounds for register {self.name!r} "
+                f"of size {self.size}"
+            )
+        return [Qubit(self.register_name, i) for i in range(self.start + first, self.start + last + 1)]
+
+
+class LoopExpr(Node):
+    """An expression over loop variables, evaluated when the loop is expanded.
+
+    ``op`` is ``var`` (``args`` holds the variable name) or one of ``add``,
+    ``sub``, ``mul``, ``div``, ``neg``.  Parts that do not depend on a loop
+    variable are folded by the AST builder, so ``args`` only holds numbers,
+    variable names and nested expressions.
+    """
+
+    op: str
+    args: List[Union[int, float, str, "LoopExpr"]]
+
+
+class RegisterSlice(Node):
+    """A contiguous slice of a register used as a target: ``data[10..20]``"""
+
+    name: str
+    start: Union[int, LoopExpr]
+    stop: Union[int, LoopExpr]  # inclusive
+
+
+class ListDeclaration(Node):
+    """Association of a list of targets (names, qubit indices, slices) to a name"""
+
+    name: str
+    items: List[Union[str, int, RegisterSlice]]
+
+
+class ConstantDeclaration(Node):
+    """Association of a folded angle expression to a name"""
 
     name: str
-    items: List[str]
+    value: Union[int, float]
 
 
-class GatePipeByName(BaseModel):
+class GatePipeByName(Node):
     """Call of a pipeline using its name"""
 
     name: str
     rev: bool
 
 
-class GateCall(BaseModel):
+class GateCall(Node):
     """Call of a gate with it's arguments"""
 
     name: str
-    args: List[Union[str, int, float]] = Field(default_factory=list)
+    args: List[Union[str, int, float, RegisterSlice, LoopExpr]] = Field(default_factory=list)
 
 
-class GatePipeline(BaseModel):
+class GatePipeline(Node):
     """The representation of a pipeline"""
 
     parts: List[Union[GateCall, GatePipeByName]]
 
 
-class InstructionDeclaration(BaseModel):
+class InstructionDeclaration(Node):
     """Association of a gate pipe to a name"""
 
     name: str
     pipeline: GatePipeline
 
 
-class Action(BaseModel):
+class Action(Node):
     """Execution of a gatepipe on a qubit"""
 
-    target: Union[str, int, list]
+    target: Union[str, int, RegisterSlice, LoopExpr, list]
     count: Optional[int] = None
     instruction: Union[GatePipeline, str]
 
 
-class ConditionalAction(BaseModel):
+class ConditionalAction(Node):
     """A quantum gate pipeline applied conditionally on a classical bit.
 
     Maps to TKET's Conditional optype:
@@ -81,7 +158,47 @@ class ConditionalAction(BaseModel):
       else_pipeline fires when condition_bit == 0 (omit for if-only form)
     """
 
-    target: Union[str, int, list]
+    target: Union[str, int, RegisterSlice, LoopExpr, list]
     condition_bit: str  # name that resolves to a BitDeclaration in the index
     if_pipeline: GatePipeline
     else_pipeline: Optional[GatePipeline] = None
+
+
+class ForLoop(Node):
+    """A bounded loop ``for var in start..stop: body`` (bounds inclusive).
+
+    The body is kept as a single node and only expanded by the backend,
+    once per value of the loop variable.
+    """
+
+    var: str
+    start: Union[int, LoopExpr]
+    stop: Union[int, LoopExpr]
+    body: Union[Action, ConditionalAction, "ForLoop"]
+
+
+class ModuleImport(Node):
+    """``import "lib.sph"``: the declarations of a module, resolved when the AST is built"""
+
+    path: str  # resolved path of the module
+    declarations: List[
+        Union[
+            QubitDeclaration,
+            RegisterDeclaration,
+            BitDeclaration,
+            ListDeclaration,
+            InstructionDeclaration,
+            ConstantDeclaration,
+        ]
+    ]
+
+
+# Node types a module may export.
+DECLARATION_TYPES = (
+    QubitDeclaration,
+    RegisterDeclaration,
+    BitDeclaration,
+    ListDeclaration,
+    InstructionDeclaration,
+    ConstantDeclaration,
+)
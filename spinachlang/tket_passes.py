@@ -0,0 +1,166 @@
+"""pytket optimisation / rebase passes run on the compiled circuit.
+
+A ``TketPassPipeline`` applies a sequence of named pytket passes to the
+circuit built by ``Backend.compile_to_circuit``, records how long each pass
+took, and caches the result keyed by a hash of the input circuit's
+structure and the pass list, so submitting the same program again skips
+optimisation entirely.
+
+Pass names
+----------
+FullPeepholeOptimise, PeepholeOptimise2Q, RemoveRedundancies, CliffordSimp,
+SynthesiseTket, KAKDecomposition, CommuteThroughMultis, DecomposeBoxes, and
+``rebase:<gateset>`` with gateset one of ``ibm`` (CX, Rz, SX, X),
+``cz`` (CZ, Rz, Rx) or ``tk`` (CX, TK1).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Sequence
+
+from pytket import Circuit, OpType
+from pytket.passes import (  # pylint: disable=no-name-in-module  # compiled extension
+    AutoRebase,
+    BasePass,
+    CliffordSimp,
+    CommuteThroughMultis,
+    DecomposeBoxes,
+    FullPeepholeOptimise,
+    KAKDecomposition,
+    PeepholeOptimise2Q,
+    RemoveRedundancies,
+    SynthesiseTket,
+)
+
+_PASSES: dict[str, Callable[[], BasePass]] = {
+    "FullPeepholeOptimise": FullPeepholeOptimise,
+    "PeepholeOptimise2Q":   PeepholeOptimise2Q,
+    "RemoveRedundancies":   RemoveRedundancies,
+    "CliffordSimp":         CliffordSimp,
+    "SynthesiseTket":       SynthesiseTket,
+    "KAKDecomposition":     KAKDecomposition,
+    "CommuteThroughMultis": CommuteThroughMultis,
+    "DecomposeBoxes":       DecomposeBoxes,
+}
+
+GATESETS: dict[str, frozenset] = {
+    "ibm": frozenset({OpType.CX, OpType.Rz, OpType.SX, OpType.X}),
+    "cz":  frozenset({OpType.CZ, OpType.Rz, OpType.Rx}),
+    "tk":  frozenset({OpType.CX, OpType.TK1}),
+}
+
+REBASE_PREFIX = "rebase:"
+
+
+class CircuitCache:
+    """Thread-safe bounded LRU of circuits; stores and returns copies."""
+
+    def __init__(self, size: int = 128):
+        self.size = size
+        self._items: OrderedDict[Hashable, Circuit] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Circuit]:
+        """A copy of the circuit cached under *key*, or None."""
+        with self._lock:
+            circuit = self._items.get(key)
+            if circuit is None:
+                return None
+            self._items.move_to_end(key)
+        return circuit.copy()
+
+    def put(self, key: Hashable, circuit: Circuit) -> None:
+        """Cache a copy of *circuit* under *key*, evicting the least recently used."""
+        with self._lock:
+            self._items[key] = circuit.copy()
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forget every cached circuit."""
+        with self._lock:
+            self._items.clear()
+
+
+# Optimised circuits keyed by (input structure hash, pass names).
+_cache = CircuitCache()
+
+
+def available_passes() -> list[str]:
+    """Every accepted pass name, rebases included."""
+    return sorted(_PASSES) + [f"{REBASE_PREFIX}{name}" for name in sorted(GATESETS)]
+
+
+def circuit_hash(circuit: Circuit) -> str:
+    """Hash of the circuit's structure (units, commands, phase)."""
+    payload = json.dumps(circuit.to_dict(), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _make_pass(name: str) -> BasePass:
+    if name.startswith(REBASE_PREFIX):
+        gateset = GATESETS.get(name[len(REBASE_PREFIX):])
+        if gateset is None:
+            raise ValueError(
+                f"Unknown rebase target {name!r}. "
+                f"Valid options: {', '.join(REBASE_PREFIX + g for g in sorted(GATESETS))}"
+            )
+        return AutoRebase(set(gateset))
+    factory = _PASSES.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown pytket pass {name!r}. Valid options: {', '.join(available_passes())}")
+    return factory()
+
+
+class TketPassPipeline:
+    """Run named pytket passes over circuits, with per-pass timing and a result cache.
+
+    After each ``run``, ``timings`` maps every pass name to its duration in
+    milliseconds (empty when the result came from the cache) and
+    ``cache_hit`` tells whether it did.
+
+    Example::
+
+        pipeline = TketPassPipeline(["FullPeepholeOptimise", "rebase:ibm"])
+        optimised = pipeline.run(Spinach.create_circuit(code))
+        print(pipeline.timings)
+    """
+
+    def __init__(self, names: Sequence[str], use_cache: bool = True):
+        self.names = tuple(names)
+        self._passes = [_make_pass(name) for name in self.names]  # validates names up front
+        self.use_cache = use_cache
+        self.timings: dict[str, float] = {}
+        self.cache_hit = False
+
+    def run(self, circuit: Circuit) -> Circuit:
+        """Return an optimised copy of *circuit*; *circuit* itself is not modified."""
+        self.timings = {}
+        self.cache_hit = False
+        if not self.names:
+            return circuit
+        key = (circuit_hash(circuit), self.names)
+        cached = _cache.get(key) if self.use_cache else None
+        if cached is not None:
+            self.cache_hit = True
+            return cached
+
+        result = circuit.copy()
+        for name, compiler_pass in zip(self.names, self._passes):
+            start = time.perf_counter()
+            compiler_pass.apply(result)
+            self.timings[name] = (time.perf_counter() - start) * 1000
+
+        if self.use_cache:
+            _cache.put(key, result)
+        return result
+
+    @staticmethod
+    def clear_cache() -> None:
+        """Forget every cached result."""
+        _cache.clear()
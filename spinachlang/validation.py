@@ -0,0 +1,314 @@
+"""Validation of a program before it is compiled.
+
+``validate`` walks the AST the way ``Backend.compile_to_circuit`` does —
+same declaration order, same name resolution, same named-pipeline
+expansion — but only checks what the backend would raise on: unknown
+gates, undefined names, conditions that are not bits, wrong argument
+counts.  It never builds a circuit, expands a register or repeats an
+action, so a broken program is rejected in milliseconds instead of after
+its valid prefix has been emitted, and every error is reported at once.
+"""
+
+from __future__ import annotations
+
+from functools import partial
+from typing import NamedTuple, Optional
+
+from lark import Token, Tree
+from pytket import Bit, Qubit
+
+from .analysis import GATE_QUBIT_ARGS
+from .backend import Backend
+from .spinach_types import (
+    Action,
+    BitDeclaration,
+    ConditionalAction,
+    ForLoop,
+    GateCall,
+    GatePipeByName,
+    GatePipeline,
+    InstructionDeclaration,
+    ListDeclaration,
+    LoopExpr,
+    ModuleImport,
+    QubitDeclaration,
+    RegisterDeclaration,
+    RegisterSlice,
+    DECLARATION_TYPES,
+)
+
+# Gate / operation name -> (minimum, maximum or None) number of arguments the
+# backend accepts.  Gates taking qubit operands need at least up to the last one.
+GATE_ARITY: dict[str, tuple[int, Optional[int]]] = {
+    **{name: (max(positions) + 1, None) for name, positions in GATE_QUBIT_ARGS.items()},
+    "RX": (1, None), "RY": (1, None), "RZ": (1, None),
+    "PX": (2, None), "PHASEDX": (2, None),
+    "U1": (1, 1), "U2": (2, 2), "U3": (3, 3), "TK1": (3, 3),
+    "PHASE": (1, None), "CIRCBOX": (1, None),
+    "NOT": (0, 1), "SET": (1, 1), "AND": (2, 2), "OR": (2, 2), "XOR": (2, 2), "COPY": (1, 1),
+}
+
+# Operations whose arguments must all be classical bits.
+_BIT_ARGS = frozenset({"NOT", "AND", "OR", "XOR", "COPY"})
+# Group operations the backend rejects inside an if / else branch.
+_UNCONDITIONAL = frozenset({"BARRIER", "PHASE", "CIRCBOX"})
+
+
+class ValidationIssue(NamedTuple):
+    """One problem found in a program.
+
+    ``statement`` is the position of the offending top-level node;
+    ``line`` and ``column`` (1-based) locate it in the source when known.
+    """
+
+    statement: int
+    message: str
+    line: Optional[int] = None
+    column: Optional[int] = None
+
+    def __str__(self) -> str:
+        where = f"statement {self.statement + 1}" if self.line is None else f"line {self.line}:{self.column}"
+        return f"{where}: {self.message}"
+
+
+class ValidationError(ValueError):
+    """A program failed validation; ``issues`` lists every problem found."""
+
+    def __init__(self, issues: list[ValidationIssue]):
+        self.issues = issues
+        super().__init__("\n".join(map(str, issues)))
+
+
+def statement_positions(tree: Tree, source: str) -> list[tuple[int, int]]:
+    """``(line, column)`` of each statement of the parse tree of *source*, in AST node order.
+
+    Keywords are filtered out of the tree, so a statement's line comes from
+    its first remaining token and its column from the first character of
+    that line: statements start their line.
+    """
+    lines = source.split("\n")
+    positions = []
+    for statement in tree.children:
+        pending = [statement]
+        while pending:
+            item = pending.pop(0)
+            if isinstance(item, Token):
+                text = lines[item.line - 1]
+                positions.append((item.line, len(text) - len(text.lstrip()) + 1))
+                break
+            if isinstance(item, Tree):
+                pending[:0] = item.children
+        else:
+            positions.append((None, None))
+    return positions
+
+
+def locate(issues: list[ValidationIssue], tree: Tree, source: str) -> list[ValidationIssue]:
+    """*issues* with the line and column of their statement in *tree*, the parse tree of *source*."""
+    positions = statement_positions(tree, source)
+    return [
+        issue._replace(line=positions[issue.statement][0], column=positions[issue.statement][1])
+        if issue.statement < len(positions) else issue
+        for issue in issues
+    ]
+
+
+class _Validator:
+    """Walks the nodes in order, keeping the backend's view of every name."""
+
+    def __init__(self):
+        # name -> Qubit, Bit, RegisterDeclaration, GatePipeline, or the
+        # frozenset of unit types (Qubit / Bit) a named list resolves to
+        self.index: dict = {}
+        # (id(pipeline), target types, conditional) -> (pipeline, messages)
+        self.memo: dict = {}
+        # Whether an action has added a qubit yet: until then '*' is empty
+        self.qubits = False
+
+    # ── Declarations ──────────────────────────────────────────────────────
+
+    def declare(self, node, report) -> None:
+        """Bind a declaration's name like the backend does."""
+        if node.name in self.index:
+            self.memo.clear()  # a named pipeline may have resolved the old value
+        match node:
+            case QubitDeclaration(name=name, qubit=qubit):
+                self.index[name] = qubit
+            case BitDeclaration(name=name, bit=bit):
+                self.index[name] = bit
+            case RegisterDeclaration(name=name):
+                self.index[name] = node
+            case ListDeclaration(name=name, items=items):
+                self.index[name] = frozenset(self.target_types(items, report))
+            case InstructionDeclaration(name=name, pipeline=pipeline):
+                self.index[name] = pipeline
+
+    # ── Targets ───────────────────────────────────────────────────────────
+
+    def register(self, ref: RegisterSlice, report) -> bool:
+        """Check a register slice; True when it names a register and is in bounds."""
+        register = self.index.get(ref.name)
+        if not isinstance(register, RegisterDeclaration):
+            report(f"'{ref.name}' is not a register; declare it as '{ref.name} : q[start..stop]'")
+            return False
+        bounds = (ref.start, ref.stop)
+        if not any(isinstance(bound, LoopExpr) for bound in bounds) and not 0 <= ref.start <= ref.stop < register.size:
+            report(
+                f"Range [{ref.start}..{ref.stop}] is out of bounds for register {ref.name!r} "
+                f"of size {register.size}"
+            )
+            return False
+        return True
+
+    def target_types(self, raw, report) -> set:
+        """The unit types (Qubit and/or Bit) an action target resolves to."""
+        if isinstance(raw, str) and raw == "*":
+            return {Qubit} if self.qubits else set()
+        types: set = set()
+        for item in raw if isinstance(raw, list) else [raw]:
+            match item:
+                case Qubit() | int() | LoopExpr():
+                    types.add(Qubit)
+                case Bit():
+                    types.add(Bit)
+                case RegisterSlice():
+                    self.register(item, report)
+                    types.add(Qubit)
+                case str() if item not in self.index:
+                    report(f"Undefined name {item!r}")
+                case str():
+                    value = self.index[item]
+                    if isinstance(value, frozenset):
+                        types |= value
+                    elif isinstance(value, RegisterDeclaration):
+                        types.add(Qubit)
+                    elif isinstance(value, (Qubit, Bit)):
+                        types.add(type(value))
+        return types
+
+    # ── Pipelines ─────────────────────────────────────────────────────────
+
+    def pipeline(self, pipeline: GatePipeline, types: frozenset, conditional: bool,
+                 seen: tuple[str, ...] = ()) -> list[str]:
+        """Messages for running *pipeline* on targets of *types*."""
+        messages = []
+        for part in pipeline.parts:
+            if isinstance(part, GatePipeByName):
+                messages += self.named(part.name, types, conditional, seen)
+            else:
+                messages += self.gate(part, types, conditional)
+        return messages
+
+    def named(self, name: str, types: frozenset, conditional: bool, seen: tuple[str, ...]) -> list[str]:
+        """Messages for a call of the named pipeline *name*, checked once per shape."""
+        if name not in self.index:
+            return [f"Undefined instruction {name!r}"]
+        if name in seen:
+            return [f"Instruction {name!r} calls itself"]
+        sub = self.index[name]
+        if not isinstance(sub, GatePipeline):
+            return [f"{name!r} is not an instruction (got {type(sub).__name__})"]
+        key = (id(sub), types, conditional)
+        entry = self.memo.get(key)
+        if entry is None or entry[0] is not sub:
+            inner = self.pipeline(sub, types, conditional, seen + (name,))
+            entry = self.memo[key] = (sub, [f"in instruction {name!r}: {message}" for message in inner])
+        return entry[1]
+
+    def gate(self, part: GateCall, types: frozenset, conditional: bool) -> list[str]:
+        """Messages for one gate call."""
+        name, messages = part.name, []
+        if Qubit in types and name not in Backend.QUBIT_GATES:
+            messages.append(f"Unknown qubit gate {name!r}")
+        if Bit in types and name not in Backend.BIT_OPERATIONS:
+            messages.append(f"Unknown classical bit operation {name!r}")
+        if conditional and name in _UNCONDITIONAL:
+            messages.append(f"{name} cannot be used inside a conditional branch")
+
+        # Arguments are resolved whatever the targets, so undefined names always fail.
+        args = []
+        for arg in part.args:
+            if isinstance(arg, str) and arg not in self.index:
+                messages.append(f"Undefined name {arg!r} in {name}")
+            elif isinstance(arg, RegisterSlice):
+                if self.register(arg, messages.append) and arg.start != arg.stop:
+                    messages.append(f"Gate argument {arg.name}[{arg.start}..{arg.stop}] must be a single qubit")
+            args.append(self.index.get(arg) if isinstance(arg, str) else arg)
+        if not types or messages:
+            return messages
+
+        low, high = GATE_ARITY.get(name, (0, None))
+        if len(args) < low or (high is not None and len(args) > high):
+            expected = low if low == high else f"at least {low}" if high is None else f"{low} to {high}"
+            messages.append(f"{name} takes {expected} argument(s), got {len(args)}")
+        elif Bit in types and name in _BIT_ARGS and not all(isinstance(arg, Bit) for arg in args):
+            messages.append(f"{name} arguments must be classical bits")
+        elif Bit in types and name == "SET" and args[0] not in (0, 1):
+            messages.append(f"SET argument must be 0 or 1, got {args[0]!r}")
+        elif name == "CIRCBOX" and Qubit in types and not isinstance(args[0], GatePipeline):
+            messages.append("CIRCBOX argument must resolve to a named instruction pipeline")
+        return messages
+
+    # ── Statements ────────────────────────────────────────────────────────
+
+    def action(self, node: Action, report) -> None:
+        """Check an unconditional action."""
+        types = frozenset(self.target_types(node.target, report))
+        self.qubits = self.qubits or Qubit in types
+        instruction = node.instruction
+        if isinstance(instruction, str):
+            list(map(report, self.named(instruction, types, False, ())))
+        else:
+            list(map(report, self.pipeline(instruction, types, False)))
+
+    def conditional(self, node: ConditionalAction, report) -> None:
+        """Check a classically conditioned action."""
+        condition = self.index.get(node.condition_bit)
+        if condition is None:
+            report(f"Unknown classical bit '{node.condition_bit}' used as condition")
+        elif not isinstance(condition, Bit):
+            report(f"'{node.condition_bit}' is not a classical Bit (got {type(condition).__name__})")
+        types = self.target_types(node.target, report)
+        if Bit in types:
+            report("Conditional action targets must be qubits")
+        self.qubits = self.qubits or Qubit in types
+        # Both branches are planned for qubit targets, even when there are none.
+        for pipeline in (node.if_pipeline, node.else_pipeline):
+            if pipeline is not None:
+                list(map(report, self.pipeline(pipeline, frozenset({Qubit}), True)))
+
+    def statement(self, node, report) -> None:
+        """Check one node."""
+        match node:
+            case Action():
+                self.action(node, report)
+            case ConditionalAction():
+                self.conditional(node, report)
+            case ForLoop(body=body):
+                # Names resolve the same way in every iteration: check the body once.
+                self.statement(body, report)
+            case ModuleImport(declarations=declarations):
+                for declaration in declarations:
+                    self.statement(declaration, report)
+            case _ if isinstance(node, DECLARATION_TYPES):
+                self.declare(node, report)
+
+
+def _report(issues: list, position: int, seen: set, message: str) -> None:
+    """Record *message* for the node at *position*, once per node."""
+    if message not in seen:
+        seen.add(message)
+        issues.append(ValidationIssue(position, message))
+
+
+def validate(nodes: list) -> list[ValidationIssue]:
+    """Every issue ``Backend.compile_to_circuit`` would raise on for the AST *nodes*.
+
+    Issues are reported in program order and carry the position of their
+    top-level node; use ``locate`` to add source lines.
+    """
+    validator = _Validator()
+    issues: list[ValidationIssue] = []
+    for position, node in enumerate(nodes):
+        validator.statement(node, partial(_report, issues, position, set()))
+    return issues
@@ -0,0 +1,125 @@
+"""Tests for the async entry points and their executor."""
+
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import CancelledError
+from unittest import mock
+
+from spinachlang import aio, cirq_builder, qiskit_builder
+from spinachlang.ast_builder import AstBuilder
+from spinachlang.backend import Backend, cancellation
+from spinachlang.ir_builder import IRBuilder
+from spinachlang.parser import Parser
+from spinachlang.spinach import Spinach
+
+CODE = "a : q 0\nb : q 1\na -> H | CX(b)\nfor i in 0..3: b -> RZ(pi / 4)\n"
+
+
+class TestAsyncApi(unittest.TestCase):
+    """Async methods return what the synchronous ones do, off the event loop."""
+
+    def tearDown(self):
+        aio.configure()
+        aio.shutdown()
+
+    def test_acompile_matches_compile(self):
+        self.assertEqual(asyncio.run(Spinach.acompile(CODE, "qasm")), Spinach.compile(CODE, "qasm"))
+
+    def test_process_pool(self):
+        aio.configure("process", max_concurrency=2)
+        self.assertEqual(asyncio.run(Spinach.ato_tket(CODE, optimize=1)), Spinach.to_tket(CODE, optimize=1))
+
+    def test_errors_propagate(self):
+        with self.assertRaises(ValueError):
+            asyncio.run(Spinach.acompile(CODE, "nope"))
+
+    def test_unknown_executor(self):
+        with self.assertRaises(ValueError):
+            aio.configure("fibers")
+
+
+class TestConcurrency(unittest.TestCase):
+    """At most max_concurrency calls run; cancelled calls stop or never start."""
+
+    def tearDown(self):
+        aio.configure()
+        aio.shutdown()
+
+    def test_bounded(self):
+        aio.configure("thread", max_concurrency=2)
+        lock, running, peak = threading.Lock(), [0], [0]
+
+        def compile_(*_args, **_kwargs):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return "ok"
+
+        async def burst():
+            return await asyncio.gather(*(Spinach.acompile(CODE, "qasm") for _ in range(8)))
+
+        with mock.patch.object(Spinach, "compile", side_effect=compile_):
+            self.assertEqual(asyncio.run(burst()), ["ok"] * 8)
+        self.assertEqual(peak[0], 2)
+
+    def test_cancelled_while_queued_never_runs(self):
+        aio.configure("thread", max_concurrency=1)
+        release, calls = threading.Event(), []
+
+        def compile_(code, *_args, **_kwargs):
+            calls.append(code)
+            release.wait(5)
+            return code
+
+        async def scenario():
+            first = asyncio.create_task(Spinach.acompile("first", "qasm"))
+            second = asyncio.create_task(Spinach.acompile("second", "qasm"))
+            await asyncio.sleep(0.05)
+            second.cancel()
+            release.set()
+            with self.assertRaises(asyncio.CancelledError):
+                await second
+            return await first
+
+        with mock.patch.object(Spinach, "compile", side_effect=compile_):
+            self.assertEqual(asyncio.run(scenario()), "first")
+        self.assertEqual(calls, ["first"])
+
+    def test_backend_stops_once_cancelled(self):
+        event = threading.Event()
+        event.set()
+        token = cancellation.set(event)
+        try:
+            with self.assertRaises(CancelledError):
+                Spinach.create_circuit(CODE)
+        finally:
+            cancellation.reset(token)
+        self.assertEqual(Backend.compile_to_circuit([]).n_gates, 0)
+
+    def test_direct_builders_stop_once_cancelled(self):
+        nodes = AstBuilder().transform(Parser.get_tree("b : q 0\nfor i in 0..3: b -> RZ(pi / 4)\n"))
+        for build in (qiskit_builder.build, cirq_builder.operations):
+            event = threading.Event()
+            actions = []
+
+            def action(builder, node, record=IRBuilder.action, event=event):
+                actions.append(node)
+                event.set()  # cancelled while the loop runs
+                record(builder, node)
+
+            token = cancellation.set(event)
+            try:
+                with mock.patch.object(IRBuilder, "action", action), self.assertRaises(CancelledError, msg=build):
+                    build(nodes)
+            finally:
+                cancellation.reset(token)
+            self.assertEqual(len(actions), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
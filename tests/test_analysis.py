@@ -0,0 +1,89 @@
+"""Tests for the static circuit metrics analysis.
+
+The analysis must agree with the pytket Circuit that the backend actually
+builds for the same source, without building it.
+"""
+
+import unittest
+
+from spinachlang.analysis import CircuitMetrics, MetricsAnalyzer
+from spinachlang.ast_builder import AstBuilder
+from spinachlang.parser import Parser
+from spinachlang.spinach import Spinach
+
+
+def _nodes(code: str) -> list:
+    return AstBuilder().transform(Parser.get_tree(code))
+
+
+class TestProgramMetrics(unittest.TestCase):
+    """Whole-program metrics match the compiled pytket circuit."""
+
+    def _assert_matches_circuit(self, code: str):
+        total, _ = MetricsAnalyzer().analyse(_nodes(code))
+        circuit = Spinach.create_circuit(code)
+        self.assertEqual(
+            total,
+            CircuitMetrics(
+                qubits=circuit.n_qubits,
+                gates=circuit.n_gates,
+                two_qubit_gates=circuit.n_2qb_gates(),
+                depth=circuit.depth(),
+            ),
+        )
+
+    def test_bell(self):
+        self._assert_matches_circuit("q0 : q 0\nq1 : q 1\nq0 -> H | CX(q1)\n* -> M\n")
+
+    def test_named_and_reversed_pipelines(self):
+        self._assert_matches_circuit(
+            "a : q 0\nb : q 1\nbell : H | CX(b) | T\n"
+            "a -> bell\n2 -> bell <-\n[a, b] -> 3 X | CZ(2)\n"
+        )
+
+    def test_barrier_aligns_depth(self):
+        self._assert_matches_circuit("0 -> H | H | H\n1 -> X\n[0, 1] -> BARRIER\n1 -> X\n")
+
+    def test_conditional(self):
+        self._assert_matches_circuit("q0 : q 0\nflag : b 0\nq0 -> M(flag)\nq0 -> X if flag else Z\n")
+
+    def test_three_qubit_gate(self):
+        self._assert_matches_circuit("2 -> CCX(0, 1) | CSWAP(0, 1)\n")
+
+    def test_large_repeat_is_extrapolated(self):
+        """Huge repetition counts are not simulated one by one."""
+        total, _ = MetricsAnalyzer().analyse(_nodes("[0, 1] -> 1000000 H | CX(2)\n"))
+        self.assertEqual(total.gates, 4_000_000)
+        self.assertEqual(total.two_qubit_gates, 2_000_000)
+        self.assertEqual(total.qubits, 3)
+
+
+class TestInstructionMetrics(unittest.TestCase):
+    """Per-instruction metrics and their memoisation."""
+
+    def test_instruction_applied_to_one_qubit(self):
+        _, instructions = MetricsAnalyzer().analyse(_nodes("q1 : q 1\nbell : H | CX(q1)\n"))
+        self.assertEqual(instructions, {1: CircuitMetrics(2, 2, 1, 2)})
+
+    def test_memoised_across_analyses(self):
+        analyzer = MetricsAnalyzer()
+        first = analyzer.analyse(_nodes("bell : H | CX(1)\n0 -> bell\n"))[1][0]
+        second = analyzer.analyse(_nodes("bell : H | CX(1)\n0 -> 2 bell\n"))[1][0]
+        self.assertIs(first, second)
+
+    def test_dependency_change_invalidates(self):
+        """Editing a referenced instruction changes the dependent's metrics."""
+        analyzer = MetricsAnalyzer()
+        before = analyzer.analyse(_nodes("prep : H\nbell : prep | CX(1)\n"))[1][1]
+        after = analyzer.analyse(_nodes("prep : H | H\nbell : prep | CX(1)\n"))[1][1]
+        self.assertEqual(before.gates + 1, after.gates)
+
+    def test_label(self):
+        self.assertEqual(
+            CircuitMetrics(1, 2, 0, 2).label(),
+            "1 qubit · 2 gates · 0 2q · depth 2",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Tests for the binary AST format (``dump_ast`` / ``load_ast`` / ``--emit ast``)."""
+
+import pathlib
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from spinachlang.ast_binary import FORMAT_VERSION, MAGIC
+from spinachlang.ast_builder import AstBuilder
+from spinachlang.main import main
+from spinachlang.parser import Parser
+from spinachlang.spinach import Spinach
+
+PROGRAM = (
+    "a : q 0\nanc : q ancilla 2\nd : q[1..6]\nf : b flags 1\n"
+    "theta = -pi / 3\n"
+    "bell : H | CX(anc)\n"
+    "pairs : [a, d[0..1], q 4]\n"
+    "a -> bell\na -> 2 bell<- | RZ(theta) | RX(0.125)\n"
+    "pairs -> 3 X\n"
+    "d[2] -> (H | X) if f else Z\n"
+    "for i in 0..4: d[i] -> CX(d[i + 1]) | RY(-i / 8)\n"
+    "a -> MEASURE(f)\n"
+)
+
+
+def _nodes(code: str) -> list:
+    return AstBuilder().transform(Parser.get_tree(code))
+
+
+class TestAstBinary(unittest.TestCase):
+    """Round trips through the .sphb format."""
+
+    def test_round_trip(self):
+        data = Spinach.dump_ast(PROGRAM)
+        self.assertTrue(data.startswith(MAGIC + bytes([FORMAT_VERSION])))
+        self.assertEqual(Spinach.load_ast(data), _nodes(PROGRAM))
+
+    def test_compile_from_binary(self):
+        data = Spinach.dump_ast(PROGRAM)
+        self.assertEqual(Spinach.create_circuit(data), Spinach.create_circuit(PROGRAM))
+        self.assertEqual(Spinach.compile(data, "json", optimize=2), Spinach.compile(PROGRAM, "json", optimize=2))
+
+    def test_names_are_interned(self):
+        data = Spinach.dump_ast("a_long_qubit_name : q 0\n" + "a_long_qubit_name -> H\n" * 50)
+        self.assertEqual(data.count(b"a_long_qubit_name"), 1)
+
+    def test_imports_are_resolved_when_dumped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pathlib.Path(tmp, "lib.sph").write_text("bell : H | CX(1)\n", encoding="utf-8")
+            data = Spinach.dump_ast('import "lib.sph"\n0 -> bell\n', base_dir=tmp)
+        self.assertEqual(Spinach.create_circuit(data), Spinach.create_circuit("bell : H | CX(1)\n0 -> bell\n"))
+
+    def test_malformed_data(self):
+        data = Spinach.dump_ast(PROGRAM)
+        for bad in (b"", b"XXXX\x01", MAGIC + b"\x63", data[:len(data) // 2], data[:6] + b"\xff" * 8):
+            with self.assertRaises(ValueError, msg=bad):
+                Spinach.load_ast(bad)
+
+
+class TestEmitAstCli(unittest.TestCase):
+    """``--emit ast`` writes a .sphb file that can be compiled later."""
+
+    def test_emit_then_compile(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = pathlib.Path(tmp, "prog.sph")
+            source.write_text(PROGRAM, encoding="utf-8")
+            binary = pathlib.Path(tmp, "prog.sphb")
+            output = pathlib.Path(tmp, "prog.json")
+            with mock.patch.object(sys, "argv", ["spinachlang", "--emit", "ast", str(source), "-o", str(binary)]):
+                main()
+            with mock.patch.object(sys, "argv", ["spinachlang", "-l", "json", str(binary), "-o", str(output)]):
+                main()
+            self.assertEqual(output.read_text(encoding="utf-8"), Spinach.compile(PROGRAM, "json"))
+
+    def test_language_required_without_emit(self):
+        with mock.patch.object(sys, "argv", ["spinachlang", "prog.sph"]), self.assertRaises(SystemExit):
+            main()
+
+
+if __name__ == "__main__":
+    unittest.main()
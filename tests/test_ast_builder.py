@@ -3,10 +3,14 @@
 import unittest
 
 from lark import Tree
+from lark.exceptions import VisitError
 
 from pytket import Qubit, Bit
 
 from spinachlang.ast_builder import AstBuilder
+from spinachlang.parser import Parser
+from spinachlang.spinach import Spinach
+from spinachlang.spinach_types import ConstantDeclaration
 
 
 class TestAstBuilder(unittest.TestCase):
@@ -110,3 +114,51 @@ class TestAstBuilder(unittest.TestCase):
         self.assertEqual(first_instruction.count, 2)
         self.assertEqual(first_instruction.instruction.parts[0].name, "H")
         self.assertEqual(first_instruction.instruction.parts[1].name, "X")
+
+
+class TestAngleExpressions(unittest.TestCase):
+    """Angle expressions and constants are folded while the AST is built."""
+
+    @staticmethod
+    def _args(code: str) -> list:
+        nodes = AstBuilder().transform(Parser.get_tree(code))
+        return nodes[-1].instruction.parts[0].args
+
+    def test_pi_and_operators(self):
+        self.assertEqual(self._args("0 -> RZ(pi / 4)\n"), [0.25])
+        self.assertEqual(self._args("0 -> RX(-(1 + 2) * 3 - 1)\n"), [-10])
+        self.assertEqual(self._args("0 -> U3(pi, -pi / 2, 0.5 + 0.25)\n"), [1.0, -0.5, 0.75])
+
+    def test_precedence(self):
+        self.assertEqual(self._args("0 -> RZ(1 + 2 * 3)\n"), [7])
+        self.assertEqual(self._args("0 -> RZ(8 / 4 / 2)\n"), [1.0])
+        self.assertEqual(self._args("0 -> RZ(1 - 2 - 3)\n"), [-4])
+
+    def test_named_constants(self):
+        code = "theta = pi / 8\ntwice = theta * 2\na : q 1\n0 -> CRZ(twice + theta, a)\n"
+        nodes = AstBuilder().transform(Parser.get_tree(code))
+        self.assertEqual(nodes[0], ConstantDeclaration(name="theta", value=0.125))
+        self.assertEqual(nodes[-1].instruction.parts[0].args, [0.375, "a"])
+
+    def test_bare_constant_argument(self):
+        self.assertEqual(self._args("half = 0.5\n0 -> RX(half)\n"), [0.5])
+
+    def test_declared_pi_stays_a_name(self):
+        self.assertEqual(self._args("pi : q 1\n0 -> CX(pi)\n"), ["pi"])
+
+    def test_errors(self):
+        for code in (
+            "0 -> RZ(theta * 2)\n",          # unknown constant
+            "0 -> RZ(1 / (1 - 1))\n",         # division by zero
+            "t = 1\nt = 2\n",                 # redefinition
+            "a : q 0\na = 1\n",               # constant shadows a declaration
+            "a = 1\na : q 0\n",               # declaration shadows a constant
+            "pi = 3\n",                       # built-in
+        ):
+            with self.assertRaises(VisitError, msg=code):
+                AstBuilder().transform(Parser.get_tree(code))
+
+    def test_backend_sees_numbers(self):
+        folded = Spinach.compile("t = pi / 4\n0 -> RZ(t * 2) | RX(-t)\n", "qasm")
+        literal = Spinach.compile("0 -> RZ(0.5) | RX(-0.25)\n", "qasm")
+        self.assertEqual(folded, literal)
@@ -0,0 +1,41 @@
+"""Tests for compiling many programs in a process pool."""
+
+import unittest
+
+from spinachlang.batch import BatchStats, compile_batch
+from spinachlang.spinach import Spinach
+
+PROGRAMS = [f"a : q 0\nb : q 1\na -> H | CX(b) | RZ({n} * pi / 8)\n" for n in range(6)]
+BROKEN = "a : q 0\na -> FOO\n"
+
+
+class TestCompileBatch(unittest.TestCase):
+    """Results match Spinach.compile, one per program, errors included."""
+
+    def test_ordered_results_match_compile(self):
+        stats = BatchStats()
+        results = list(Spinach.compile_batch(PROGRAMS, "qasm", workers=2, chunksize=2, stats=stats))
+        self.assertEqual([result.index for result in results], list(range(len(PROGRAMS))))
+        self.assertEqual([result.output for result in results], [Spinach.compile(p, "qasm") for p in PROGRAMS])
+        self.assertEqual((stats.programs, stats.failed), (len(PROGRAMS), 0))
+        self.assertGreater(stats.throughput, 0)
+
+    def test_errors_are_reported_per_program(self):
+        stats = BatchStats()
+        sources = iter([PROGRAMS[0], BROKEN, PROGRAMS[1]])
+        results = sorted(compile_batch(sources, "qasm", workers=2, chunksize=1, ordered=False, stats=stats))
+        self.assertEqual([result.output is None for result in results], [False, True, False])
+        self.assertTrue(results[1].error.startswith("ValidationError: line 2:1: Unknown qubit gate 'FOO'"))
+        self.assertEqual(stats.failed, 1)
+
+    def test_options_are_passed_on(self):
+        (result,) = compile_batch(["0 -> H | H\n"], "qasm", workers=1, optimize=1)
+        self.assertEqual(result.output, Spinach.compile("0 -> H | H\n", "qasm", optimize=1))
+
+    def test_invalid_chunksize(self):
+        with self.assertRaises(ValueError):
+            compile_batch(PROGRAMS, "qasm", chunksize=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
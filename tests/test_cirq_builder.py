@@ -0,0 +1,129 @@
+"""Tests for the direct Spinach-to-cirq builder and the Cirq Python source emitter."""
+
+import cmath
+import importlib.util
+import unittest
+from unittest import mock
+
+from spinachlang.spinach import Spinach
+
+HAS_CIRQ = all(importlib.util.find_spec(module) is not None for module in ("cirq", "pytket.extensions.cirq"))
+
+CORPUS = [
+    "a : q 0\nb : q 1\na -> H | CX(b)\n* -> M\n",
+    "r : q[0..3]\nfor i in 0..2: r[i] -> H | CX(r[i+1]) | RZ(pi / 4)\nr -> M\n",
+    "b : q 1\nb -> X | V | VDG | S | T\n* -> M\n",
+    "0 -> PX(0.3, 0.7) | RX(0.1) | RY(0.2)\n"
+    "1 -> CU1(0.25, 0) | ISWAPMAX(0) | ISWAP(0.5, 0) | ZZPH(0.2, 0) | XXPH(0.3, 0) | YYPH(0.4, 0)\n"
+    "2 -> SWAP(0) | FCX(1) | FCZ(1) | CH(0) | FCH(1) | R\n",
+    "p : H | CX(1)\n0 -> p | p <-\n0 -> PHASE(0.05)\n0 -> 3 X | PHASE(0.1)\nf : b 0\n0 -> M(f)\n",
+    "l : [0, 2]\nl -> H\n1 -> X\n* -> M\n",
+    "[0, 1, 2, 3, 4, 5] -> H\n[0, 1, 2, 4, 5] -> X\n0 -> 4 Z\n",
+    # angles outside one period, which pytket reduces
+    "0 -> RZ(4.5) | RZ(-0.5) | PX(4.5, 2.5)\n1 -> CU1(2.5, 0) | XXPH(-0.5, 0)\n",
+]
+
+# Programs whose global phase is past a quarter turn, with its coefficient:
+# tk_to_cirq drops the phase (with a warning), the direct path keeps it.
+DROPPED_PHASE = {
+    "0 -> H | PHASE(0.75)\n": cmath.exp(0.75j * cmath.pi),
+    "0 -> H | PHASE(1)\n": -1.0,
+}
+
+
+def _run(script: str):
+    namespace: dict = {}
+    exec(script.replace("print(circuit)", ""), namespace)  # pylint: disable=exec-used
+    return namespace["circuit"]
+
+
+@unittest.skipUnless(HAS_CIRQ, "cirq and pytket-cirq are required")
+class TestCirqBuilder(unittest.TestCase):
+    """``build`` gives what ``tk_to_cirq`` gives, global phase past a quarter turn aside, or raises ``Unsupported``."""
+
+    def test_matches_pytket_path(self):
+        import cirq
+
+        for code in CORPUS:
+            with self.subTest(code=code):
+                self.assertEqual(Spinach.to_cirq(code), Spinach.to_cirq(code, direct=False))
+        for code, coefficient in DROPPED_PHASE.items():
+            with self.subTest(code=code):
+                pytket_path = Spinach.to_cirq(code, direct=False)
+                self.assertEqual(Spinach.to_cirq(code), pytket_path + cirq.global_phase_operation(coefficient))
+
+    def test_global_phase(self):
+        import cirq
+
+        for phase, coefficient in (("0.25", cmath.exp(0.25j * cmath.pi)), ("0.5", 1j), ("1", -1.0), ("1.5", -1j)):
+            with self.subTest(phase=phase):
+                circuit = Spinach.to_cirq(f"0 -> PHASE({phase})\n")
+                self.assertEqual(list(circuit.all_operations()), [cirq.global_phase_operation(coefficient)])
+        self.assertEqual(Spinach.to_cirq("0 -> PHASE(2)\n"), cirq.Circuit())
+
+    def test_unsupported(self):
+        from spinachlang.cirq_builder import Unsupported, build
+        from spinachlang.program import checked_ast
+
+        for code in (
+            "f : b 0\n0 -> M(f)\n1 -> X if f\n",
+            "f : b 0\nf -> NOT\n",
+            "0 -> ST\n",
+            "0 -> CCX(1, 2)\n",
+            "[0, 1] -> BARRIER\n",
+        ):
+            with self.subTest(code=code), self.assertRaises(Unsupported):
+                build(checked_ast(code, None)[0])
+
+    def test_unsupported_falls_back(self):
+        code = "f : b 0\n0 -> H | M(f)\n1 -> X if f\n"
+        with self.assertRaises(NotImplementedError):
+            Spinach.to_cirq(code, direct=False)
+        with self.assertRaises(NotImplementedError):
+            Spinach.to_cirq(code)
+
+    def test_skips_pytket_circuit(self):
+        program = Spinach.load(CORPUS[0])
+        with mock.patch("spinachlang.backend.Backend.compile_to_circuit") as compile_to_circuit:
+            circuit = program.to_cirq()
+            program.compile("cirq")
+        compile_to_circuit.assert_not_called()
+        self.assertIs(program.to_cirq(), circuit)
+
+
+@unittest.skipUnless(HAS_CIRQ, "cirq and pytket-cirq are required")
+class TestCirqSource(unittest.TestCase):
+    """The ``cirq`` target is a readable script rebuilding the same circuit."""
+
+    def test_script_builds_the_circuit(self):
+        for code in CORPUS:
+            with self.subTest(code=code):
+                self.assertEqual(_run(Spinach.compile(code, "cirq")), Spinach.to_cirq(code, direct=False))
+
+    def test_pytket_path_script(self):
+        code = CORPUS[1]
+        passes = ["RemoveRedundancies"]
+        script = Spinach.compile(code, "cirq", passes=passes)
+        self.assertEqual(_run(script), Spinach.to_cirq(code, passes=passes))
+
+    def test_compact_layout(self):
+        script = Spinach.compile("r : q[0..3]\nr -> H\n0 -> 3 X | CX(1)\n1 -> 4 X\n", "cirq")
+        self.assertEqual(script, (
+            "import cirq\n"
+            "\n"
+            "q = cirq.LineQubit.range(4)\n"
+            "circuit = cirq.Circuit(\n"
+            "    cirq.H.on_each(q),\n"
+            "    [cirq.X(q[0]), cirq.CNOT(q[1], q[0])] * 3,\n"
+            "    [cirq.X(q[1])] * 4,\n"
+            ")\n"
+            "print(circuit)\n"
+        ))
+
+    def test_slices(self):
+        script = Spinach.compile("[0, 1, 2, 3, 5] -> H\n6 -> X\n", "cirq")
+        self.assertIn("    cirq.H.on_each(q[0:4], q[5]),\n", script)
+
+
+if __name__ == "__main__":
+    unittest.main()
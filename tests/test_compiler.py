@@ -1,9 +1,10 @@
 """Test the compiling code getting the ast and creating a tket circuit"""
 
 import unittest
+from unittest import mock
 
 
-from pytket import Qubit, Bit
+from pytket import Circuit, Qubit, Bit
 
 from pytket.circuit import OpType
 
@@ -18,7 +19,7 @@ from spinachlang.spinach_types import (
     GatePipeline,
 )
 
-from spinachlang.backend import Backend
+from spinachlang.backend import Backend, _compilation_qubits
 
 
 class TestCompiler(unittest.TestCase):
@@ -101,11 +102,10 @@ class TestCompiler(unittest.TestCase):
         for cmd in commands:
             self.assertEqual(cmd.qubits, [Qubit(3)])
 
-    @unittest.expectedFailure
     def test_named_list_as_action_target(self):
         """test this code:
         dracula : [1, 3]
-        dracula -> H
+        dracula -> 2 H
         """
         ast = [
             ListDeclaration(name="dracula", items=[1, 3]),
@@ -115,6 +115,33 @@ class TestCompiler(unittest.TestCase):
                 instruction=GatePipeline(parts=[GateCall(name="H", args=[])]),
             ),
         ]
+        result = Backend.compile_to_circuit(ast)
+        commands = result.get_commands()
+        self.assertEqual(len(commands), 4)
+        self.assertTrue(all(cmd.op.type == OpType.H for cmd in commands))
+        self.assertEqual({cmd.qubits[0] for cmd in commands}, {Qubit(1), Qubit(3)})
+
+    def test_named_lists_nest_and_mix_targets(self):
+        """test this code:
+        anna : q 2
+        pair : [0, anna]
+        all_of_them : [pair, 4]
+        [all_of_them, 5] -> X
+        """
+        ast = [
+            QubitDeclaration(name="anna", qubit=Qubit(2)),
+            ListDeclaration(name="pair", items=[0, "anna"]),
+            ListDeclaration(name="all_of_them", items=["pair", 4]),
+            Action(
+                target=["all_of_them", 5],
+                instruction=GatePipeline(parts=[GateCall(name="X", args=[])]),
+            ),
+        ]
+        result = Backend.compile_to_circuit(ast)
+        self.assertEqual(
+            sorted(cmd.qubits[0] for cmd in result.get_commands()),
+            [Qubit(0), Qubit(2), Qubit(4), Qubit(5)],
+        )
 
     def test_list_as_action_target(self):
         """test this code:
@@ -134,3 +161,98 @@ class TestCompiler(unittest.TestCase):
         self.assertEqual(commands[1].op.type, OpType.H)
         self.assertEqual(commands[0].qubits, [Qubit(1)])
         self.assertEqual(commands[1].qubits, [Qubit(2)])
+
+    def test_qubits_added_by_repeated_block(self):
+        """test this code:
+        0 -> 3 CX(5)
+        5 -> H
+        The control qubit first appears inside the repeated block.
+        """
+        ast = [
+            Action(
+                target=0,
+                count=3,
+                instruction=GatePipeline(parts=[GateCall(name="CX", args=[5])]),
+            ),
+            Action(target=5, instruction=GatePipeline(parts=[GateCall(name="H", args=[])])),
+        ]
+        result = Backend.compile_to_circuit(ast)
+        self.assertEqual(result.qubits, [Qubit(0), Qubit(5)])
+        self.assertEqual([cmd.op.type for cmd in result.get_commands()], [OpType.CX] * 3 + [OpType.H])
+
+    def test_repeated_blocks_are_not_tracked(self):
+        """test this code:
+        0 -> 3 CX(1)
+        1 -> 2 H
+        Only the compiled circuit keeps a tracked qubit set once a block is appended.
+        """
+        ast = [
+            Action(target=0, count=3, instruction=GatePipeline(parts=[GateCall(name="CX", args=[1])])),
+            Action(target=1, count=2, instruction=GatePipeline(parts=[GateCall(name="H", args=[])])),
+        ]
+        tracked = []
+        handle_action = Backend._Backend__handle_action  # pylint: disable=protected-access
+
+        def spy(action, c, index):
+            handle_action(action, c, index)
+            tracked.append([entry[0] for entry in _compilation_qubits.get().values()])
+
+        with mock.patch.object(Backend, "_Backend__handle_action", spy):
+            result = Backend.compile_to_circuit(ast)
+        self.assertTrue(all(all(circuit is result for circuit in entry) for entry in tracked))
+        self.assertEqual(len(tracked), 2)
+
+    def test_ensure_qubit_outside_compilation(self):
+        """Ensuring a qubit twice outside a compilation adds it and its bit once"""
+        circuit = Circuit()
+        ensure_qubit = Backend._Backend__ensure_qubit  # pylint: disable=protected-access
+        ensure_qubit(circuit, 3)
+        ensure_qubit(circuit, Qubit(3))
+        self.assertEqual((circuit.qubits, circuit.bits), ([Qubit(3)], [Bit(3)]))
+
+    def test_reversed_named_pipeline(self):
+        """test this code:
+        pip : H | X
+        0 -> pip<- | pip
+        """
+        pip = GatePipeline(parts=[GateCall(name="H", args=[]), GateCall(name="X", args=[])])
+        ast = [
+            InstructionDeclaration(name="pip", pipeline=pip),
+            Action(
+                target=0,
+                instruction=GatePipeline(
+                    parts=[GatePipeByName(name="pip", rev=True), GatePipeByName(name="pip", rev=False)]
+                ),
+            ),
+        ]
+        result = Backend.compile_to_circuit(ast)
+        self.assertEqual([cmd.op.type for cmd in result.get_commands()], [OpType.X, OpType.H, OpType.H, OpType.X])
+        self.assertEqual([part.name for part in pip.parts], ["H", "X"])
+
+    def test_redeclared_instruction_replans(self):
+        """test this code:
+        pip : H
+        0 -> pip
+        pip : X
+        0 -> pip
+        """
+        call = Action(target=0, instruction=GatePipeline(parts=[GatePipeByName(name="pip", rev=False)]))
+        ast = [
+            InstructionDeclaration(name="pip", pipeline=GatePipeline(parts=[GateCall(name="H", args=[])])),
+            call,
+            InstructionDeclaration(name="pip", pipeline=GatePipeline(parts=[GateCall(name="X", args=[])])),
+            call,
+        ]
+        result = Backend.compile_to_circuit(ast)
+        self.assertEqual([cmd.op.type for cmd in result.get_commands()], [OpType.H, OpType.X])
+
+    def test_unknown_gate_in_pipeline(self):
+        """An unknown gate is reported before any gate of the pipeline is added"""
+        ast = [
+            Action(
+                target=0,
+                instruction=GatePipeline(parts=[GateCall(name="H", args=[]), GateCall(name="NOPE", args=[])]),
+            ),
+        ]
+        with self.assertRaises(ValueError):
+            Backend.compile_to_circuit(ast)
@@ -379,6 +379,35 @@ class TestCircBox(unittest.TestCase):
         # No gate commands emitted – target list was empty
         self.assertEqual(circuit.get_commands(), [])
 
+    @staticmethod
+    def _box_ids(circuit) -> list:
+        return [cmd["op"]["box"]["id"] for cmd in circuit.to_dict()["commands"]]
+
+    def test_circbox_reused_within_compilation(self):
+        """Applying the same instruction again reuses one CircBox per arity."""
+        circuit = _source_circuit(
+            "bell : H | CX(1)\n[0, 1] -> CIRCBOX(bell)\n[2, 3] -> CIRCBOX(bell)\n"
+            "[4, 5, 6] -> CIRCBOX(bell)\n"
+        )
+        ids = self._box_ids(circuit)
+        self.assertEqual(ids[0], ids[1])
+        self.assertNotEqual(ids[0], ids[2])
+
+    def test_redefined_instruction_gets_new_box(self):
+        circuit = _source_circuit(
+            "b : H\n[0] -> CIRCBOX(b)\nb : X\n[0] -> CIRCBOX(b)\n"
+        )
+        boxes = [cmd.op.get_circuit() for cmd in circuit.get_commands()]
+        self.assertEqual([box.get_commands()[0].op.type for box in boxes], [OpType.H, OpType.X])
+
+    def test_circbox_shared_across_compilations(self):
+        code = "bell : H | CX(1)\n[0, 1] -> CIRCBOX(bell)\n"
+        Backend.clear_circbox_cache()
+        first = self._box_ids(_source_circuit(code))
+        self.assertEqual(first, self._box_ids(_source_circuit(code)))
+        Backend.clear_circbox_cache()
+        self.assertNotEqual(first, self._box_ids(_source_circuit(code)))
+
 
 # ---------------------------------------------------------------------------
 # CY bug regression (was using DEFAULT_BIT_REGISTER for controller)
@@ -0,0 +1,58 @@
+"""Importing the package or its lightweight entry points must not load pytket.
+
+Each check runs in a fresh interpreter, since the test session itself has
+already imported pytket.
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _loads_pytket(code: str) -> bool:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(_ROOT), os.environ.get("PYTHONPATH")]))}
+    proc = subprocess.run(
+        [sys.executable, "-c", f"{code}\nimport sys; print('pytket' in sys.modules)"],
+        capture_output=True, text=True, check=True, env=env,
+    )
+    return proc.stdout.strip().splitlines()[-1] == "True"
+
+
+class TestLazyImports(unittest.TestCase):
+    """pytket is only imported once a circuit is built."""
+
+    def test_package_import(self):
+        self.assertFalse(_loads_pytket("import spinachlang"))
+
+    def test_spinach_class_access(self):
+        self.assertFalse(_loads_pytket("from spinachlang import Spinach, compile_code"))
+
+    def test_aio(self):
+        self.assertFalse(_loads_pytket("from spinachlang import aio\naio.configure('thread', 2)"))
+
+    def test_parser(self):
+        self.assertFalse(_loads_pytket("from spinachlang.parser import Parser\nParser.get_tree('q0 -> H\\n')"))
+
+    def test_cli_help(self):
+        code = (
+            "import sys\nfrom spinachlang.main import main\nsys.argv = ['spinachlang', '--help']\n"
+            "try:\n    main()\nexcept SystemExit:\n    pass"
+        )
+        self.assertFalse(_loads_pytket(code))
+
+    def test_building_a_circuit_loads_pytket(self):
+        self.assertTrue(_loads_pytket("import spinachlang\nspinachlang.to_tket_circuit('0 -> H\\n')"))
+
+    def test_unknown_attribute(self):
+        import spinachlang  # pylint: disable=import-outside-toplevel
+
+        with self.assertRaises(AttributeError):
+            spinachlang.does_not_exist  # pylint: disable=pointless-statement
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -275,7 +275,9 @@ class TestImportErrorMessages(unittest.TestCase):
         )
 
     def test_cirq_hint(self):
-        self._assert_helpful_error("to_cirq")
+        # Without the direct builder, to_cirq needs pytket-cirq.
+        with mock.patch.dict(sys.modules, {"spinachlang.cirq_builder": None}):
+            self._assert_helpful_error("to_cirq")
 
     def test_braket_hint(self):
         self._assert_helpful_error("to_braket")
@@ -284,7 +286,9 @@ class TestImportErrorMessages(unittest.TestCase):
         self._assert_helpful_error("to_pyquil")
 
     def test_qiskit_hint(self):
-        self._assert_helpful_error("to_qiskit")
+        # Without the direct builder (no qiskit), to_qiskit needs pytket-qiskit.
+        with mock.patch.dict(sys.modules, {"spinachlang.qiskit_builder": None}):
+            self._assert_helpful_error("to_qiskit")
 
 
 if __name__ == "__main__":
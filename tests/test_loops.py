@@ -0,0 +1,110 @@
+"""Tests for bounded loops (``for i in 0..8: data[i] -> CX(data[i + 1])``)."""
+
+import unittest
+
+from lark.exceptions import VisitError
+
+from spinachlang.analysis import MetricsAnalyzer
+from spinachlang.ast_builder import AstBuilder
+from spinachlang.lsp import _metrics_for
+from spinachlang.optimizer import PeepholeOptimizer
+from spinachlang.parser import Parser
+from spinachlang.spinach import Spinach
+from spinachlang.spinach_types import Action, ForLoop, LoopExpr, RegisterSlice
+
+LOOP = "d : q[0..4]\nfor i in 0..3: d[i] -> H | CX(d[i + 1]) | RZ(i / 4)\n"
+UNROLLED = (
+    "d : q[0..4]\n"
+    "d[0] -> H | CX(d[1]) | RZ(0)\n"
+    "d[1] -> H | CX(d[2]) | RZ(0.25)\n"
+    "d[2] -> H | CX(d[3]) | RZ(0.5)\n"
+    "d[3] -> H | CX(d[4]) | RZ(0.75)\n"
+)
+
+
+def _nodes(code: str) -> list:
+    return AstBuilder().transform(Parser.get_tree(code))
+
+
+class TestLoopAst(unittest.TestCase):
+    """A loop is one AST node whatever its trip count."""
+
+    def test_body_is_one_node(self):
+        (_, loop) = _nodes("d : q[0..999]\nfor i in 0..998: d[i] -> CX(d[i + 1])\n")
+        self.assertIsInstance(loop, ForLoop)
+        self.assertEqual((loop.var, loop.start, loop.stop), ("i", 0, 998))
+        self.assertIsInstance(loop.body, Action)
+        var = LoopExpr(op="var", args=["i"])
+        self.assertEqual(loop.body.target, RegisterSlice(name="d", start=var, stop=var))
+
+    def test_constant_parts_are_folded(self):
+        (_, loop) = _nodes("n = 2\nfor i in 0..n * 2: i -> RZ(pi / 2 * i)\n")
+        self.assertEqual(loop.stop, 4)
+        self.assertEqual(loop.body.instruction.parts[0].args, [LoopExpr(op="mul", args=[0.5, LoopExpr(op="var", args=["i"])])])
+
+    def test_loop_variable_scope(self):
+        for code in (
+            "for i in 0..1: i -> H\ni -> X\n",             # used after its loop
+            "for i in 0..i: i -> H\n",                      # used in its own bounds
+            "for i in 0..1: for i in 0..1: i -> H\n",       # shadows an enclosing loop
+            "a : q 0\nfor a in 0..1: a -> H\n",             # reuses a declaration
+            "for i in 3..1: i -> H\n",                      # empty range
+        ):
+            with self.assertRaises((VisitError, ValueError), msg=code):
+                Spinach.create_circuit(code)
+
+    def test_names_starting_with_keywords(self):
+        code = (
+            "forward : q 0\nformat : [1]\nfor_each : H\nfork : q 2\nindex : q 3\n"
+            "forward -> for_each\nformat -> H\nfork -> H\n"
+            "for i in 0..1: forward -> H\n"
+            "for forx in 0..1: index -> RZ(forx / 2)\n"
+        )
+        self.assertEqual(Spinach.create_circuit(code).n_gates, 7)
+
+
+class TestLoopExpansion(unittest.TestCase):
+    """The backend expands the body once per iteration."""
+
+    def test_same_circuit_as_unrolled_source(self):
+        self.assertEqual(Spinach.compile(LOOP, "qasm"), Spinach.compile(UNROLLED, "qasm"))
+
+    def test_nested_loops_and_dependent_bounds(self):
+        nested = Spinach.create_circuit("d : q[0..3]\nfor i in 0..2:\n  for j in i + 1..3: d[i] -> CZ(d[j])\n")
+        pairs = [(cmd.qubits[0].index[0], cmd.qubits[1].index[0]) for cmd in nested.get_commands()]
+        self.assertEqual(sorted(tuple(sorted(p)) for p in pairs), [(0, 1), (0, 2), (0, 3), (1, 2), (1, 3), (2, 3)])
+
+    def test_bare_index_and_list_targets(self):
+        circuit = Spinach.create_circuit("d : q[5..9]\nfor i in 0..2: [i, d[i]] -> X\n")
+        self.assertEqual(sorted(q.index[0] for q in circuit.qubits), [0, 1, 2, 5, 6, 7])
+
+    def test_conditional_body(self):
+        loop = Spinach.create_circuit("f : b 0\nfor i in 0..2: i -> X if f else Z\n")
+        unrolled = Spinach.create_circuit("f : b 0\n0 -> X if f else Z\n1 -> X if f else Z\n2 -> X if f else Z\n")
+        self.assertEqual(loop, unrolled)
+
+    def test_index_out_of_register(self):
+        with self.assertRaises(ValueError):
+            Spinach.create_circuit("d : q[0..3]\nfor i in 0..3: d[i] -> CX(d[i + 1])\n")
+
+    def test_negative_index(self):
+        with self.assertRaises(ValueError):
+            Spinach.create_circuit("d : q[0..3]\nfor i in 0..2: d[i - 1] -> H\n")
+
+    def test_optimizer_keeps_loop(self):
+        nodes = PeepholeOptimizer(level=1).run(_nodes("for i in 0..3: i -> H | H | RZ(i / 8)\n"))
+        self.assertIsInstance(nodes[0], ForLoop)
+        self.assertEqual([part.name for part in nodes[0].body.instruction.parts], ["RZ"])
+
+    def test_metrics_match_circuit(self):
+        metrics, _ = MetricsAnalyzer().analyse(_nodes(LOOP))
+        circuit = Spinach.create_circuit(LOOP)
+        self.assertEqual((metrics.qubits, metrics.gates, metrics.depth), (circuit.n_qubits, circuit.n_gates, circuit.depth()))
+
+    def test_metrics_lines_with_body_on_next_line(self):
+        _, instructions = _metrics_for("for i in 0..1:\n  i -> H\nbell : H | CX(1)\n")
+        self.assertEqual([line for line, _ in instructions], [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,7 +6,9 @@ installed into ``sys.modules`` before the package is imported so that the
 pytket-dependent parts of the package load without error.
 """
 
+import inspect
 import sys
+from types import SimpleNamespace
 from unittest.mock import MagicMock
 
 # ---------------------------------------------------------------------------
@@ -59,14 +61,24 @@ except ImportError:
 
 import pytest  # noqa: E402  (must come after sys.modules patching)
 
+from spinachlang.analysis import _MAX_SIMULATED_ITERATIONS, MetricsAnalyzer  # noqa: E402
 from spinachlang.lsp import (  # noqa: E402
     _GATE_NAMES,
     _GATES,
+    _TOKEN_TYPES,
+    _cached_semantic_tokens,
     _diagnostics_for,
+    _diff_tokens,
+    _metrics_for,
+    _semantic_tokens_for,
+    LATENCY_STATS_METHOD,
     SERVER_NAME,
     SERVER_VERSION,
+    latency_stats,
     server,
+    telemetry,
 )
+from spinachlang.lsp_telemetry import LatencyHistogram, LatencyRegistry  # noqa: E402
 from lsprotocol import types  # noqa: E402
 
 
@@ -128,6 +140,24 @@ class TestDiagnosticsFor:
         diags = _diagnostics_for(INVALID_SOURCE_BAD_CHAR)
         assert all(d.message for d in diags)
 
+    def test_all_errors_reported_in_one_pass(self):
+        """Parsing resumes after each broken line, so every error is reported."""
+        source = "a : q 0\nb : \na -> H\n@@\na -> X(\na -> Z\n"
+        diags = _diagnostics_for(source)
+        assert [d.range.start.line for d in diags] == [1, 3, 4]
+        assert diags[0].message.startswith("Unexpected end of line")
+        assert diags[1].message.startswith("Unexpected character '@'")
+
+    def test_error_on_last_line_has_no_spurious_eof(self):
+        """Recovering from an error on the last statement must not also report EOF."""
+        diags = _diagnostics_for("q0 : q 0\nbad bad\n")
+        assert len(diags) == 1
+        assert (diags[0].range.start.character, diags[0].range.end.character) == (4, 7)
+
+    def test_incomplete_last_statement_reports_eof(self):
+        diags = _diagnostics_for("q0 : q 0\n@@\nq1 : q")
+        assert [d.message.split(".")[0] for d in diags] == ["Unexpected character '@'", "Unexpected end of file"]
+
 
 # ---------------------------------------------------------------------------
 # Gate catalogue
@@ -168,3 +198,213 @@ class TestServerIdentity:
     def test_server_name_matches(self):
         assert SERVER_NAME == server.name
 
+
+# ---------------------------------------------------------------------------
+# Semantic tokens
+# ---------------------------------------------------------------------------
+
+def _decode(data: list[int]) -> list[tuple[int, int, int, str, int]]:
+    """Turn relative LSP token data back into absolute (line, col, len, type, mods)."""
+    out = []
+    line = col = 0
+    for i in range(0, len(data), 5):
+        d_line, d_col, length, token_type, mods = data[i:i + 5]
+        col = col + d_col if d_line == 0 else d_col
+        line += d_line
+        out.append((line, col, length, _TOKEN_TYPES[token_type], mods))
+    return out
+
+
+class TestSemanticTokens:
+    """Unit tests for the semantic token encoder and its delta support."""
+
+    def test_data_is_multiple_of_five(self):
+        assert len(_semantic_tokens_for(VALID_SOURCE)) % 5 == 0
+
+    def test_classification(self):
+        """Gates, names, keywords, numbers, operators and comments are told apart."""
+        source = "bell : H | CX(q 1)  # prep\nq0 -> 2 bell\n"
+        tokens = _decode(_semantic_tokens_for(source))
+        assert tokens == [
+            (0, 0, 4, "function", 1),   # bell (declaration)
+            (0, 5, 1, "operator", 0),   # :
+            (0, 7, 1, "function", 0),   # H
+            (0, 9, 1, "operator", 0),   # |
+            (0, 11, 2, "function", 0),  # CX
+            (0, 14, 1, "keyword", 0),   # q
+            (0, 16, 1, "number", 0),    # 1
+            (0, 20, 6, "comment", 0),   # # prep
+            (1, 0, 2, "variable", 0),   # q0
+            (1, 3, 2, "operator", 0),   # ->
+            (1, 6, 1, "number", 0),     # 2
+            (1, 8, 4, "function", 0),   # bell (instruction reference)
+        ]
+
+    def test_constant_declaration(self):
+        tokens = _decode(_semantic_tokens_for("t = pi / 2\n"))
+        assert tokens == [
+            (0, 0, 1, "variable", 1),   # t (declaration)
+            (0, 2, 1, "operator", 0),   # =
+            (0, 4, 2, "variable", 0),   # pi
+            (0, 7, 1, "operator", 0),   # /
+            (0, 9, 1, "number", 0),     # 2
+        ]
+
+    def test_for_loop(self):
+        tokens = _decode(_semantic_tokens_for("for i in 0..n: i -> H\n"))
+        assert tokens[:8] == [
+            (0, 0, 3, "keyword", 0),    # for
+            (0, 4, 1, "variable", 1),   # i (declaration)
+            (0, 6, 2, "keyword", 0),    # in
+            (0, 9, 1, "number", 0),     # 0
+            (0, 10, 2, "operator", 0),  # ..
+            (0, 12, 1, "variable", 0),  # n (not a declaration)
+            (0, 13, 1, "operator", 0),  # :
+            (0, 15, 1, "variable", 0),  # i
+        ]
+
+    def test_register_name_is_namespace(self):
+        tokens = _decode(_semantic_tokens_for("flag : b result 0\n"))
+        assert (0, 9, 6, "namespace", 0) in tokens
+
+    def test_tokens_continue_after_syntax_error(self):
+        """A broken line must not stop highlighting of the lines after it."""
+        tokens = _decode(_semantic_tokens_for("q0 : q 0\n@@ garbage\nq0 -> H\n"))
+        assert (2, 6, 1, "function", 0) in tokens
+
+    def test_diff_identical_is_empty(self):
+        data = _semantic_tokens_for(VALID_SOURCE)
+        assert not _diff_tokens(data, list(data))
+
+    def test_diff_only_covers_edited_region(self):
+        old = _semantic_tokens_for(VALID_SOURCE)
+        new = _semantic_tokens_for(VALID_SOURCE + "q1 -> X\n")
+        (edit,) = _diff_tokens(old, new)
+        assert edit.start == len(old)
+        assert edit.delete_count == 0
+        assert old + edit.data == new
+
+    def test_diff_applies_to_middle_edit(self):
+        old = _semantic_tokens_for(VALID_SOURCE)
+        new = _semantic_tokens_for(VALID_SOURCE.replace("H | CX(q1)", "H | X | CX(q1)"))
+        (edit,) = _diff_tokens(old, new)
+        patched = old[:edit.start] + edit.data + old[edit.start + edit.delete_count:]
+        assert patched == new
+        assert len(edit.data) < len(new)
+
+    def test_cache_is_per_version(self):
+        uri = "file:///cache_test.sph"
+        first = _cached_semantic_tokens(uri, 1, VALID_SOURCE)
+        assert _cached_semantic_tokens(uri, 1, VALID_SOURCE) is first
+        second = _cached_semantic_tokens(uri, 2, VALID_SOURCE + "q1 -> X\n")
+        assert second.result_id != first.result_id
+
+
+# ---------------------------------------------------------------------------
+# Circuit metrics (code lenses / inlay hints)
+# ---------------------------------------------------------------------------
+
+class TestMetrics:
+    """Unit tests for _metrics_for(), which backs code lenses and inlay hints."""
+
+    def test_instruction_lines_and_totals(self):
+        source = "q0 : q 0\n# comment\nq1 : q 1\n\nbell : H | CX(q1)\nq0 -> bell\n"
+        total, instructions = _metrics_for(source)
+        assert (total.qubits, total.gates, total.two_qubit_gates, total.depth) == (2, 2, 1, 2)
+        assert [line for line, _ in instructions] == [4]
+
+    def test_large_loops_are_not_unrolled(self, monkeypatch):
+        runs = []
+        run = MetricsAnalyzer._run  # pylint: disable=protected-access
+        monkeypatch.setattr(MetricsAnalyzer, "_run", lambda *args: runs.append(args) or run(*args))
+
+        total, _ = _metrics_for("for i in 0..1000000: 0 -> H | CX(1)\n")
+        assert total == (2, 2000002, 1000001, 2000002, False)
+        assert len(runs) < 10
+
+        runs.clear()
+        total, _ = _metrics_for("d : q[0..1000000]\nfor i in 0..999999: d[i] -> CX(d[i + 1])\n")
+        assert total.approximate and total.gates == _MAX_SIMULATED_ITERATIONS
+        assert len(runs) == _MAX_SIMULATED_ITERATIONS
+        assert total.label().startswith("at least ")
+
+    def test_syntax_error_gives_no_metrics(self):
+        assert _metrics_for(INVALID_SOURCE_BAD_CHAR) is None
+
+    def test_ast_error_gives_no_metrics(self):
+        """A float qubit index parses but fails in the AST builder."""
+        assert _metrics_for("q0 : q 1.5\n") is None
+
+
+# ---------------------------------------------------------------------------
+# Latency telemetry
+# ---------------------------------------------------------------------------
+
+class TestLatencyTelemetry:
+    """Unit tests for the latency histograms and their wiring into the server."""
+
+    def test_percentiles_use_bucket_bounds(self):
+        histogram = LatencyHistogram()
+        for elapsed in [0.3] * 98 + [40.0, 4000.0]:
+            histogram.record(elapsed)
+        assert histogram.percentile(0.5) == 0.5
+        assert histogram.percentile(0.99) == 50
+        assert histogram.percentile(1.0) == 4000.0
+        assert histogram.to_dict()["count"] == 100
+
+    def test_overflow_reports_max(self):
+        histogram = LatencyHistogram()
+        histogram.record(9000.0)
+        assert histogram.percentile(0.5) == 9000.0
+
+    def test_empty_histogram(self):
+        assert LatencyHistogram().percentile(0.99) == 0.0
+
+    def test_timed_keeps_signature_and_records(self):
+        registry = LatencyRegistry()
+
+        @registry.timed("demo")
+        def handler(ls, params):
+            return ls, params
+
+        assert handler(1, 2) == (1, 2)
+        assert list(inspect.signature(handler).parameters) == ["ls", "params"]
+        assert registry.snapshot()["demo"]["count"] == 1
+
+    def test_failed_call_is_still_recorded(self):
+        registry = LatencyRegistry()
+        with pytest.raises(ValueError):
+            with registry.measure("boom"):
+                raise ValueError
+        assert registry.histograms["boom"].count == 1
+
+    def test_dispatch_records_handler_phase_and_protocol(self):
+        """A message fed to the protocol is timed at every layer."""
+        sent = []
+        server.protocol.set_writer(SimpleNamespace(write=sent.append, close=lambda: None), include_headers=False)
+        server.protocol.handle_message(server.protocol.structure_message({
+            "jsonrpc": "2.0", "id": 1, "method": types.INITIALIZE, "params": {"capabilities": {}},
+        }))
+        telemetry.reset()
+        sent.clear()
+        server.protocol.handle_message(server.protocol.structure_message({
+            "jsonrpc": "2.0",
+            "method": types.TEXT_DOCUMENT_DID_OPEN,
+            "params": {"textDocument": {
+                "uri": "file:///telemetry.sph", "languageId": "spinach", "version": 1, "text": VALID_SOURCE,
+            }},
+        }))
+        assert {
+            types.TEXT_DOCUMENT_DID_OPEN,
+            f"protocol:{types.TEXT_DOCUMENT_DID_OPEN}",
+            "diagnostics:parse",
+            "diagnostics:publish",
+        } <= set(telemetry.snapshot())
+        assert b'"diagnostics": []' in sent[0]
+
+    def test_latency_stats_request_can_reset(self):
+        telemetry.reset()
+        telemetry.record(types.TEXT_DOCUMENT_HOVER, 1.0)
+        stats = latency_stats(server, SimpleNamespace(reset=True))
+        assert stats[types.TEXT_DOCUMENT_HOVER]["count"] == 1
+        assert not telemetry.histograms
@@ -0,0 +1,98 @@
+"""Tests for ``import "lib.sph"`` and the compiled-module cache."""
+
+import errno
+import os
+import pathlib
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+
+from lark.exceptions import VisitError
+
+from spinachlang import modules
+from spinachlang.spinach import Spinach
+
+LIB = 'import "base.sph"\nbell : H | CX(1)\ntheta = pi / 4\n'
+BASE = "data : q[0..3]\nrot : RZ(0.5)\n"
+MAIN = 'import "lib.sph"\n0 -> bell\ndata -> rot | RZ(theta)\n'
+INLINE = "data : q[0..3]\nrot : RZ(0.5)\nbell : H | CX(1)\n0 -> bell\ndata -> rot | RZ(0.25)\n"
+
+
+class TestImports(unittest.TestCase):
+    """Imported declarations behave like declarations written in place."""
+
+    def setUp(self):
+        modules.clear_cache()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = pathlib.Path(self._tmp.name)
+        self._write("lib.sph", LIB)
+        self._write("base.sph", BASE)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, name: str, code: str) -> None:
+        (self.root / name).write_text(code, encoding="utf-8")
+
+    def _compile(self, code: str = MAIN):
+        return Spinach.create_circuit(code, base_dir=self.root)
+
+    def test_same_circuit_as_inline_declarations(self):
+        self.assertEqual(self._compile(), Spinach.create_circuit(INLINE))
+
+    def test_artifact_reused_without_parsing(self):
+        self._compile()
+        self.assertEqual(len(list((self.root / modules.CACHE_DIR_NAME).glob("*.sphc"))), 2)
+        modules.clear_cache()
+        with mock.patch("spinachlang.ast_builder._build_module") as build:
+            circuit = self._compile()
+        build.assert_not_called()
+        self.assertEqual(circuit, Spinach.create_circuit(INLINE))
+
+    def test_edit_of_imported_module_invalidates(self):
+        self._compile()
+        modules.clear_cache()
+        self._write("base.sph", BASE.replace("0.5", "1.5"))
+        self.assertEqual(self._compile(), Spinach.create_circuit(INLINE.replace("0.5", "1.5")))
+
+    def test_cache_dir_from_environment(self):
+        with tempfile.TemporaryDirectory() as cache, mock.patch.dict(os.environ, {modules.CACHE_DIR_ENV: cache}):
+            self._compile()
+            self.assertEqual(len(list(pathlib.Path(cache).glob("*.sphc"))), 2)
+        self.assertFalse((self.root / modules.CACHE_DIR_NAME).exists())
+
+    def test_corrupt_artifact_is_rebuilt(self):
+        self._compile()
+        modules.clear_cache()
+        for artifact in (self.root / modules.CACHE_DIR_NAME).glob("*.sphc"):
+            artifact.write_bytes(b"not a pickle")
+        self.assertEqual(self._compile(), Spinach.create_circuit(INLINE))
+
+    def test_failed_artifact_write_leaves_no_temporary_file(self):
+        for target, error in (
+            ("spinachlang.modules.pickle.dump", OSError(errno.ENOSPC, "No space left on device")),
+            ("spinachlang.modules.pickle.dump", pickle.PicklingError("cannot pickle")),
+            ("spinachlang.modules.os.replace", OSError(errno.EACCES, "Permission denied")),
+        ):
+            with self.subTest(target=target, error=error):
+                modules.clear_cache()
+                with mock.patch(target, side_effect=error):
+                    self.assertEqual(self._compile(), Spinach.create_circuit(INLINE))
+                self.assertEqual(list((self.root / modules.CACHE_DIR_NAME).iterdir()), [])
+
+    def test_names_starting_with_import(self):
+        code = 'import "lib.sph"\nimporter : q 1\nimports : H\nimporter -> imports\n'
+        self.assertEqual(self._compile(code).n_gates, 1)
+
+    def test_invalid_modules(self):
+        self._write("cycle_a.sph", 'import "cycle_b.sph"\n')
+        self._write("cycle_b.sph", 'import "cycle_a.sph"\n')
+        self._write("actions.sph", "0 -> H\n")
+        for code in ('import "cycle_a.sph"\n', 'import "actions.sph"\n', 'import "missing.sph"\n'):
+            with self.assertRaises(VisitError, msg=code):
+                self._compile(code)
+
+
+if __name__ == "__main__":
+    unittest.main()
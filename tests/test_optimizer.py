@@ -0,0 +1,165 @@
+"""Tests for the peephole optimizer (``-O1`` / ``-O2``)."""
+
+import unittest
+
+import numpy as np
+
+from spinachlang.ast_builder import AstBuilder
+from spinachlang.optimizer import PeepholeOptimizer
+from spinachlang.parser import Parser
+from spinachlang.spinach import Spinach
+from spinachlang.spinach_types import GateCall, GatePipeline
+
+
+def _pipeline(code: str, level: int = 1) -> list[str]:
+    """Optimise the pipeline of a one-line action and render its parts."""
+    (action,) = AstBuilder().transform(Parser.get_tree(f"0 -> {code}\n"))
+    parts = PeepholeOptimizer(level).optimize_pipeline(action.instruction).parts
+    return [
+        f"{p.name}({', '.join(map(str, p.args))})" if isinstance(p, GateCall) and p.args
+        else p.name
+        for p in parts
+    ]
+
+
+def _same_unitary(a, b) -> bool:
+    """Equal up to global phase."""
+    ua, ub = a.get_unitary(), b.get_unitary()
+    k = np.unravel_index(np.argmax(np.abs(ua)), ua.shape)
+    return np.allclose(ua * (ub[k] / ua[k]), ub)
+
+
+class TestPeepholeRules(unittest.TestCase):
+    """Individual rewrite rules."""
+
+    def test_adjacent_self_inverse(self):
+        self.assertEqual(_pipeline("H | H | X"), ["X"])
+
+    def test_nested_cancellation(self):
+        self.assertEqual(_pipeline("H | X | N | H | Z"), ["Z"])
+
+    def test_inverse_pair(self):
+        self.assertEqual(_pipeline("S | T | TT | ST"), [])
+
+    def test_two_qubit_needs_identical_args(self):
+        self.assertEqual(_pipeline("CX(1) | CNOT(1)"), [])
+        self.assertEqual(_pipeline("CX(1) | CX(2)"), ["CX(1)", "CX(2)"])
+
+    def test_swap_is_not_cancelled(self):
+        """Over several targets SWAP(a) | SWAP(a) is not the identity."""
+        self.assertEqual(_pipeline("SWAP(3) | SWAP(3)"), ["SWAP(3)", "SWAP(3)"])
+
+    def test_identity_rotation_dropped(self):
+        self.assertEqual(_pipeline("RZ(0) | RX(2) | RY(0.5)"), ["RY(0.5)"])
+
+    def test_rotations_merge_only_at_level_2(self):
+        self.assertEqual(_pipeline("RZ(0.1) | RZ(0.2)", level=1), ["RZ(0.1)", "RZ(0.2)"])
+        self.assertEqual(_pipeline("RZ(0.1) | RZ(0.2) | RX(0.5)", level=2), ["RZ(0.3)", "RX(0.5)"])
+
+    def test_merge_to_identity(self):
+        self.assertEqual(_pipeline("H | RZ(1.5) | RZ(0.5) | H", level=2), [])
+
+    def test_barrier_blocks(self):
+        self.assertEqual(_pipeline("H | BARRIER | H"), ["H", "BARRIER", "H"])
+
+    def test_removed_count(self):
+        optimizer = PeepholeOptimizer(2)
+        optimizer.optimize_pipeline(GatePipeline(parts=[
+            GateCall(name="H"), GateCall(name="H"),
+            GateCall(name="RZ", args=[0.25]), GateCall(name="RZ", args=[0.25]),
+        ]))
+        self.assertEqual(optimizer.removed, 3)
+
+    def test_unknown_level(self):
+        with self.assertRaises(ValueError):
+            PeepholeOptimizer(3)
+
+
+class TestOptimizedCircuits(unittest.TestCase):
+    """Optimised programs compile to fewer gates and the same unitary."""
+
+    PROGRAM = (
+        "a : q 0\nb : q 1\n"
+        "prep : H | RZ(0.25) | RZ(0.5) | S | ST\n"
+        "[a, b] -> prep\n"
+        "a -> CX(b) | X | X | CX(b) | RX(0.1)\n"
+        "b -> 3 T | TT | RY(0)\n"
+    )
+
+    def test_same_unitary_fewer_gates(self):
+        plain = Spinach.create_circuit(self.PROGRAM)
+        for level in (1, 2):
+            optimized = Spinach.create_circuit(self.PROGRAM, optimize=level)
+            self.assertLess(optimized.n_gates, plain.n_gates)
+            self.assertTrue(_same_unitary(plain, optimized))
+
+    def test_level_0_is_unchanged(self):
+        self.assertEqual(
+            Spinach.compile(self.PROGRAM, "qasm", optimize=0),
+            Spinach.compile(self.PROGRAM, "qasm"),
+        )
+
+    def test_fully_cancelled_action_keeps_its_qubit(self):
+        circuit = Spinach.create_circuit("q5 : q 5\nq5 -> 1000 H | H\n", optimize=1)
+        self.assertEqual(circuit.n_gates, 0)
+        self.assertEqual(circuit.n_qubits, 1)
+
+    def test_optimizer_instance_reports_removed(self):
+        optimizer = PeepholeOptimizer(2)
+        Spinach.compile(self.PROGRAM, "qasm", optimize=optimizer)
+        self.assertEqual(optimizer.removed, 10)
+
+
+class TestRepeatFolding(unittest.TestCase):
+    """``q -> N pipeline`` with a periodic or closed-form pipeline."""
+
+    def _folded(self, code: str, level: int = 1):
+        optimizer = PeepholeOptimizer(level)
+        circuit = Spinach.create_circuit(code, optimize=optimizer)
+        return [cmd.op.type.name for cmd in circuit.get_commands()], optimizer.removed
+
+    def test_pauli_folds_to_parity(self):
+        self.assertEqual(self._folded("0 -> 1000001 X\n"), (["X"], 1_000_000))
+        self.assertEqual(self._folded("0 -> 1000000 X\n")[0], [])
+
+    def test_clifford_cycle(self):
+        """(S·H) has order 3 up to global phase."""
+        self.assertEqual(self._folded("0 -> 1000000 H | S\n")[0], ["H", "S"])
+
+    def test_t_gate_period_8(self):
+        self.assertEqual(self._folded("0 -> 1000003 T\n")[0], ["T", "T", "T"])
+
+    def test_named_instruction_is_expanded(self):
+        self.assertEqual(self._folded("f : X | Y\n0 -> 1001 f\n"), (["X", "Y"], 2000))
+
+    def test_rotation_angle_is_multiplied(self):
+        commands, _ = self._folded("0 -> 3 RZ(0.25)\n", level=2)
+        self.assertEqual(commands, ["Rz"])
+        circuit = Spinach.create_circuit("0 -> 3 RZ(0.25)\n", optimize=2)
+        self.assertAlmostEqual(float(circuit.get_commands()[0].op.params[0]), 0.75)
+
+    def test_multi_qubit_pipeline_not_folded(self):
+        commands, removed = self._folded("0 -> 4 CX(1)\n")
+        self.assertEqual((len(commands), removed), (4, 0))
+
+    def test_folded_matches_unfolded(self):
+        for code in ("[0, 1] -> 7 H | S | X\n", "0 -> 10 SX | T\n", "0 -> 9 RX(0.5) | RY(0.5)\n"):
+            self.assertTrue(_same_unitary(Spinach.create_circuit(code), Spinach.create_circuit(code, optimize=2)))
+
+
+class TestRepeatReplay(unittest.TestCase):
+    """Repeated actions replay one dispatched block instead of re-dispatching."""
+
+    def test_same_commands_as_unrolled(self):
+        repeated = Spinach.create_circuit("a : q 0\nf : b 1\n[a, 2] -> 3 H | CX(1) | BARRIER | M(f) | PHASE(0.5)\n")
+        unrolled = Spinach.create_circuit(
+            "a : q 0\nf : b 1\n" + "[a, 2] -> H | CX(1) | BARRIER | M(f) | PHASE(0.5)\n" * 3
+        )
+        self.assertEqual(repeated.get_commands(), unrolled.get_commands())
+        self.assertEqual(repeated.qubits, unrolled.qubits)
+        self.assertEqual(repeated.bits, unrolled.bits)
+        self.assertAlmostEqual(float(repeated.phase), float(unrolled.phase))
+
+
+if __name__ == "__main__":
+    unittest.main()
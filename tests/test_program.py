@@ -0,0 +1,60 @@
+"""Tests for SpinachProgram: one front-end run, memoized exports."""
+
+import importlib.util
+import sys
+import unittest
+from unittest import mock
+
+from spinachlang.backend import Backend
+from spinachlang.program import SpinachProgram
+from spinachlang.spinach import Spinach
+from spinachlang.validation import ValidationError
+
+CODE = "a : q 0\nb : q 1\nf : b 0\na -> H | CX(b)\nb -> M(f)\n"
+
+
+class TestSpinachProgram(unittest.TestCase):
+    """Exports match the Spinach entry points and are computed once."""
+
+    def test_exports_match_spinach(self):
+        program = Spinach.load(CODE, optimize=1)
+        self.assertIsInstance(program, SpinachProgram)
+        self.assertEqual(program.to_qasm(), Spinach.compile(CODE, "qasm", optimize=1))
+        self.assertEqual(program.to_json(), Spinach.compile(CODE, "json", optimize=1))
+        self.assertEqual(program.compile("latex"), Spinach.compile(CODE, "latex", optimize=1))
+        self.assertEqual(program.to_tket(), Spinach.to_tket(CODE, optimize=1))
+
+    def test_one_front_end_run(self):
+        with mock.patch.object(Backend, "compile_to_circuit", wraps=Backend.compile_to_circuit) as build:
+            program = Spinach.load(CODE)
+            self.assertEqual(build.call_count, 0)
+            program.to_qasm()
+            program.to_json()
+            program.compile("latex")
+        self.assertEqual(build.call_count, 1)
+        self.assertIs(program.to_qasm(), program.to_qasm())
+
+    def test_to_tket_returns_a_copy(self):
+        program = Spinach.load(CODE)
+        circuit = program.to_tket()
+        circuit.H(0)
+        self.assertNotEqual(program.to_tket(), circuit)
+        self.assertEqual(program.to_qasm(), Spinach.compile(CODE, "qasm"))
+
+    @unittest.skipUnless(importlib.util.find_spec("pytket.extensions.qiskit"), "pytket-qiskit not installed")
+    def test_native_objects_are_memoized(self):
+        program = Spinach.load(CODE)
+        self.assertIs(program.to_qiskit(), program.to_qiskit())
+
+    def test_errors(self):
+        with self.assertRaises(ValidationError):
+            Spinach.load("a : q 0\na -> FOO\n")
+        with self.assertRaises(ValueError):
+            Spinach.load(CODE).compile("nope")
+        with mock.patch.dict(sys.modules, {"pytket.extensions.pyquil": None}):
+            with self.assertRaises(ImportError):
+                Spinach.load(CODE).to_pyquil()
+
+
+if __name__ == "__main__":
+    unittest.main()
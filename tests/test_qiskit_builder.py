@@ -0,0 +1,69 @@
+"""Tests for the direct Spinach-to-qiskit builder: same circuits as the pytket path."""
+
+import importlib.util
+import unittest
+from unittest import mock
+
+from spinachlang.spinach import Spinach
+
+HAS_QISKIT = all(
+    importlib.util.find_spec(module) is not None for module in ("qiskit", "pytket.extensions.qiskit")
+)
+
+CORPUS = [
+    "a : q 0\nb : q 1\na -> H | CX(b)\n* -> M\n",
+    "r : q[0..3]\nfor i in 0..2: r[i] -> H | CX(r[i+1]) | RZ(pi / 4)\nr -> M\n",
+    "a : q anc 0\na -> H\nb : q 1\nb -> X | V | VDG | SX | SXDG | S | ST | T | TT\n* -> M\n",
+    "0 -> U1(0.5) | U2(0.25, 0.5) | U3(0.1, 0.2, 0.3) | PX(0.3, 0.7) | RX(0.1) | RY(0.2)\n"
+    "1 -> CU1(0.25, 0) | CRX(0.5, 0) | CRY(0.5, 0) | CRZ(0.5, 0) | ECR(0) | ISWAPMAX(0)"
+    " | ZZPH(0.2, 0) | XXPH(0.3, 0) | YYPH(0.4, 0)\n"
+    "2 -> CCX(0, 1) | CSWAP(0, 1) | SWAP(0) | FCX(1) | CY(0) | FCZ(1) | CH(0) | FCH(1) | R\n",
+    "p : H | CX(1)\n0 -> p | p <-\n[0, 1] -> BARRIER\n0 -> PHASE(0.25)\n0 -> 3 X | PHASE(0.5)\nf : b 0\n0 -> M(f)\n",
+    "l : [0, 2]\nl -> H\n1 -> X\n* -> M\n",
+    # angles outside one period, which pytket reduces
+    "0 -> RZ(4.5) | RZ(-0.5) | U1(2.5) | U3(4.5, 2.5, 3.5) | PX(4.5, 2.5)\n1 -> CU1(2.5, 0) | XXPH(-0.5, 0)\n",
+]
+
+
+@unittest.skipUnless(HAS_QISKIT, "qiskit and pytket-qiskit are required")
+class TestQiskitBuilder(unittest.TestCase):
+    """``build`` gives what ``tk_to_qiskit`` gives, or raises ``Unsupported``."""
+
+    def test_matches_pytket_path(self):
+        for code in CORPUS:
+            with self.subTest(code=code):
+                self.assertEqual(Spinach.to_qiskit(code), Spinach.to_qiskit(code, direct=False))
+
+    def test_unsupported(self):
+        from spinachlang.program import checked_ast
+        from spinachlang.qiskit_builder import Unsupported, build
+
+        for code in (
+            "f : b 0\n0 -> M(f)\n1 -> X if f\n",
+            "f : b 0\nf -> NOT\n",
+            "p : H | CX(1)\n0 -> CIRCBOX(p)\n",
+            "0 -> TK1(0.1, 0.2, 0.3)\n",
+        ):
+            with self.subTest(code=code), self.assertRaises(Unsupported):
+                build(checked_ast(code, None)[0])
+
+    def test_unsupported_falls_back(self):
+        code = "f : b 0\n0 -> H | M(f)\n1 -> X if f\n"
+        self.assertEqual(Spinach.to_qiskit(code), Spinach.to_qiskit(code, direct=False))
+
+    def test_skips_pytket_circuit(self):
+        program = Spinach.load(CORPUS[0])
+        with mock.patch("spinachlang.backend.Backend.compile_to_circuit") as compile_to_circuit:
+            circuit = program.to_qiskit()
+        compile_to_circuit.assert_not_called()
+        self.assertIs(program.to_qiskit(), circuit)
+
+    def test_passes_use_pytket_path(self):
+        program = Spinach.load(CORPUS[0], passes=["RemoveRedundancies"])
+        with mock.patch("spinachlang.qiskit_builder.build") as build:
+            program.to_qiskit()
+        build.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
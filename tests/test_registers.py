@@ -0,0 +1,80 @@
+"""Tests for register declarations (``data : q[0..999]``) and slice targets (``data[10..20]``)."""
+
+import unittest
+
+from lark.exceptions import VisitError
+from pytket import Qubit
+
+from spinachlang.analysis import MetricsAnalyzer
+from spinachlang.ast_builder import AstBuilder
+from spinachlang.parser import Parser
+from spinachlang.spinach import Spinach
+from spinachlang.spinach_types import RegisterDeclaration, RegisterSlice
+
+
+def _nodes(code: str) -> list:
+    return AstBuilder().transform(Parser.get_tree(code))
+
+
+class TestRegisterAst(unittest.TestCase):
+    """Registers and slices stay compact in the AST."""
+
+    def test_declaration_keeps_bounds_only(self):
+        (node,) = _nodes("data : q[0..999]\n")
+        self.assertEqual(node, RegisterDeclaration(name="data", start=0, stop=999))
+        self.assertEqual(node.size, 1000)
+
+    def test_named_register(self):
+        (node,) = _nodes("anc : q ancilla[4..7]\n")
+        self.assertEqual(node.qubits(), [Qubit("ancilla", i) for i in range(4, 8)])
+
+    def test_slice_targets(self):
+        nodes = _nodes("data : q[0..9]\ndata[2..5] -> H\ndata[3] -> X if f\n")
+        self.assertEqual(nodes[1].target, RegisterSlice(name="data", start=2, stop=5))
+        self.assertEqual(nodes[2].target, RegisterSlice(name="data", start=3, stop=3))
+
+    def test_invalid_bounds(self):
+        for code in ("data : q[5..2]\n", "data : q[0..1.5]\n", "data : q[0..3]\ndata[3..1] -> H\n"):
+            with self.assertRaises(VisitError, msg=code):
+                _nodes(code)
+
+
+class TestRegisterTargets(unittest.TestCase):
+    """Registers expand to their qubits only when targets are resolved."""
+
+    def test_same_circuit_as_individual_declarations(self):
+        ranged = Spinach.create_circuit("data : q[0..3]\ndata -> H\ndata[1..2] -> X\ndata[3] -> CX(0)\n")
+        single = Spinach.create_circuit(
+            "d0 : q 0\nd1 : q 1\nd2 : q 2\nd3 : q 3\n[d0, d1, d2, d3] -> H\n[d1, d2] -> X\nd3 -> CX(0)\n"
+        )
+        self.assertEqual(ranged.get_commands(), single.get_commands())
+
+    def test_slice_is_relative_to_register_start(self):
+        circuit = Spinach.create_circuit("data : q[10..19]\ndata[0..1] -> H\n")
+        self.assertEqual(circuit.qubits, [Qubit("q", 10), Qubit("q", 11)])
+
+    def test_large_register(self):
+        circuit = Spinach.create_circuit("data : q[0..999]\ndata -> H\ndata[500..999] -> X\n")
+        self.assertEqual((circuit.n_qubits, circuit.n_gates), (1000, 1500))
+
+    def test_slice_out_of_bounds(self):
+        with self.assertRaises(ValueError):
+            Spinach.create_circuit("data : q[0..3]\ndata[2..4] -> H\n")
+
+    def test_slice_of_non_register(self):
+        with self.assertRaises(ValueError):
+            Spinach.create_circuit("a : q 0\na[0] -> H\n")
+
+    def test_slices_in_named_list(self):
+        circuit = Spinach.create_circuit("data : q[0..7]\nedges : [data[0..1], data[6..7]]\nedges -> H\n")
+        self.assertEqual(sorted(cmd.qubits[0].index[0] for cmd in circuit.get_commands()), [0, 1, 6, 7])
+
+    def test_metrics_match_circuit(self):
+        code = "data : q[0..7]\ndata -> H\ndata[0..3] -> CX(4)\n"
+        metrics, _ = MetricsAnalyzer().analyse(_nodes(code))
+        circuit = Spinach.create_circuit(code)
+        self.assertEqual((metrics.qubits, metrics.gates), (circuit.n_qubits, circuit.n_gates))
+
+
+if __name__ == "__main__":
+    unittest.main()
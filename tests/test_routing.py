@@ -0,0 +1,94 @@
+"""Tests for placement and routing onto coupling maps (``route=`` / ``--arch``)."""
+
+import json
+import pathlib
+import tempfile
+import unittest
+
+from spinachlang.routing import Router, architecture_hash, load_coupling_map, route_batch
+from spinachlang.spinach import Spinach
+
+LINE_4 = [(0, 1), (1, 2), (2, 3)]
+
+PROGRAM = (
+    "a : q 0\nd : q 3\n"
+    "a -> H | CX(d)\n"
+    "[1, 2] -> CZ(a)\n"
+)
+
+
+def _respects(circuit, coupling_map) -> bool:
+    """True when every two-qubit gate acts on a coupled pair."""
+    edges = {frozenset(e) for e in coupling_map}
+    return all(
+        frozenset(q.index[0] for q in cmd.qubits) in edges
+        for cmd in circuit.get_commands() if len(cmd.qubits) == 2
+    )
+
+
+class TestRouter(unittest.TestCase):
+    """Routing a compiled circuit onto one device."""
+
+    def setUp(self):
+        Router.clear_cache()
+
+    def test_routed_circuit_respects_connectivity(self):
+        self.assertFalse(_respects(Spinach.create_circuit(PROGRAM), LINE_4))
+        routed = Spinach.create_circuit(PROGRAM, route=LINE_4)
+        self.assertTrue(_respects(routed, LINE_4))
+
+    def test_repeated_routing_hits_cache(self):
+        router = Router(LINE_4)
+        first = Spinach.create_circuit(PROGRAM, route=router)
+        self.assertFalse(router.cache_hit)
+        second = Spinach.create_circuit(PROGRAM, route=router)
+        self.assertTrue(router.cache_hit)
+        self.assertEqual(first, second)
+
+    def test_cache_keyed_by_architecture(self):
+        Spinach.create_circuit(PROGRAM, route=LINE_4)
+        ring = Router(LINE_4 + [(3, 0)])
+        Spinach.create_circuit(PROGRAM, route=ring)
+        self.assertFalse(ring.cache_hit)
+
+    def test_architecture_hash_ignores_order_and_direction(self):
+        self.assertEqual(architecture_hash(LINE_4), architecture_hash([(3, 2), (0, 1), (2, 1)]))
+        self.assertNotEqual(architecture_hash(LINE_4), architecture_hash(LINE_4[:2]))
+
+    def test_too_many_qubits(self):
+        with self.assertRaises(ValueError):
+            Spinach.create_circuit(PROGRAM, route=[(0, 1)])
+
+    def test_invalid_coupling_maps(self):
+        for bad in ([], [(0, 0)], [(0, 1, 2)], [("a", 1)]):
+            with self.assertRaises(ValueError):
+                Router(bad)
+
+    def test_load_coupling_map_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            obj = pathlib.Path(tmp, "device.json")
+            obj.write_text(json.dumps({"name": "line", "coupling_map": [[0, 1], [1, 2]]}))
+            bare = pathlib.Path(tmp, "bare.json")
+            bare.write_text("[[0, 1], [1, 2]]")
+            broken = pathlib.Path(tmp, "broken.json")
+            broken.write_text("{")
+            self.assertEqual(load_coupling_map(obj), [(0, 1), (1, 2)])
+            self.assertEqual(load_coupling_map(bare), [(0, 1), (1, 2)])
+            with self.assertRaises(ValueError):
+                load_coupling_map(broken)
+
+
+class TestRouteBatch(unittest.TestCase):
+    """Many programs routed for one device in a process pool."""
+
+    def test_batch_matches_sequential_in_order(self):
+        codes = [PROGRAM, "0 -> H | CX(3)\n", PROGRAM]
+        batch = route_batch(codes, LINE_4, max_workers=2)
+        self.assertEqual(len(batch), 3)
+        for code, routed in zip(codes, batch):
+            self.assertEqual(routed, Spinach.create_circuit(code, route=LINE_4))
+        self.assertIsNot(batch[0], batch[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
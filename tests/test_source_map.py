@@ -0,0 +1,91 @@
+"""Tests for node spans, located backend errors and source maps."""
+
+import json
+import pathlib
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from spinachlang.ast_binary import dump, load
+from spinachlang.ast_builder import AstBuilder
+from spinachlang.main import main
+from spinachlang.parser import Parser
+from spinachlang.source_map import LineIndex, SourceMap
+from spinachlang.spinach import Spinach
+
+PROGRAM = "a : q 0\nb : q 1\nbell : H | CX(b)\n\na -> bell\nfor i in 0..2: i -> RZ(pi / 4)\n"
+
+
+def _nodes(code: str, spans: bool = True) -> list:
+    return AstBuilder(spans=spans).transform(Parser.get_tree(code, positions=spans))
+
+
+class TestSpans(unittest.TestCase):
+    """Nodes carry the offsets of the source they were built from."""
+
+    def test_statement_and_gate_spans(self):
+        nodes = _nodes(PROGRAM)
+        self.assertEqual(
+            [PROGRAM[start:end] for start, end in (node.span for node in nodes)],
+            ["a : q 0", "b : q 1", "bell : H | CX(b)", "a -> bell", "for i in 0..2: i -> RZ(pi / 4)"],
+        )
+        self.assertEqual([PROGRAM[slice(*part.span)] for part in nodes[2].pipeline.parts], ["H", "CX(b)"])
+
+    def test_spans_are_off_by_default_and_ignored_by_equality(self):
+        self.assertTrue(all(node.span is None for node in _nodes(PROGRAM, spans=False)))
+        self.assertEqual(_nodes(PROGRAM), _nodes(PROGRAM, spans=False))
+
+    def test_binary_ast_keeps_spans(self):
+        nodes = _nodes(PROGRAM)
+        self.assertEqual([node.span for node in load(dump(nodes))], [node.span for node in nodes])
+
+    def test_line_index(self):
+        lines = LineIndex("ab\n\ncd")
+        self.assertEqual([lines.position(i) for i in (0, 1, 3, 4, 6)], [(1, 1), (1, 2), (2, 1), (3, 1), (3, 3)])
+
+
+class TestLocatedErrors(unittest.TestCase):
+    """Errors raised while compiling point at their source."""
+
+    CODE = "r : q[0..1]\n\nfor i in 0..2:\n    r[i] -> H\n"
+
+    def test_statement_line_without_spans(self):
+        with self.assertRaises(ValueError) as ctx:
+            Spinach.create_circuit(self.CODE)
+        self.assertEqual((ctx.exception.statement, ctx.exception.line, ctx.exception.column), (1, 3, 1))
+        self.assertTrue(str(ctx.exception).startswith("line 3:1: Range [2..2] is out of bounds"))
+
+    def test_innermost_node_with_spans(self):
+        with self.assertRaises(ValueError) as ctx:
+            Spinach.create_circuit(self.CODE, source_map=SourceMap())
+        self.assertEqual((ctx.exception.line, ctx.exception.column), (4, 5))
+        self.assertEqual(self.CODE[slice(*ctx.exception.span)], "r[i] -> H")
+
+
+class TestSourceMap(unittest.TestCase):
+    """One entry per statement with its position and the gates it added."""
+
+    def test_entries(self):
+        source_map = SourceMap()
+        circuit = Spinach.create_circuit(PROGRAM, source_map=source_map)
+        self.assertEqual([entry.gates for entry in source_map.statements], [0, 0, 0, 2, 3])
+        self.assertEqual(sum(entry.gates for entry in source_map.statements), circuit.n_gates)
+        loop = source_map.statements[4]
+        self.assertEqual((loop.line, loop.column, loop.end_line, loop.end_column), (6, 1, 6, 31))
+
+    def test_cli_writes_map_next_to_output(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = pathlib.Path(tmp, "prog.sph")
+            source.write_text(PROGRAM, encoding="utf-8")
+            output = pathlib.Path(tmp, "prog.qasm")
+            argv = ["spinachlang", "-l", "qasm", str(source), "-o", str(output), "--source-map"]
+            with mock.patch.object(sys, "argv", argv):
+                main()
+            data = json.loads(pathlib.Path(tmp, "prog.qasm.map").read_text(encoding="utf-8"))
+        self.assertEqual(data["output"], str(output))
+        self.assertEqual([entry["line"] for entry in data["statements"]], [1, 2, 3, 5, 6])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""Tests for the pytket pass pipeline (``passes=`` / ``--pass``)."""
+
+import unittest
+
+from spinachlang.spinach import Spinach
+from spinachlang.tket_passes import GATESETS, TketPassPipeline, available_passes, circuit_hash
+
+PROGRAM = (
+    "a : q 0\nb : q 1\n"
+    "a -> H | RZ(0.25) | RZ(0.25) | CX(b) | CX(b) | H\n"
+    "b -> RY(0.3) | T\n"
+)
+
+
+class TestTketPassPipeline(unittest.TestCase):
+    """Running, timing and caching named passes."""
+
+    def setUp(self):
+        TketPassPipeline.clear_cache()
+
+    def test_full_peephole_reduces_gates(self):
+        plain = Spinach.create_circuit(PROGRAM)
+        optimised = Spinach.create_circuit(PROGRAM, passes=["FullPeepholeOptimise"])
+        self.assertLess(optimised.n_gates, plain.n_gates)
+
+    def test_rebase_to_gateset(self):
+        circuit = Spinach.create_circuit(PROGRAM, passes=["rebase:ibm"])
+        self.assertTrue({cmd.op.type for cmd in circuit.get_commands()} <= GATESETS["ibm"])
+
+    def test_input_circuit_untouched(self):
+        circuit = Spinach.create_circuit(PROGRAM)
+        before = circuit.copy()
+        TketPassPipeline(["RemoveRedundancies"]).run(circuit)
+        self.assertEqual(circuit, before)
+
+    def test_timings_per_pass(self):
+        pipeline = TketPassPipeline(["RemoveRedundancies", "rebase:tk"])
+        Spinach.compile(PROGRAM, "qasm", passes=pipeline)
+        self.assertFalse(pipeline.cache_hit)
+        self.assertEqual(list(pipeline.timings), ["RemoveRedundancies", "rebase:tk"])
+        self.assertTrue(all(ms >= 0 for ms in pipeline.timings.values()))
+
+    def test_repeated_submission_hits_cache(self):
+        pipeline = TketPassPipeline(["FullPeepholeOptimise"])
+        first = Spinach.create_circuit(PROGRAM, passes=pipeline)
+        second = Spinach.create_circuit(PROGRAM, passes=pipeline)
+        self.assertTrue(pipeline.cache_hit)
+        self.assertEqual(pipeline.timings, {})
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+
+    def test_cache_keyed_by_pass_list(self):
+        Spinach.create_circuit(PROGRAM, passes=["RemoveRedundancies"])
+        pipeline = TketPassPipeline(["RemoveRedundancies", "rebase:ibm"])
+        Spinach.create_circuit(PROGRAM, passes=pipeline)
+        self.assertFalse(pipeline.cache_hit)
+
+    def test_structure_hash(self):
+        self.assertEqual(circuit_hash(Spinach.create_circuit(PROGRAM)), circuit_hash(Spinach.create_circuit(PROGRAM)))
+        self.assertNotEqual(
+            circuit_hash(Spinach.create_circuit("0 -> RZ(0.25)\n")),
+            circuit_hash(Spinach.create_circuit("0 -> RZ(0.5)\n")),
+        )
+
+    def test_no_passes_is_unchanged(self):
+        self.assertEqual(Spinach.compile(PROGRAM, "qasm", passes=[]), Spinach.compile(PROGRAM, "qasm"))
+
+    def test_unknown_names(self):
+        for name in ("NotAPass", "rebase:nowhere"):
+            with self.assertRaises(ValueError):
+                TketPassPipeline([name])
+        self.assertIn("rebase:ibm", available_passes())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""Tests for the validation pass run before compilation."""
+
+import unittest
+from unittest import mock
+
+from spinachlang.backend import Backend
+from spinachlang.spinach import Spinach
+from spinachlang.validation import ValidationError, ValidationIssue
+
+
+def _messages(code: str) -> list:
+    return [(issue.line, issue.message) for issue in Spinach.validate(code)]
+
+
+class TestValidate(unittest.TestCase):
+    """Every problem the backend would raise on is reported with its line."""
+
+    def test_valid_program(self):
+        code = (
+            "a : q 0\nb : q 1\nf : b 0\nr : q[2..5]\nbell : H | CX(b)\n"
+            "a -> bell\nr[1..2] -> X\na -> M(f)\nb -> X if f else Z\nf -> NOT\n"
+            "for i in 0..3: r[i] -> RZ(pi / 4)\n"
+        )
+        self.assertEqual(Spinach.validate(code), [])
+
+    def test_reports_every_issue(self):
+        code = (
+            "a : q 0\n"
+            "bell : H | FOO\n"
+            "a -> bell\n"
+            "b -> X\n"
+            "a -> RX | U1(1, 2)\n"
+            "a -> X if a\n"
+            "a -> CX(missing)\n"
+            "a -> BARRIER if f\n"
+        )
+        self.assertEqual(_messages(code), [
+            (3, "in instruction 'bell': Unknown qubit gate 'FOO'"),
+            (4, "Undefined name 'b'"),
+            (5, "RX takes at least 1 argument(s), got 0"),
+            (5, "U1 takes 1 argument(s), got 2"),
+            (6, "'a' is not a classical Bit (got Qubit)"),
+            (7, "Undefined name 'missing' in CX"),
+            (8, "Unknown classical bit 'f' used as condition"),
+            (8, "BARRIER cannot be used inside a conditional branch"),
+        ])
+
+    def test_names_resolve_in_program_order(self):
+        self.assertEqual(_messages("a -> X\na : q 0\n"), [(1, "Undefined name 'a'")])
+        self.assertEqual(
+            _messages("p : H\nq0 : q 0\nq0 -> p\np : FOO\nq0 -> p\n"),
+            [(5, "in instruction 'p': Unknown qubit gate 'FOO'")],
+        )
+
+    def test_bit_operations(self):
+        code = "f : b 0\ng : b 1\na : q 0\nf -> AND(g, a) | SET(2) | H\n"
+        self.assertEqual(_messages(code), [
+            (4, "AND arguments must be classical bits"),
+            (4, "SET argument must be 0 or 1, got 2"),
+            (4, "Unknown classical bit operation 'H'"),
+        ])
+
+    def test_register_slices(self):
+        self.assertEqual(
+            _messages("r : q[0..3]\nr[2..9] -> H\nx[0] -> H\n"),
+            [
+                (2, "Range [2..9] is out of bounds for register 'r' of size 4"),
+                (3, "'x' is not a register; declare it as 'x : q[start..stop]'"),
+            ],
+        )
+
+    def test_star_targets_the_qubits_added_so_far(self):
+        code = "f : b 0\n* -> NOT\n"
+        self.assertEqual(Spinach.validate(code), [])
+        self.assertEqual(Spinach.create_circuit(code).n_gates, 0)
+        self.assertEqual(_messages("f : b 0\n0 -> H\n* -> NOT\n"), [(3, "Unknown qubit gate 'NOT'")])
+
+    def test_binary_ast_has_no_lines(self):
+        (issue,) = Spinach.validate(Spinach.dump_ast("a : q 0\nb -> X\n"))
+        self.assertEqual(issue, ValidationIssue(1, "Undefined name 'b'"))
+        self.assertEqual(str(issue), "statement 2: Undefined name 'b'")
+
+
+class TestCompileValidates(unittest.TestCase):
+    """Compilation stops before building a circuit when validation fails."""
+
+    def test_raises_before_compiling(self):
+        with mock.patch.object(Backend, "compile_to_circuit") as compile_to_circuit:
+            with self.assertRaises(ValidationError) as ctx:
+                Spinach.create_circuit("a : q 0\na -> H\na -> FOO\nb -> X\n")
+        compile_to_circuit.assert_not_called()
+        self.assertEqual(len(ctx.exception.issues), 2)
+        self.assertEqual(str(ctx.exception).splitlines()[0], "line 3:1: Unknown qubit gate 'FOO'")
+
+    def test_is_a_value_error(self):
+        with self.assertRaises(ValueError):
+            Spinach.compile("0 -> RX\n", "qasm")
+
+
+if __name__ == "__main__":
+    unittest.main()